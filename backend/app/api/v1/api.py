@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, career, user, mentorship, gamification, learning, community, upload, goals, collaboration, admin, payment
+from app.api.v1.endpoints import auth, career, user, mentorship, gamification, learning, community, upload, goals, collaboration, admin, payment, search
 
 api_router = APIRouter()
 
@@ -89,3 +89,10 @@ api_router.include_router(
     prefix="/goals",
     tags=["Goals"]
 )
+
+# Search routes
+api_router.include_router(
+    search.router,
+    prefix="/search",
+    tags=["Search"]
+)
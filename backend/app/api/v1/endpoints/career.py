@@ -116,6 +116,7 @@ async def assess_career_path(
         match_score=recommendation.match_score,
         alternative_roles=recommendation.alternative_roles,
         skill_gaps=recommendation.skill_gaps,
+        recommended_paths=recommendation.recommended_paths,
         personality_traits=recommendation.personality_traits,
         created_at=assessment.created_at,
     )
@@ -132,7 +133,7 @@ async def analyze_skill_gap(
     result = await db.execute(
         select(CareerAssessment).where(
             CareerAssessment.user_id == current_user["user_id"]
-        ).order_by(CareerAssessment.created_at.desc())
+        ).order_by(CareerAssessment.created_at.desc()).limit(1)
     )
     assessment = result.scalar_one_or_none()
     
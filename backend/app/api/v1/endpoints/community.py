@@ -1,52 +1,97 @@
 """Community API endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+from uuid import UUID
 
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.services.comments import CommentThreadService, comment_response
+from app.services.user_cards import user_cards
+from app.services.trending_tags import TrendingTagsService, normalize_tags, WINDOWS
+from app.services.timeline import TimelineService, fan_out_post, schedule_timeline_rebuild
+from app.services.view_counter import view_counter
+from app.services.viewer_state import ViewerStateService, record_viewer_state, REACTIONS, BOOKMARKS
+from app.utils.helpers import encode_cursor, decode_cursor
 from app.schemas.community import (
     PostCreate,
     PostResponse,
     CommentCreate,
     CommentResponse,
+    CommentThread,
     ReactionCreate,
+    TrendingTag,
 )
 
 router = APIRouter()
 
 
+def _post_response(p, author: Dict[str, Any], is_liked: bool, is_bookmarked: bool) -> Dict[str, Any]:
+    """Serialize a post row with its author's user card."""
+    return {
+        "id": str(p.id),
+        "author": author,
+        "title": p.title,
+        "content": p.content,
+        "content_type": p.content_type,
+        "images": p.images or [],
+        "tags": p.tags or [],
+        "category": p.category,
+        "likes_count": p.likes_count,
+        "comments_count": p.comments_count,
+        "is_liked": is_liked,
+        "is_bookmarked": is_bookmarked,
+        "is_pinned": p.is_pinned,
+        "created_at": p.created_at,
+    }
+
+
+def _decode_comment_cursor(cursor: str):
+    """(created_at, id) of the last comment of the previous page."""
+    try:
+        created_at, comment_id = decode_cursor(cursor, 2)
+        return datetime.fromisoformat(created_at), str(UUID(comment_id))
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
 # ============== Feed ==============
 
 @router.get("/feed", response_model=List[PostResponse])
 async def get_feed(
+    response: Response,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="Continuation token from X-Next-Cursor"),
+    sort: str = Query("recent", pattern="^(recent|hot)$"),
     category: Optional[str] = Query(None),
     content_type: Optional[str] = Query(None),
+    tag: Optional[str] = Query(None, max_length=50),
     current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get activity feed."""
+    """
+    Get activity feed.
+    
+    Pass the X-Next-Cursor header of the previous response as `cursor` to page
+    by keyset on (is_pinned, created_at, id), or (hot_score, id) with
+    `sort=hot`; `page` (OFFSET) paging is kept for older clients.
+    """
     user_id = current_user["user_id"]
-    offset = (page - 1) * limit
     
     query = """
-        SELECT 
-            p.*,
-            u.username as author_username,
-            u.full_name as author_name,
-            u.profile_picture_url as author_avatar,
-            EXISTS(SELECT 1 FROM reactions r WHERE r.target_type = 'post' AND r.target_id = p.id AND r.user_id = :user_id) as is_liked,
-            EXISTS(SELECT 1 FROM bookmarks b WHERE b.target_type = 'post' AND b.target_id = p.id AND b.user_id = :user_id) as is_bookmarked
+        SELECT p.*
         FROM posts p
-        JOIN users u ON p.author_id = u.id
         WHERE p.is_published = true AND p.moderation_status = 'approved'
     """
     
-    params = {"user_id": user_id, "limit": limit, "offset": offset}
+    params = {"limit": limit}
     
     if category:
         query += " AND p.category = :category"
@@ -56,34 +101,111 @@ async def get_feed(
         query += " AND p.content_type = :content_type"
         params["content_type"] = content_type
     
-    query += " ORDER BY p.is_pinned DESC, p.created_at DESC LIMIT :limit OFFSET :offset"
+    if tag:
+        query += " AND p.tags @> jsonb_build_array(CAST(:tag AS text))"
+        params["tag"] = tag.strip().lower()
+    
+    if sort == "hot":
+        order_by = " ORDER BY p.hot_score DESC, p.id DESC"
+        keyset = """
+            AND (p.hot_score, p.id) < (:cursor_hot_score, CAST(:cursor_id AS uuid))
+        """
+    else:
+        order_by = " ORDER BY p.is_pinned DESC, p.created_at DESC, p.id DESC"
+        keyset = """
+            AND (p.is_pinned, p.created_at, p.id)
+                < (:cursor_pinned, :cursor_created_at, CAST(:cursor_id AS uuid))
+        """
     
-    result = await db.execute(query, params)
+    if cursor:
+        try:
+            if sort == "hot":
+                cursor_hot_score, cursor_id = decode_cursor(cursor, 2)
+                params["cursor_hot_score"] = float(cursor_hot_score)
+            else:
+                cursor_pinned, cursor_created_at, cursor_id = decode_cursor(cursor, 3)
+                params["cursor_pinned"] = bool(cursor_pinned)
+                params["cursor_created_at"] = datetime.fromisoformat(cursor_created_at)
+            params["cursor_id"] = str(UUID(cursor_id))
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query += keyset + order_by + " LIMIT :limit"
+    else:
+        params["offset"] = (page - 1) * limit
+        query += order_by + " LIMIT :limit OFFSET :offset"
+    
+    result = await db.execute(text(query), params)
     posts = result.fetchall()
     
+    if len(posts) == limit:
+        last = posts[-1]
+        response.headers["X-Next-Cursor"] = (
+            encode_cursor(last.hot_score, last.id)
+            if sort == "hot"
+            else encode_cursor(last.is_pinned, last.created_at, last.id)
+        )
+    
+    authors = await user_cards.get_many(db, [p.author_id for p in posts])
+    liked, bookmarked = await ViewerStateService(db).for_posts(user_id, [str(p.id) for p in posts])
     return [
-        {
-            "id": str(p.id),
-            "author": {
-                "id": str(p.author_id),
-                "username": p.author_username,
-                "full_name": p.author_name,
-                "avatar_url": p.author_avatar,
-            },
-            "title": p.title,
-            "content": p.content,
-            "content_type": p.content_type,
-            "images": p.images or [],
-            "tags": p.tags or [],
-            "category": p.category,
-            "likes_count": p.likes_count,
-            "comments_count": p.comments_count,
-            "is_liked": p.is_liked,
-            "is_bookmarked": p.is_bookmarked,
-            "is_pinned": p.is_pinned,
-            "created_at": p.created_at,
-        }
-        for p in posts
+        _post_response(p, authors[str(p.author_id)], str(p.id) in liked, str(p.id) in bookmarked)
+        for p in posts if str(p.author_id) in authors
+    ]
+
+
+@router.get("/timeline", response_model=List[PostResponse])
+async def get_timeline(
+    response: Response,
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="Continuation token from X-Next-Cursor"),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the personalized home timeline (own posts and posts by followed users)."""
+    user_id = current_user["user_id"]
+    
+    before = None
+    if cursor:
+        try:
+            before_id, before_at = decode_cursor(cursor, 2)
+            before = (str(UUID(before_id)), datetime.fromisoformat(before_at))
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    entries = await TimelineService(db).get_page(user_id, before, limit)
+    if not entries:
+        return []
+    
+    if len(entries) == limit:
+        last_id, last_at = entries[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last_id, last_at)
+    
+    result = await db.execute(
+        text("""
+        SELECT p.*
+        FROM posts p
+        WHERE p.id = ANY(CAST(:post_ids AS uuid[]))
+          AND p.is_published = true AND p.moderation_status = 'approved'
+        """),
+        {"post_ids": [post_id for post_id, _ in entries]}
+    )
+    rows = result.fetchall()
+    authors = await user_cards.get_many(db, [p.author_id for p in rows])
+    posts = {str(p.id): p for p in rows if str(p.author_id) in authors}
+    liked, bookmarked = await ViewerStateService(db).for_posts(user_id, posts.keys())
+    
+    # Keep timeline order; entries for deleted/hidden posts are skipped
+    return [
+        _post_response(
+            posts[post_id], authors[str(posts[post_id].author_id)], post_id in liked, post_id in bookmarked
+        )
+        for post_id, _ in entries if post_id in posts
     ]
 
 
@@ -92,6 +214,7 @@ async def get_feed(
 @router.post("/posts", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
 async def create_post(
     post_data: PostCreate,
+    background_tasks: BackgroundTasks,
     current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -99,18 +222,18 @@ async def create_post(
     user_id = current_user["user_id"]
     
     result = await db.execute(
-        """
+        text("""
         INSERT INTO posts (author_id, title, content, content_type, images, tags, category)
         VALUES (:author_id, :title, :content, :content_type, :images, :tags, :category)
         RETURNING *
-        """,
+        """),
         {
             "author_id": user_id,
             "title": post_data.title,
             "content": post_data.content,
             "content_type": post_data.content_type or "text",
             "images": post_data.images or [],
-            "tags": post_data.tags or [],
+            "tags": normalize_tags(post_data.tags or []),
             "category": post_data.category,
         }
     )
@@ -118,21 +241,12 @@ async def create_post(
     post = result.first()
     await db.commit()
     
-    # Get author info
-    author_result = await db.execute(
-        "SELECT username, full_name, profile_picture_url FROM users WHERE id = :user_id",
-        {"user_id": user_id}
-    )
-    author = author_result.first()
+    # Push into follower timelines after the response is sent
+    background_tasks.add_task(fan_out_post, str(post.id), user_id, post.created_at)
     
     return {
         "id": str(post.id),
-        "author": {
-            "id": user_id,
-            "username": author.username,
-            "full_name": author.full_name,
-            "avatar_url": author.profile_picture_url,
-        },
+        "author": await user_cards.get(db, user_id),
         "title": post.title,
         "content": post.content,
         "content_type": post.content_type,
@@ -158,19 +272,12 @@ async def get_post(
     user_id = current_user["user_id"]
     
     result = await db.execute(
-        """
-        SELECT 
-            p.*,
-            u.username as author_username,
-            u.full_name as author_name,
-            u.profile_picture_url as author_avatar,
-            EXISTS(SELECT 1 FROM reactions r WHERE r.target_type = 'post' AND r.target_id = p.id AND r.user_id = :user_id) as is_liked,
-            EXISTS(SELECT 1 FROM bookmarks b WHERE b.target_type = 'post' AND b.target_id = p.id AND b.user_id = :user_id) as is_bookmarked
+        text("""
+        SELECT p.*
         FROM posts p
-        JOIN users u ON p.author_id = u.id
         WHERE p.id = :post_id AND p.is_published = true
-        """,
-        {"post_id": post_id, "user_id": user_id}
+        """),
+        {"post_id": post_id}
     )
     
     post = result.first()
@@ -180,21 +287,14 @@ async def get_post(
             detail="Post not found"
         )
     
-    # Increment view count
-    await db.execute(
-        "UPDATE posts SET views_count = views_count + 1 WHERE id = :post_id",
-        {"post_id": post_id}
-    )
-    await db.commit()
+    liked, bookmarked = await ViewerStateService(db).for_posts(user_id, [str(post.id)])
+    
+    # Buffered; flushed to posts.views_count by a background job
+    counted = await view_counter.record(str(post.id), user_id)
     
     return {
         "id": str(post.id),
-        "author": {
-            "id": str(post.author_id),
-            "username": post.author_username,
-            "full_name": post.author_name,
-            "avatar_url": post.author_avatar,
-        },
+        "author": await user_cards.get(db, post.author_id),
         "title": post.title,
         "content": post.content,
         "content_type": post.content_type,
@@ -203,9 +303,9 @@ async def get_post(
         "category": post.category,
         "likes_count": post.likes_count,
         "comments_count": post.comments_count,
-        "views_count": post.views_count + 1,
-        "is_liked": post.is_liked,
-        "is_bookmarked": post.is_bookmarked,
+        "views_count": (post.views_count or 0) + counted,
+        "is_liked": str(post.id) in liked,
+        "is_bookmarked": str(post.id) in bookmarked,
         "is_pinned": post.is_pinned,
         "created_at": post.created_at,
     }
@@ -221,7 +321,7 @@ async def delete_post(
     user_id = current_user["user_id"]
     
     result = await db.execute(
-        "DELETE FROM posts WHERE id = :post_id AND author_id = :user_id RETURNING id",
+        text("DELETE FROM posts WHERE id = :post_id AND author_id = :user_id RETURNING id"),
         {"post_id": post_id, "user_id": user_id}
     )
     
@@ -235,54 +335,136 @@ async def delete_post(
     return {"message": "Post deleted"}
 
 
+# ============== Tags ==============
+
+@router.get("/tags/trending", response_model=List[TrendingTag])
+async def get_trending_tags(
+    window: str = Query("24h", pattern="^(" + "|".join(WINDOWS) + ")$"),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the most used tags of new posts in the last hour, day or week."""
+    return await TrendingTagsService(db).top(window, limit)
+
+
 # ============== Comments ==============
 
 @router.get("/posts/{post_id}/comments", response_model=List[CommentResponse])
 async def get_comments(
     post_id: str,
+    response: Response,
+    limit: int = Query(100, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Continuation token from X-Next-Cursor"),
     current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get comments for a post."""
+    """Get comments for a post as a flat list, oldest first."""
     user_id = current_user["user_id"]
     
-    result = await db.execute(
-        """
-        SELECT 
-            c.*,
-            u.username as author_username,
-            u.full_name as author_name,
-            u.profile_picture_url as author_avatar,
-            EXISTS(SELECT 1 FROM reactions r WHERE r.target_type = 'comment' AND r.target_id = c.id AND r.user_id = :user_id) as is_liked
+    query = """
+        SELECT c.*
         FROM comments c
-        JOIN users u ON c.author_id = u.id
         WHERE c.post_id = :post_id
-        ORDER BY c.created_at ASC
-        """,
-        {"post_id": post_id, "user_id": user_id}
-    )
+    """
+    params = {"post_id": post_id, "limit": limit}
     
+    if cursor:
+        params["cursor_created_at"], params["cursor_id"] = _decode_comment_cursor(cursor)
+        query += """
+            AND (c.created_at, c.id)
+                > (CAST(:cursor_created_at AS timestamptz), CAST(:cursor_id AS uuid))
+        """
+    query += " ORDER BY c.created_at ASC, c.id ASC LIMIT :limit"
+    
+    result = await db.execute(text(query), params)
     comments = result.fetchall()
     
+    if len(comments) == limit:
+        last = comments[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    
+    authors = await user_cards.get_many(db, [c.author_id for c in comments])
+    liked = await ViewerStateService(db).liked(user_id, "comment", [str(c.id) for c in comments])
     return [
-        {
-            "id": str(c.id),
-            "author": {
-                "id": str(c.author_id),
-                "username": c.author_username,
-                "full_name": c.author_name,
-                "avatar_url": c.author_avatar,
-            },
-            "content": c.content,
-            "likes_count": c.likes_count,
-            "is_liked": c.is_liked,
-            "parent_id": str(c.parent_id) if c.parent_id else None,
-            "created_at": c.created_at,
-        }
-        for c in comments
+        comment_response(c, authors[str(c.author_id)], str(c.id) in liked)
+        for c in comments if str(c.author_id) in authors
     ]
 
 
+@router.get("/posts/{post_id}/comments/threads", response_model=List[CommentThread])
+async def get_comment_threads(
+    post_id: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="Continuation token from X-Next-Cursor"),
+    replies_limit: int = Query(5, ge=0, le=20, description="Replies loaded per thread"),
+    max_depth: int = Query(3, ge=1, le=10),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get a page of comment threads, nested.
+    
+    Each top-level comment comes with up to `replies_limit` of its replies in
+    thread order, at most `max_depth` levels deep. Comments with more replies
+    than were loaded carry a `replies_cursor` for /comments/{id}/replies.
+    """
+    after = _decode_comment_cursor(cursor) if cursor else None
+    
+    threads, next_cursor = await CommentThreadService(db).get_threads(
+        current_user["user_id"], post_id, limit, replies_limit, max_depth, after
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return threads
+
+
+@router.get("/comments/{comment_id}/replies", response_model=List[CommentThread])
+async def get_comment_replies(
+    comment_id: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="replies_cursor of the comment, or X-Next-Cursor"),
+    max_depth: int = Query(3, ge=1, le=10),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Load more replies under a comment, nested.
+    
+    Replies whose parent is not part of the page (the rest of a partially
+    loaded sub-thread) are returned at the top level; use `parent_id` to place
+    them.
+    """
+    service = CommentThreadService(db)
+    comment = await service.get_comment(comment_id)
+    if not comment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Comment not found"
+        )
+    
+    after_path = None
+    if cursor:
+        try:
+            after_path, = decode_cursor(cursor, 1)
+        except ValueError:
+            after_path = None
+        if not isinstance(after_path, str) or not after_path.startswith(comment.path):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    replies, next_cursor = await service.get_replies(
+        current_user["user_id"], comment, limit, max_depth, after_path
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return replies
+
+
 @router.post("/posts/{post_id}/comment", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
 async def add_comment(
     post_id: str,
@@ -295,7 +477,7 @@ async def add_comment(
     
     # Verify post exists
     post_check = await db.execute(
-        "SELECT id FROM posts WHERE id = :post_id AND is_published = true",
+        text("SELECT id FROM posts WHERE id = :post_id AND is_published = true"),
         {"post_id": post_id}
     )
     if not post_check.first():
@@ -304,12 +486,23 @@ async def add_comment(
             detail="Post not found"
         )
     
+    if comment_data.parent_id:
+        parent_check = await db.execute(
+            text("SELECT id FROM comments WHERE id = :parent_id AND post_id = :post_id"),
+            {"parent_id": comment_data.parent_id, "post_id": post_id}
+        )
+        if not parent_check.first():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Parent comment not found on this post"
+            )
+    
     result = await db.execute(
-        """
+        text("""
         INSERT INTO comments (post_id, author_id, content, parent_id)
         VALUES (:post_id, :author_id, :content, :parent_id)
         RETURNING *
-        """,
+        """),
         {
             "post_id": post_id,
             "author_id": user_id,
@@ -321,21 +514,9 @@ async def add_comment(
     comment = result.first()
     await db.commit()
     
-    # Get author info
-    author_result = await db.execute(
-        "SELECT username, full_name, profile_picture_url FROM users WHERE id = :user_id",
-        {"user_id": user_id}
-    )
-    author = author_result.first()
-    
     return {
         "id": str(comment.id),
-        "author": {
-            "id": user_id,
-            "username": author.username,
-            "full_name": author.full_name,
-            "avatar_url": author.profile_picture_url,
-        },
+        "author": await user_cards.get(db, user_id),
         "content": comment.content,
         "likes_count": 0,
         "is_liked": False,
@@ -356,31 +537,33 @@ async def react_to_post(
     """React to a post (like/unlike toggle)."""
     user_id = current_user["user_id"]
     
-    # Check if already reacted
-    existing = await db.execute(
-        "SELECT id FROM reactions WHERE user_id = :user_id AND target_type = 'post' AND target_id = :post_id",
+    # Toggle without a read-then-write race: remove if present, otherwise insert.
+    # likes_count is kept in step by the update_post_stats trigger.
+    removed = await db.execute(
+        text("""
+        DELETE FROM reactions
+        WHERE user_id = :user_id AND target_type = 'post' AND target_id = :post_id
+        RETURNING id
+        """),
         {"user_id": user_id, "post_id": post_id}
     )
     
-    if existing.first():
-        # Remove reaction
-        await db.execute(
-            "DELETE FROM reactions WHERE user_id = :user_id AND target_type = 'post' AND target_id = :post_id",
-            {"user_id": user_id, "post_id": post_id}
-        )
+    if removed.first():
         await db.commit()
+        await record_viewer_state(user_id, REACTIONS, "post", post_id, False)
         return {"message": "Reaction removed", "is_liked": False}
-    else:
-        # Add reaction
-        await db.execute(
-            """
-            INSERT INTO reactions (user_id, target_type, target_id, reaction_type)
-            VALUES (:user_id, 'post', :post_id, :reaction_type)
-            """,
-            {"user_id": user_id, "post_id": post_id, "reaction_type": reaction_data.reaction_type or "like"}
-        )
-        await db.commit()
-        return {"message": "Reaction added", "is_liked": True}
+    
+    await db.execute(
+        text("""
+        INSERT INTO reactions (user_id, target_type, target_id, reaction_type)
+        VALUES (:user_id, 'post', :post_id, :reaction_type)
+        ON CONFLICT (user_id, target_type, target_id) DO NOTHING
+        """),
+        {"user_id": user_id, "post_id": post_id, "reaction_type": reaction_data.reaction_type or "like"}
+    )
+    await db.commit()
+    await record_viewer_state(user_id, REACTIONS, "post", post_id, True)
+    return {"message": "Reaction added", "is_liked": True}
 
 
 # ============== Bookmarks ==============
@@ -394,25 +577,31 @@ async def toggle_bookmark(
     """Toggle bookmark on a post."""
     user_id = current_user["user_id"]
     
-    existing = await db.execute(
-        "SELECT id FROM bookmarks WHERE user_id = :user_id AND target_type = 'post' AND target_id = :post_id",
+    removed = await db.execute(
+        text("""
+        DELETE FROM bookmarks
+        WHERE user_id = :user_id AND target_type = 'post' AND target_id = :post_id
+        RETURNING id
+        """),
         {"user_id": user_id, "post_id": post_id}
     )
     
-    if existing.first():
-        await db.execute(
-            "DELETE FROM bookmarks WHERE user_id = :user_id AND target_type = 'post' AND target_id = :post_id",
-            {"user_id": user_id, "post_id": post_id}
-        )
+    if removed.first():
         await db.commit()
+        await record_viewer_state(user_id, BOOKMARKS, "post", post_id, False)
         return {"message": "Bookmark removed", "is_bookmarked": False}
-    else:
-        await db.execute(
-            "INSERT INTO bookmarks (user_id, target_type, target_id) VALUES (:user_id, 'post', :post_id)",
-            {"user_id": user_id, "post_id": post_id}
-        )
-        await db.commit()
-        return {"message": "Bookmark added", "is_bookmarked": True}
+    
+    await db.execute(
+        text("""
+        INSERT INTO bookmarks (user_id, target_type, target_id)
+        VALUES (:user_id, 'post', :post_id)
+        ON CONFLICT (user_id, target_type, target_id) DO NOTHING
+        """),
+        {"user_id": user_id, "post_id": post_id}
+    )
+    await db.commit()
+    await record_viewer_state(user_id, BOOKMARKS, "post", post_id, True)
+    return {"message": "Bookmark added", "is_bookmarked": True}
 
 
 # ============== Follows ==============
@@ -433,21 +622,23 @@ async def toggle_follow(
         )
     
     existing = await db.execute(
-        "SELECT id FROM follows WHERE follower_id = :user_id AND following_id = :target_id",
+        text("SELECT id FROM follows WHERE follower_id = :user_id AND following_id = :target_id"),
         {"user_id": user_id, "target_id": target_user_id}
     )
     
     if existing.first():
         await db.execute(
-            "DELETE FROM follows WHERE follower_id = :user_id AND following_id = :target_id",
+            text("DELETE FROM follows WHERE follower_id = :user_id AND following_id = :target_id"),
             {"user_id": user_id, "target_id": target_user_id}
         )
         await db.commit()
+        await schedule_timeline_rebuild(user_id)
         return {"message": "Unfollowed", "is_following": False}
     else:
         await db.execute(
-            "INSERT INTO follows (follower_id, following_id) VALUES (:user_id, :target_id)",
+            text("INSERT INTO follows (follower_id, following_id) VALUES (:user_id, :target_id)"),
             {"user_id": user_id, "target_id": target_user_id}
         )
         await db.commit()
+        await schedule_timeline_rebuild(user_id)
         return {"message": "Following", "is_following": True}
@@ -1,15 +1,20 @@
 """Gamification API endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, func, and_
+from sqlalchemy import update, text
 from typing import Dict, Any, List, Optional
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 
 from app.core.database import get_db
 from app.core.security import get_current_user
-from app.core.config import settings
-from app.models.user import User
+from app.services.badges import badge_catalog
+from app.services.catalog import quest_catalog
+from app.services.gamification import GamificationService
+from app.services.gamification_events import GamificationEvent, stage_events, QUEST_CLAIMED
+from app.services.leaderboard import LeaderboardService
+from app.services.user_cards import user_cards
+from app.utils.helpers import etag_matches
 from app.schemas.gamification import (
     GamificationProfile,
     BadgeResponse,
@@ -28,66 +33,52 @@ async def get_gamification_profile(
     current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get user's gamification profile with XP, level, and streak."""
+    """Get user's gamification profile with XP, level, streak and rank in one round trip."""
     user_id = current_user["user_id"]
     
-    # Get user
     result = await db.execute(
-        select(User).where(User.id == user_id)
+        text("""
+        SELECT
+            u.id,
+            u.experience_points,
+            COALESCE(s.current_streak, 0) AS current_streak,
+            COALESCE(s.longest_streak, 0) AS longest_streak,
+            (
+                SELECT COUNT(*) FROM user_badges ub
+                WHERE ub.user_id = u.id AND ub.is_unlocked = true
+            ) AS badges_count,
+            lc.rank
+        FROM users u
+        LEFT JOIN user_streaks s ON s.user_id = u.id
+        LEFT JOIN leaderboard_cache lc ON lc.user_id = u.id AND lc.period = 'all_time'
+        WHERE u.id = :user_id
+        """),
+        {"user_id": user_id}
     )
-    user = result.scalar_one_or_none()
+    profile = result.first()
     
-    if not user:
+    if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Get streak info
-    streak_result = await db.execute(
-        select("*").select_from(
-            func.table("user_streaks")
-        ).where(
-            func.column("user_id") == user_id
-        )
-    )
-    streak = streak_result.first()
-    
-    # Get badge count
-    badge_result = await db.execute(
-        select(func.count()).select_from(
-            func.table("user_badges")
-        ).where(
-            and_(
-                func.column("user_id") == user_id,
-                func.column("is_unlocked") == True
-            )
-        )
-    )
-    badges_count = badge_result.scalar() or 0
-    
-    # Calculate level progress
-    current_level = user.current_level
-    xp = user.experience_points
-    
-    # Get XP thresholds for current and next level
-    thresholds = settings.LEVEL_THRESHOLDS
-    current_threshold = thresholds[min(current_level - 1, len(thresholds) - 1)] if current_level > 0 else 0
-    next_threshold = thresholds[min(current_level, len(thresholds) - 1)] if current_level < len(thresholds) else thresholds[-1]
-    
-    xp_to_next = next_threshold - xp
-    progress_percentage = ((xp - current_threshold) / (next_threshold - current_threshold)) * 100 if next_threshold > current_threshold else 100
+    # Level maths shared with the XP writers
+    gamification = GamificationService(db)
+    xp = profile.experience_points
+    current_level = gamification.calculate_level(xp)
+    level_progress = gamification.get_level_progress(xp, current_level)
     
     return {
-        "user_id": str(user.id),
+        "user_id": str(profile.id),
         "experience_points": xp,
         "current_level": current_level,
-        "xp_to_next_level": max(0, xp_to_next),
-        "level_progress_percentage": min(100, max(0, progress_percentage)),
-        "current_streak": streak.current_streak if streak else 0,
-        "longest_streak": streak.longest_streak if streak else 0,
-        "badges_count": badges_count,
-        "rank": None,  # Would be calculated from leaderboard
+        "xp_to_next_level": level_progress["xp_to_next"],
+        "level_progress_percentage": level_progress["progress_percentage"],
+        "current_streak": profile.current_streak,
+        "longest_streak": profile.longest_streak,
+        "badges_count": profile.badges_count,
+        "rank": profile.rank,
     }
 
 
@@ -95,117 +86,107 @@ async def get_gamification_profile(
 
 @router.get("/badges", response_model=List[BadgeResponse])
 async def get_badges(
+    request: Request,
+    response: Response,
     unlocked_only: bool = Query(False),
     category: Optional[str] = Query(None),
     current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all badges with user's progress."""
+    """Get all badges with user's progress (cached catalog + the user's progress rows)."""
     user_id = current_user["user_id"]
     
-    # Raw SQL for complex join with user_badges
-    query = """
-        SELECT 
-            b.*,
-            COALESCE(ub.progress, 0) as user_progress,
-            COALESCE(ub.is_unlocked, false) as is_unlocked,
-            ub.unlocked_at
-        FROM badges b
-        LEFT JOIN user_badges ub ON b.id = ub.badge_id AND ub.user_id = :user_id
-        WHERE b.is_active = true
-    """
-    
-    params = {"user_id": user_id}
-    
-    if unlocked_only:
-        query += " AND ub.is_unlocked = true"
-    
-    if category:
-        query += " AND b.category = :category"
-        params["category"] = category
-    
-    query += " ORDER BY b.tier, b.name"
-    
-    result = await db.execute(query, params)
-    badges = result.fetchall()
-    
-    return [
-        {
-            "id": str(b.id),
-            "name": b.name,
-            "slug": b.slug,
-            "description": b.description,
-            "icon": b.icon,
-            "color": b.color,
-            "tier": b.tier,
-            "rarity": b.rarity,
-            "category": b.category,
-            "requirement_type": b.requirement_type,
-            "requirement_value": b.requirement_value,
-            "xp_reward": b.xp_reward,
-            "progress": b.user_progress,
-            "is_unlocked": b.is_unlocked,
-            "unlocked_at": b.unlocked_at,
-        }
-        for b in badges
-    ]
+    catalog = await badge_catalog.get(db)
+    result = await db.execute(
+        text("""
+        SELECT badge_id, progress, is_unlocked, unlocked_at
+        FROM user_badges
+        WHERE user_id = :user_id
+        """),
+        {"user_id": user_id}
+    )
+    progress = {str(row.badge_id): row for row in result.fetchall()}
+    
+    etag = catalog.etag_for(progress.values(), unlocked_only, category)
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    
+    badges = []
+    for badge in catalog.items:
+        if category and badge["category"] != category:
+            continue
+        user_badge = progress.get(badge["id"])
+        is_unlocked = bool(user_badge and user_badge.is_unlocked)
+        if unlocked_only and not is_unlocked:
+            continue
+        badges.append({
+            **badge,
+            "progress": (user_badge.progress or 0) if user_badge else 0,
+            "is_unlocked": is_unlocked,
+            "unlocked_at": user_badge.unlocked_at if user_badge else None,
+        })
+    
+    return badges
 
 
 # ============== Quests ==============
 
 @router.get("/quests", response_model=List[QuestResponse])
 async def get_quests(
+    request: Request,
+    response: Response,
     quest_type: Optional[str] = Query(None),
     active_only: bool = Query(True),
     current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get available quests with user's progress."""
+    """Get available quests with user's progress (cached catalog + the user's progress rows)."""
     user_id = current_user["user_id"]
-    now = datetime.utcnow()
+    now = datetime.now(timezone.utc)
     
-    query = """
-        SELECT 
-            q.*,
-            COALESCE(uq.progress, 0) as user_progress,
-            COALESCE(uq.is_completed, false) as is_completed,
-            COALESCE(uq.is_claimed, false) as is_claimed,
-            uq.completed_at
-        FROM quests q
-        LEFT JOIN user_quests uq ON q.id = uq.quest_id AND uq.user_id = :user_id
-        WHERE q.is_active = true
-    """
-    
-    params = {"user_id": user_id}
-    
-    if quest_type:
-        query += " AND q.quest_type = :quest_type"
-        params["quest_type"] = quest_type
-    
-    if active_only:
-        query += " AND (q.expires_at IS NULL OR q.expires_at > :now)"
-        params["now"] = now
-    
-    query += " ORDER BY q.quest_type, q.xp_reward DESC"
-    
-    result = await db.execute(query, params)
-    quests = result.fetchall()
+    catalog = await quest_catalog.get(db)
+    result = await db.execute(
+        text("""
+        SELECT quest_id, progress, is_completed, is_claimed, completed_at
+        FROM user_quests
+        WHERE user_id = :user_id
+        """),
+        {"user_id": user_id}
+    )
+    progress = {str(row.quest_id): row for row in result.fetchall()}
+    
+    quests = []
+    for quest in catalog.items:
+        if quest_type and quest["quest_type"] != quest_type:
+            continue
+        if active_only and quest["expires_at"] and datetime.fromisoformat(quest["expires_at"]) <= now:
+            continue
+        quests.append(quest)
+    
+    # Expiry changes the result without a catalog change, so the visible ids are part of the tag
+    etag = catalog.etag_for(progress.values(), quest_type, active_only, [q["id"] for q in quests])
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
     
     return [
         {
-            "id": str(q.id),
-            "title": q.title,
-            "description": q.description,
-            "quest_type": q.quest_type,
-            "category": q.category,
-            "requirement_type": q.requirement_type,
-            "requirement_value": q.requirement_value,
-            "xp_reward": q.xp_reward,
-            "progress": q.user_progress,
-            "is_completed": q.is_completed,
-            "is_claimed": q.is_claimed,
-            "completed_at": q.completed_at,
-            "expires_at": q.expires_at,
+            "id": q["id"],
+            "title": q["title"],
+            "description": q["description"],
+            "quest_type": q["quest_type"],
+            "category": q["category"],
+            "requirement_type": q["requirement_type"],
+            "requirement_value": q["requirement_value"],
+            "xp_reward": q["xp_reward"],
+            "progress": (progress[q["id"]].progress or 0) if q["id"] in progress else 0,
+            "is_completed": bool(q["id"] in progress and progress[q["id"]].is_completed),
+            "is_claimed": bool(q["id"] in progress and progress[q["id"]].is_claimed),
+            "completed_at": progress[q["id"]].completed_at if q["id"] in progress else None,
+            "expires_at": q["expires_at"],
         }
         for q in quests
     ]
@@ -228,7 +209,7 @@ async def complete_quest(
         WHERE q.id = :quest_id AND uq.user_id = :user_id
     """
     
-    result = await db.execute(query, {"quest_id": quest_id, "user_id": user_id})
+    result = await db.execute(text(query), {"quest_id": quest_id, "user_id": user_id})
     quest = result.first()
     
     if not quest:
@@ -249,41 +230,33 @@ async def complete_quest(
             detail="Quest rewards already claimed"
         )
     
-    # Claim rewards
-    await db.execute(
-        """
+    # Claim rewards (guarded so concurrent claims can only succeed once)
+    claimed = await db.execute(
+        text("""
         UPDATE user_quests 
         SET is_claimed = true, claimed_at = :now 
-        WHERE quest_id = :quest_id AND user_id = :user_id
-        """,
+        WHERE quest_id = :quest_id AND user_id = :user_id AND is_claimed = false
+        RETURNING id
+        """),
         {"quest_id": quest_id, "user_id": user_id, "now": datetime.utcnow()}
     )
     
-    # Award XP
-    await db.execute(
-        """
-        UPDATE users 
-        SET experience_points = experience_points + :xp 
-        WHERE id = :user_id
-        """,
-        {"xp": quest.xp_reward, "user_id": user_id}
-    )
-    
-    # Log XP transaction
-    await db.execute(
-        """
-        INSERT INTO xp_transactions (user_id, amount, balance_after, source_type, source_id, description)
-        SELECT :user_id, :amount, u.experience_points, 'quest', :quest_id, :description
-        FROM users u WHERE u.id = :user_id
-        """,
-        {
-            "user_id": user_id,
-            "amount": quest.xp_reward,
-            "quest_id": quest_id,
-            "description": f"Completed quest: {quest.title}"
-        }
-    )
+    if not claimed.first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Quest rewards already claimed"
+        )
     
+    # Award XP asynchronously via the gamification worker, from the outbox
+    # committed together with the claim
+    await stage_events(db, [GamificationEvent(
+        event_type=QUEST_CLAIMED,
+        user_id=user_id,
+        xp=quest.xp_reward,
+        source_type="quest",
+        source_id=quest_id,
+        description=f"Completed quest: {quest.title}",
+    )])
     await db.commit()
     
     return {
@@ -299,68 +272,46 @@ async def get_leaderboard(
     scope: str = Query("global", regex="^(global|friends)$"),
     period: str = Query("all_time", regex="^(daily|weekly|monthly|all_time)$"),
     limit: int = Query(50, ge=1, le=100),
+    around_me: Optional[int] = Query(None, ge=0, le=25),
     current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get leaderboard rankings."""
+    """
+    Get leaderboard rankings from the precomputed leaderboard cache.
+    
+    With `around_me=N` the global board also includes the caller's own row and
+    N neighbours on each side when the caller is outside the top `limit`.
+    """
     user_id = current_user["user_id"]
+    service = LeaderboardService(db)
     
     if scope == "global":
-        # Get from cache or calculate
-        query = """
-            SELECT 
-                u.id as user_id,
-                u.username,
-                u.full_name,
-                u.profile_picture_url as avatar_url,
-                u.experience_points,
-                u.current_level,
-                COALESCE(s.current_streak, 0) as current_streak,
-                ROW_NUMBER() OVER (ORDER BY u.experience_points DESC) as rank
-            FROM users u
-            LEFT JOIN user_streaks s ON u.id = s.user_id
-            WHERE u.is_active = true
-            ORDER BY u.experience_points DESC
-            LIMIT :limit
-        """
-        result = await db.execute(query, {"limit": limit})
+        entries = await service.get_top(period, limit)
+        
+        if around_me is not None and not any(str(e.user_id) == user_id for e in entries):
+            top_ranks = {e.rank for e in entries}
+            entries += [
+                e for e in await service.get_around(user_id, period, around_me)
+                if e.rank not in top_ranks
+            ]
     else:
         # Friends leaderboard - users you follow
-        query = """
-            SELECT 
-                u.id as user_id,
-                u.username,
-                u.full_name,
-                u.profile_picture_url as avatar_url,
-                u.experience_points,
-                u.current_level,
-                COALESCE(s.current_streak, 0) as current_streak,
-                ROW_NUMBER() OVER (ORDER BY u.experience_points DESC) as rank
-            FROM users u
-            LEFT JOIN user_streaks s ON u.id = s.user_id
-            WHERE u.id IN (
-                SELECT following_id FROM follows WHERE follower_id = :user_id
-            ) OR u.id = :user_id
-            ORDER BY u.experience_points DESC
-            LIMIT :limit
-        """
-        result = await db.execute(query, {"user_id": user_id, "limit": limit})
-    
-    entries = result.fetchall()
+        entries = await service.get_friends(user_id, period, limit)
     
+    cards = await user_cards.get_many(db, [e.user_id for e in entries])
     return [
         {
             "rank": e.rank,
             "user_id": str(e.user_id),
-            "username": e.username,
-            "full_name": e.full_name,
-            "avatar_url": e.avatar_url,
+            "username": cards[str(e.user_id)]["username"],
+            "full_name": cards[str(e.user_id)]["full_name"],
+            "avatar_url": cards[str(e.user_id)]["avatar_url"],
             "experience_points": e.experience_points,
             "current_level": e.current_level,
             "current_streak": e.current_streak,
             "is_current_user": str(e.user_id) == user_id,
         }
-        for e in entries
+        for e in entries if str(e.user_id) in cards
     ]
 
 
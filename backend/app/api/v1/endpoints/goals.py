@@ -14,6 +14,7 @@ from app.core.mongodb import get_mongodb
 from app.core.security import get_current_user
 from app.models.user import User
 from app.services.goals_service import GoalsService, HabitsService, CheckInsService
+from app.services.gamification_events import GamificationEvent, publish_event, HABIT_COMPLETED
 
 router = APIRouter()
 
@@ -363,6 +364,12 @@ async def complete_habit(
     try:
         service = HabitsService(db)
         result = await service.complete_habit(habit_id, current_user.id, note)
+        
+        # Streak and badge progress are applied by the gamification worker
+        await publish_event(GamificationEvent(
+            event_type=HABIT_COMPLETED,
+            user_id=str(current_user.id),
+        ))
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
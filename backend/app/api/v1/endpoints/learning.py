@@ -2,18 +2,27 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, func, text
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+from uuid import UUID
 
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.core.config import settings
+from app.services.gamification_events import GamificationEvent, stage_events, MODULE_COMPLETED
+from app.services.path_outlines import path_outlines
+from app.services.path_catalog import PathCatalogService
+from app.services.progress_sync import ProgressSyncService
 from app.schemas.learning import (
     LearningPathResponse,
     ModuleResponse,
     EnrollmentResponse,
     ProgressUpdate,
+    PathOutline,
+    LearningCatalogResponse,
+    ProgressSyncRequest,
+    ProgressSyncResponse,
 )
 
 router = APIRouter()
@@ -31,61 +40,73 @@ async def get_learning_paths(
     db: AsyncSession = Depends(get_db)
 ):
     """Get available learning paths."""
-    user_id = current_user["user_id"]
-    
-    query = """
-        SELECT 
-            lp.*,
-            e.id as enrollment_id,
-            e.progress_percentage,
-            e.status as enrollment_status,
-            e.enrolled_at
-        FROM learning_paths lp
-        LEFT JOIN enrollments e ON lp.id = e.path_id AND e.user_id = :user_id
-        WHERE lp.is_published = true
+    paths, _ = await PathCatalogService(db).browse(
+        current_user["user_id"], category, difficulty, search, enrolled_only
+    )
+    return paths
+
+
+@router.get("/catalog", response_model=LearningCatalogResponse)
+async def get_learning_catalog(
+    category: Optional[str] = Query(None),
+    difficulty: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    enrolled_only: bool = Query(False),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
     """
+    Browse learning paths with facet counts.
+
+    Each facet's counts apply every filter except its own, so they tell how
+    many paths selecting another category or difficulty would show.
+    """
+    paths, facets = await PathCatalogService(db).browse(
+        current_user["user_id"], category, difficulty, search, enrolled_only
+    )
+    return {
+        "items": paths[offset:offset + limit],
+        "total": len(paths),
+        "facets": facets,
+    }
+
+
+@router.get("/paths/outlines", response_model=List[PathOutline])
+async def get_path_outlines(
+    ids: List[str] = Query(..., description="Learning path ids (at most 50)"),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the module outlines of several published learning paths at once."""
+    if len(ids) > 50:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At most 50 paths per request"
+        )
+    try:
+        path_ids = list(dict.fromkeys(str(UUID(path_id)) for path_id in ids))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid learning path id"
+        )
     
-    params = {"user_id": user_id}
-    
-    if category:
-        query += " AND lp.category = :category"
-        params["category"] = category
-    
-    if difficulty:
-        query += " AND lp.difficulty = :difficulty"
-        params["difficulty"] = difficulty
-    
-    if search:
-        query += " AND (lp.title ILIKE :search OR lp.description ILIKE :search)"
-        params["search"] = f"%{search}%"
-    
-    if enrolled_only:
-        query += " AND e.id IS NOT NULL"
-    
-    query += " ORDER BY lp.is_featured DESC, lp.created_at DESC"
-    
-    result = await db.execute(query, params)
-    paths = result.fetchall()
+    result = await db.execute(
+        text("""
+        SELECT id, updated_at
+        FROM learning_paths
+        WHERE id = ANY(CAST(:path_ids AS uuid[])) AND is_published = true
+        """),
+        {"path_ids": path_ids}
+    )
+    versions = {str(p.id): p.updated_at for p in result.fetchall()}
+    outlines = await path_outlines.get_many(db, versions)
     
     return [
-        {
-            "id": str(p.id),
-            "title": p.title,
-            "slug": p.slug,
-            "description": p.description,
-            "short_description": p.short_description,
-            "thumbnail_url": p.thumbnail_url,
-            "category": p.category,
-            "difficulty": p.difficulty,
-            "estimated_hours": p.estimated_hours,
-            "total_modules": p.total_modules,
-            "skills_covered": p.skills_covered or [],
-            "is_featured": p.is_featured,
-            "is_enrolled": p.enrollment_id is not None,
-            "progress_percentage": p.progress_percentage or 0,
-            "enrollment_status": p.enrollment_status,
-        }
-        for p in paths
+        {"path_id": path_id, "updated_at": versions[path_id], "modules": outlines[path_id]}
+        for path_id in path_ids if path_id in versions
     ]
 
 
@@ -95,23 +116,41 @@ async def get_learning_path(
     current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get detailed learning path with modules."""
+    """
+    Get detailed learning path with modules.
+    
+    The path, the caller's enrollment and their module progress come from one
+    query; the module outline is served from the outline cache.
+    """
     user_id = current_user["user_id"]
     
-    # Get path
-    path_query = """
+    result = await db.execute(
+        text("""
         SELECT 
             lp.*,
             e.id as enrollment_id,
             e.progress_percentage,
             e.status as enrollment_status,
-            e.current_module_id
+            e.current_module_id,
+            mp.module_ids,
+            mp.statuses,
+            mp.percentages,
+            mp.completed_ats
         FROM learning_paths lp
         LEFT JOIN enrollments e ON lp.id = e.path_id AND e.user_id = :user_id
+        LEFT JOIN LATERAL (
+            SELECT
+                array_agg(module_id) AS module_ids,
+                array_agg(status) AS statuses,
+                array_agg(progress_percentage) AS percentages,
+                array_agg(completed_at) AS completed_ats
+            FROM module_progress
+            WHERE enrollment_id = e.id
+        ) mp ON true
         WHERE lp.id = :path_id AND lp.is_published = true
-    """
-    
-    result = await db.execute(path_query, {"path_id": path_id, "user_id": user_id})
+        """),
+        {"path_id": path_id, "user_id": user_id}
+    )
     path = result.first()
     
     if not path:
@@ -120,21 +159,22 @@ async def get_learning_path(
             detail="Learning path not found"
         )
     
-    # Get modules with progress
-    modules_query = """
-        SELECT 
-            m.*,
-            mp.status as progress_status,
-            mp.progress_percentage as module_progress,
-            mp.completed_at
-        FROM learning_modules m
-        LEFT JOIN module_progress mp ON m.id = mp.module_id AND mp.user_id = :user_id
-        WHERE m.path_id = :path_id AND m.is_published = true
-        ORDER BY m.order_index
-    """
-    
-    modules_result = await db.execute(modules_query, {"path_id": path_id, "user_id": user_id})
-    modules = modules_result.fetchall()
+    outline = (await path_outlines.get_many(db, {str(path.id): path.updated_at}))[str(path.id)]
+    progress = {
+        str(module_id): (progress_status, percentage, completed_at)
+        for module_id, progress_status, percentage, completed_at in zip(
+            path.module_ids or [], path.statuses or [], path.percentages or [], path.completed_ats or []
+        )
+    }
+    modules = []
+    for m in outline:
+        progress_status, percentage, completed_at = progress.get(m["id"], (None, None, None))
+        modules.append({
+            **m,
+            "status": progress_status or "not_started",
+            "progress_percentage": percentage or 0,
+            "completed_at": completed_at,
+        })
     
     return {
         "id": str(path.id),
@@ -154,21 +194,7 @@ async def get_learning_path(
         "progress_percentage": path.progress_percentage or 0,
         "enrollment_status": path.enrollment_status,
         "current_module_id": str(path.current_module_id) if path.current_module_id else None,
-        "modules": [
-            {
-                "id": str(m.id),
-                "title": m.title,
-                "description": m.description,
-                "order_index": m.order_index,
-                "content_type": m.content_type,
-                "duration_minutes": m.duration_minutes,
-                "xp_reward": m.xp_reward,
-                "status": m.progress_status or "not_started",
-                "progress_percentage": m.module_progress or 0,
-                "completed_at": m.completed_at,
-            }
-            for m in modules
-        ]
+        "modules": modules,
     }
 
 
@@ -314,6 +340,30 @@ async def get_path_progress(
     }
 
 
+@router.post("/progress/sync", response_model=ProgressSyncResponse)
+async def sync_progress(
+    payload: ProgressSyncRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Apply a batch of queued progress events (partial progress and completions).
+
+    Events are identified by client event ids, so replaying a batch is safe:
+    already-applied events are reported as duplicates and earn no XP again.
+    """
+    if len(payload.events) > settings.PROGRESS_SYNC_MAX_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.PROGRESS_SYNC_MAX_EVENTS} events per request"
+        )
+    if not payload.events:
+        return {"results": [], "paths": []}
+
+    results, paths = await ProgressSyncService(db).sync(current_user["user_id"], payload.events)
+    return {"results": results, "paths": paths}
+
+
 @router.post("/paths/{path_id}/modules/{module_id}/complete")
 async def complete_module(
     path_id: str,
@@ -328,7 +378,7 @@ async def complete_module(
     
     # Verify enrollment
     enrollment_result = await db.execute(
-        "SELECT id FROM enrollments WHERE user_id = :user_id AND path_id = :path_id",
+        text("SELECT id FROM enrollments WHERE user_id = :user_id AND path_id = :path_id"),
         {"user_id": user_id, "path_id": path_id}
     )
     enrollment = enrollment_result.first()
@@ -341,7 +391,7 @@ async def complete_module(
     
     # Get module
     module_result = await db.execute(
-        "SELECT id, xp_reward FROM learning_modules WHERE id = :module_id AND path_id = :path_id",
+        text("SELECT id, xp_reward FROM learning_modules WHERE id = :module_id AND path_id = :path_id"),
         {"module_id": module_id, "path_id": path_id}
     )
     module = module_result.first()
@@ -352,16 +402,32 @@ async def complete_module(
             detail="Module not found"
         )
     
-    # Update or create module progress
-    await db.execute(
-        """
-        INSERT INTO module_progress (user_id, module_id, enrollment_id, status, progress_percentage, completed_at)
-        VALUES (:user_id, :module_id, :enrollment_id, 'completed', 100, :now)
-        ON CONFLICT (user_id, module_id) DO UPDATE SET
-            status = 'completed',
-            progress_percentage = 100,
-            completed_at = :now
-        """,
+    # Mark the module completed; the upsert only returns a row when the module
+    # was not completed before, and only then is the enrollment counter bumped
+    # (progress_percentage is derived from it by trigger)
+    result = await db.execute(
+        text("""
+        WITH completed AS (
+            INSERT INTO module_progress (user_id, module_id, enrollment_id, status, progress_percentage, completed_at)
+            VALUES (:user_id, :module_id, :enrollment_id, 'completed', 100, :now)
+            ON CONFLICT (user_id, module_id) DO UPDATE SET
+                status = 'completed',
+                progress_percentage = 100,
+                completed_at = EXCLUDED.completed_at
+            WHERE module_progress.status <> 'completed'
+            RETURNING id
+        ),
+        enrollment AS (
+            UPDATE enrollments SET
+                completed_modules_count = completed_modules_count + (SELECT COUNT(*) FROM completed),
+                last_activity_at = :now
+            WHERE id = :enrollment_id
+            RETURNING progress_percentage
+        )
+        SELECT
+            EXISTS (SELECT 1 FROM completed) AS newly_completed,
+            (SELECT progress_percentage FROM enrollment) AS progress_percentage
+        """),
         {
             "user_id": user_id,
             "module_id": module_id,
@@ -369,44 +435,34 @@ async def complete_module(
             "now": now
         }
     )
+    outcome = result.first()
     
-    # Recalculate path progress
-    await db.execute(
-        """
-        UPDATE enrollments SET
-            progress_percentage = (
-                SELECT (COUNT(*) FILTER (WHERE mp.status = 'completed')::float / COUNT(*)::float) * 100
-                FROM learning_modules m
-                LEFT JOIN module_progress mp ON m.id = mp.module_id AND mp.user_id = :user_id
-                WHERE m.path_id = :path_id
-            ),
-            last_activity_at = :now
-        WHERE id = :enrollment_id
-        """,
-        {"user_id": user_id, "path_id": path_id, "enrollment_id": enrollment.id, "now": now}
-    )
-    
-    # Award XP
+    # XP, streak and badges are applied by the gamification worker from the
+    # outbox, committed together with the completion
     xp_reward = module.xp_reward or settings.XP_PER_MODULE
-    await db.execute(
-        "UPDATE users SET experience_points = experience_points + :xp WHERE id = :user_id",
-        {"xp": xp_reward, "user_id": user_id}
-    )
-    
-    # Log XP transaction
-    await db.execute(
-        """
-        INSERT INTO xp_transactions (user_id, amount, balance_after, source_type, source_id, description)
-        SELECT :user_id, :amount, u.experience_points, 'module', :module_id, 'Module completed'
-        FROM users u WHERE u.id = :user_id
-        """,
-        {"user_id": user_id, "amount": xp_reward, "module_id": module_id}
-    )
+    if outcome.newly_completed:
+        await stage_events(db, [GamificationEvent(
+            event_type=MODULE_COMPLETED,
+            user_id=user_id,
+            xp=xp_reward,
+            source_type="module",
+            source_id=module_id,
+            description="Module completed",
+        )])
     
     await db.commit()
     
+    if not outcome.newly_completed:
+        return {
+            "message": "Module already completed",
+            "xp_earned": 0,
+            "module_id": module_id,
+            "progress_percentage": outcome.progress_percentage,
+        }
+    
     return {
         "message": "Module completed",
         "xp_earned": xp_reward,
         "module_id": module_id,
+        "progress_percentage": outcome.progress_percentage,
     }
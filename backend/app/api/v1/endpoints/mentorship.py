@@ -3,7 +3,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, noload
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
@@ -14,6 +14,7 @@ from app.models.mentorship import MentorAssignment, MentorshipSession, SessionSt
 from app.models.user import User
 from app.schemas.mentorship import (
     AssignmentResponse,
+    MentorInfo,
     SessionCreate,
     SessionUpdate,
     SessionResponse,
@@ -25,10 +26,35 @@ from app.schemas.mentorship import (
 )
 from app.models.mentorship import MentorshipTask, TaskSubmission
 from app.services.code_execution import execute_code
+from app.services.user_cards import user_cards
 
 router = APIRouter()
 
 
+def _person(card: Optional[Dict[str, Any]]) -> Optional[MentorInfo]:
+    """Mentor/mentee info from a user card."""
+    if card is None:
+        return None
+    return MentorInfo(
+        id=card["id"],
+        username=card["username"],
+        full_name=card["full_name"],
+        profile_picture_url=card["avatar_url"],
+    )
+
+
+async def _with_people(db: AsyncSession, assignments: List[MentorAssignment]) -> List[AssignmentResponse]:
+    """Embed mentor and mentee cards into assignments, one batch for the whole list."""
+    cards = await user_cards.get_many(db, [uid for a in assignments for uid in (a.mentor_id, a.mentee_id)])
+    return [
+        AssignmentResponse.model_validate(a).model_copy(update={
+            "mentor": _person(cards.get(str(a.mentor_id))),
+            "mentee": _person(cards.get(str(a.mentee_id))),
+        })
+        for a in assignments
+    ]
+
+
 # ============== Tasks & Assignments ==============
 
 @router.post("/tasks", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
@@ -114,8 +140,8 @@ async def get_assignments(
     result = await db.execute(
         select(MentorAssignment)
         .options(
-            selectinload(MentorAssignment.mentor),
-            selectinload(MentorAssignment.mentee)
+            noload(MentorAssignment.mentor),
+            noload(MentorAssignment.mentee)
         )
         .where(
             or_(
@@ -126,7 +152,7 @@ async def get_assignments(
         .order_by(MentorAssignment.created_at.desc())
     )
     
-    return result.scalars().all()
+    return await _with_people(db, result.scalars().all())
 
 
 @router.get("/assignments/{assignment_id}", response_model=AssignmentResponse)
@@ -141,8 +167,8 @@ async def get_assignment(
     result = await db.execute(
         select(MentorAssignment)
         .options(
-            selectinload(MentorAssignment.mentor),
-            selectinload(MentorAssignment.mentee),
+            noload(MentorAssignment.mentor),
+            noload(MentorAssignment.mentee),
             selectinload(MentorAssignment.sessions)
         )
         .where(
@@ -163,7 +189,7 @@ async def get_assignment(
             detail="Assignment not found"
         )
     
-    return assignment
+    return (await _with_people(db, [assignment]))[0]
 
 
 # ============== Sessions ==============
@@ -0,0 +1,53 @@
+"""Search API endpoints."""
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any, List, Optional
+from uuid import UUID
+
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.services.search import SearchService
+from app.utils.helpers import decode_cursor
+from app.schemas.search import SearchResult, SearchResultType
+
+router = APIRouter()
+
+
+@router.get("", response_model=List[SearchResult])
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=200),
+    types: Optional[List[SearchResultType]] = Query(None, description="Limit to these result types"),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="Continuation token from X-Next-Cursor"),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search learning paths, community posts and career roles.
+    
+    `q` accepts web search syntax ("quoted phrases", -excluded, or). Results
+    are ranked across all types; matches are wrapped in <mark> in
+    `title_highlight` and `snippet`.
+    """
+    after = None
+    if cursor:
+        try:
+            rank, result_type, result_id = decode_cursor(cursor, 3)
+            after = (float(rank), SearchResultType(result_type).value, str(UUID(result_id)))
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    results, next_cursor = await SearchService(db).search(
+        q.strip(),
+        [t.value for t in types] if types else None,
+        limit,
+        after,
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return results
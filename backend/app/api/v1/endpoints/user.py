@@ -10,6 +10,7 @@ from app.core.database import get_db
 from app.core.security import get_current_user, get_password_hash, verify_password
 from app.core.supabase_client import avatars_storage
 from app.models.user import User
+from app.services.user_cards import user_cards
 from app.schemas.user import UserResponse, UserUpdate, PasswordChange
 
 router = APIRouter()
@@ -60,6 +61,7 @@ async def update_profile(
     
     await db.commit()
     await db.refresh(user)
+    await user_cards.invalidate(user.id)
     
     return user
 
@@ -106,6 +108,7 @@ async def upload_avatar(
             .values(profile_picture_url=public_url)
         )
         await db.commit()
+        await user_cards.invalidate(current_user["user_id"])
         
         return {"avatar_url": public_url}
         
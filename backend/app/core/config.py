@@ -66,6 +66,68 @@ class Settings(BaseSettings):
     XP_PER_SESSION: int = 100
     XP_PER_BADGE: int = 200
     LEVEL_THRESHOLDS: List[int] = [100, 300, 600, 1000, 1500, 2200, 3000, 4000, 5000]
+    CATALOG_VERSION_CHECK_SECONDS: float = 5.0
+    PATH_OUTLINE_CACHE_SIZE: int = 1000
+    
+    # Gamification event pipeline ("local" in-process queue or "redis" stream)
+    GAMIFICATION_EVENT_BACKEND: str = "local"
+    GAMIFICATION_EVENT_STREAM: str = "gamification:events"
+    GAMIFICATION_EVENT_GROUP: str = "gamification-workers"
+    GAMIFICATION_EVENT_STREAM_MAXLEN: int = 100000
+    GAMIFICATION_EVENT_BATCH_SIZE: int = 500
+    GAMIFICATION_FLUSH_SECONDS: float = 2.0
+    # Pending stream entries idle this long are reclaimed and redelivered
+    GAMIFICATION_EVENT_RECLAIM_IDLE_SECONDS: int = 60
+    # Processed event ids are kept this long to skip redeliveries
+    GAMIFICATION_EVENT_DEDUP_DAYS: int = 7
+    
+    # Leaderboards
+    LEADERBOARD_REFRESH_SECONDS: int = 60
+    LEADERBOARD_MAX_STALENESS_SECONDS: int = 600
+    
+    # Streaks (the reset sweep is a no-op once the day's broken streaks are zeroed)
+    STREAK_SWEEP_INTERVAL_SECONDS: int = 3600
+    STREAK_SWEEP_BATCH_SIZE: int = 5000
+    
+    # Home timelines (authors above the follower threshold are merged in on read)
+    TIMELINE_MAX_LENGTH: int = 800
+    TIMELINE_FANOUT_MAX_FOLLOWERS: int = 10000
+    TIMELINE_REBUILD_SECONDS: float = 5.0
+    TIMELINE_REBUILD_BATCH_SIZE: int = 100
+    TIMELINE_RETENTION_DAYS: int = 30
+    
+    # Community viewer state cache (liked/bookmarked flags per user)
+    VIEWER_STATE_TTL_SECONDS: int = 3600
+    
+    # Post view counting (0 disables per-viewer deduplication)
+    POST_VIEW_FLUSH_SECONDS: float = 10.0
+    POST_VIEW_DEDUP_WINDOW_SECONDS: int = 1800
+    
+    # Denormalized counter reconciliation
+    COUNTER_RECONCILE_SECONDS: int = 3600
+    COUNTER_RECONCILE_CHUNK_SIZE: int = 1000
+    
+    # User cards embedded in lists (in-process LRU tier, then Redis)
+    USER_CARD_CACHE_SIZE: int = 10000
+    USER_CARD_LOCAL_TTL_SECONDS: float = 60.0
+    USER_CARD_REDIS_TTL_SECONDS: int = 3600
+    
+    # Hot feed scoring (the first run after startup looks back this far)
+    HOT_SCORE_REFRESH_SECONDS: int = 60
+    HOT_SCORE_BATCH_SIZE: int = 1000
+    HOT_SCORE_LOOKBACK_SECONDS: int = 3600
+    
+    # Trending tags (TRENDING_TAGS_MAX is the longest top list served per window)
+    TRENDING_TAGS_EXPIRE_SECONDS: int = 300
+    TRENDING_TAGS_CACHE_SECONDS: float = 30.0
+    TRENDING_TAGS_MAX: int = 50
+
+    # Offline progress sync (client event ids are kept this long for deduplication)
+    PROGRESS_SYNC_MAX_EVENTS: int = 500
+    PROGRESS_SYNC_RETENTION_DAYS: int = 30
+
+    # Career/learning path recommendations (co-enrollment is reloaded this often)
+    RECOMMENDATION_REFRESH_SECONDS: int = 900
     
     # Email (SMTP)
     SMTP_HOST: Optional[str] = None
@@ -0,0 +1,50 @@
+"""Redis connection and utilities."""
+
+from redis import asyncio as aioredis
+from typing import Optional
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis client instance
+redis_client: Optional[aioredis.Redis] = None
+
+
+async def connect_to_redis():
+    """Connect to Redis."""
+    global redis_client
+
+    try:
+        logger.info("Connecting to Redis...")
+        client = aioredis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=5,
+        )
+
+        # Test connection
+        await client.ping()
+        redis_client = client
+        logger.info("Successfully connected to Redis")
+
+    except Exception as e:
+        logger.error(f"Failed to connect to Redis: {e}")
+        raise
+
+
+async def close_redis_connection():
+    """Close Redis connection."""
+    global redis_client
+
+    if redis_client:
+        logger.info("Closing Redis connection...")
+        await redis_client.close()
+        redis_client = None
+        logger.info("Redis connection closed")
+
+
+def get_redis() -> Optional[aioredis.Redis]:
+    """Get the Redis client, or None when Redis is not available."""
+    return redis_client
@@ -0,0 +1,75 @@
+"""Lightweight periodic background jobs run inside the API process."""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """A coroutine function executed every `interval` seconds."""
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        func: Callable[[], Awaitable[None]],
+        run_on_start: bool = True,
+    ):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.run_on_start = run_on_start
+        self.task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        if not self.run_on_start:
+            await asyncio.sleep(self.interval)
+
+        while True:
+            try:
+                await self.func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Background job '{self.name}' failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+
+class BackgroundJobs:
+    """Registry of periodic jobs started and stopped with the application."""
+
+    def __init__(self):
+        self.jobs: List[PeriodicJob] = []
+
+    def register(
+        self,
+        name: str,
+        interval: float,
+        func: Callable[[], Awaitable[None]],
+        run_on_start: bool = True,
+    ) -> PeriodicJob:
+        """Register a job to be run every `interval` seconds."""
+        job = PeriodicJob(name, interval, func, run_on_start)
+        self.jobs.append(job)
+        return job
+
+    def start(self):
+        """Start all registered jobs."""
+        for job in self.jobs:
+            if job.task is None:
+                job.task = asyncio.create_task(job._run(), name=job.name)
+                logger.info(f"Started background job '{job.name}' (every {job.interval}s)")
+
+    async def stop(self):
+        """Cancel all running jobs and wait for them to finish."""
+        tasks = [job.task for job in self.jobs if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self.jobs:
+            job.task = None
+
+
+background_jobs = BackgroundJobs()
@@ -16,6 +16,18 @@ from app.api.v1.api import api_router
 from app.core.config import settings
 from app.core.database import init_db
 from app.core.mongodb import connect_to_mongodb, close_mongodb_connection
+from app.core.redis import connect_to_redis, close_redis_connection
+from app.core.scheduler import background_jobs
+from app.services.counters import reconcile_counters
+from app.services.gamification_events import init_event_queue, gamification_worker, trim_processed_events
+from app.services.hot_scores import hot_scorer
+from app.services.leaderboard import refresh_leaderboards
+from app.services.ml_engine import refresh_recommendations
+from app.services.progress_sync import trim_progress_sync_events
+from app.services.streaks import reset_broken_streaks
+from app.services.view_counter import view_counter
+from app.services.timeline import init_timeline_store, rebuild_pending_timelines, trim_timelines
+from app.services.trending_tags import expire_trending_tags
 
 # Configure logging
 logging.basicConfig(
@@ -49,10 +61,95 @@ async def lifespan(app: FastAPI):
         # Don't raise - allow app to start without MongoDB
         logger.warning("Application starting without MongoDB Goals system")
     
+    # Connect to Redis (optional - caching and event streams)
+    try:
+        await connect_to_redis()
+    except Exception as e:
+        logger.warning(f"Application starting without Redis: {e}")
+    
+    init_event_queue()
+    init_timeline_store()
+    
+    # Start background jobs
+    background_jobs.register(
+        "leaderboard-refresh",
+        settings.LEADERBOARD_REFRESH_SECONDS,
+        refresh_leaderboards,
+    )
+    background_jobs.register(
+        "gamification-events",
+        settings.GAMIFICATION_FLUSH_SECONDS,
+        gamification_worker.drain,
+    )
+    background_jobs.register(
+        "gamification-dedup-trim",
+        3600,
+        trim_processed_events,
+    )
+    background_jobs.register(
+        "streak-reset",
+        settings.STREAK_SWEEP_INTERVAL_SECONDS,
+        reset_broken_streaks,
+    )
+    background_jobs.register(
+        "timeline-rebuild",
+        settings.TIMELINE_REBUILD_SECONDS,
+        rebuild_pending_timelines,
+    )
+    background_jobs.register(
+        "timeline-trim",
+        3600,
+        trim_timelines,
+    )
+    background_jobs.register(
+        "progress-sync-trim",
+        3600,
+        trim_progress_sync_events,
+    )
+    background_jobs.register(
+        "post-view-flush",
+        settings.POST_VIEW_FLUSH_SECONDS,
+        view_counter.flush,
+    )
+    background_jobs.register(
+        "hot-score-refresh",
+        settings.HOT_SCORE_REFRESH_SECONDS,
+        hot_scorer.run,
+    )
+    background_jobs.register(
+        "trending-tags-expire",
+        settings.TRENDING_TAGS_EXPIRE_SECONDS,
+        expire_trending_tags,
+    )
+    background_jobs.register(
+        "recommendation-refresh",
+        settings.RECOMMENDATION_REFRESH_SECONDS,
+        refresh_recommendations,
+    )
+    background_jobs.register(
+        "counter-reconcile",
+        settings.COUNTER_RECONCILE_SECONDS,
+        reconcile_counters,
+        run_on_start=False,
+    )
+    background_jobs.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down application")
+    await background_jobs.stop()
+    try:
+        # Flush events still sitting in the local queue and the outbox
+        await gamification_worker.drain()
+    except Exception as e:
+        logger.error(f"Failed to flush pending gamification events: {e}")
+    try:
+        await view_counter.flush()
+    except Exception as e:
+        logger.error(f"Failed to flush buffered post views: {e}")
+    logger.info("Background jobs stopped")
+    await close_redis_connection()
     await close_mongodb_connection()
     logger.info("MongoDB connection closed")
 
@@ -77,6 +174,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 
@@ -0,0 +1,83 @@
+"""Career schemas."""
+
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+
+from app.models.career import CareerField
+
+
+# ============== Role Schemas ==============
+
+class CareerRoleResponse(BaseModel):
+    id: int
+    title: str
+    field: CareerField
+    description: str
+    required_skills: List[Any] = []
+    recommended_skills: List[Any] = []
+    tools_technologies: List[Any] = []
+    average_salary_min: Optional[int] = None
+    average_salary_max: Optional[int] = None
+    demand_level: Optional[int] = None
+    growth_projection: Optional[float] = None
+    learning_path_id: Optional[int] = None
+    is_active: bool = True
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AlternativeRole(BaseModel):
+    role_id: int
+    title: str
+    match_score: float
+
+
+# ============== Skill Gap Schemas ==============
+
+class SkillGap(BaseModel):
+    skill: str
+    current_level: int
+    required_level: int
+    gap: int
+    is_required: bool
+    priority: str
+
+
+class PathRecommendation(BaseModel):
+    path_id: int
+    title: str
+    slug: str
+    score: float
+    matched_skills: List[str] = []
+
+
+class SkillGapAnalysis(BaseModel):
+    match_percentage: float
+    matched_skills: List[str] = []
+    skill_gaps: List[SkillGap] = []
+    recommended_paths: List[PathRecommendation] = []
+
+
+# ============== Assessment Schemas ==============
+
+class CareerAssessmentRequest(BaseModel):
+    # Question id -> answer; numeric answers on a 1-5 scale rate a trait
+    answers: Dict[str, Any]
+    # Skill names or {"name": ..., "level": 1-5}
+    current_skills: List[Any] = []
+    interests: List[str] = Field(default=[], max_length=20)
+
+
+class CareerAssessmentResponse(BaseModel):
+    id: int
+    user_id: int
+    recommended_role: Optional[CareerRoleResponse] = None
+    match_score: float = 0
+    alternative_roles: List[AlternativeRole] = []
+    skill_gaps: List[SkillGap] = []
+    recommended_paths: List[PathRecommendation] = []
+    personality_traits: List[str] = []
+    created_at: Optional[datetime] = None
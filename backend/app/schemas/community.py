@@ -67,6 +67,13 @@ class PostResponse(BaseModel):
     created_at: datetime
 
 
+# ============== Tags ==============
+
+class TrendingTag(BaseModel):
+    tag: str
+    posts_count: int
+
+
 # ============== Comments ==============
 
 class CommentCreate(BaseModel):
@@ -84,6 +91,18 @@ class CommentResponse(BaseModel):
     created_at: datetime
 
 
+class CommentThread(CommentResponse):
+    """A comment with the loaded part of its reply tree."""
+    depth: int = 0
+    replies_count: int = 0
+    replies: List["CommentThread"] = []
+    # Set when not all direct replies are loaded; pass to /comments/{id}/replies
+    replies_cursor: Optional[str] = None
+
+
+CommentThread.model_rebuild()
+
+
 # ============== Reactions ==============
 
 class ReactionCreate(BaseModel):
@@ -1,8 +1,9 @@
 """Learning schemas."""
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
+from uuid import UUID
 from enum import Enum
 
 
@@ -35,7 +36,7 @@ class EnrollmentStatus(str, Enum):
 
 # ============== Modules ==============
 
-class ModuleResponse(BaseModel):
+class ModuleOutline(BaseModel):
     id: str
     title: str
     description: Optional[str] = None
@@ -43,6 +44,9 @@ class ModuleResponse(BaseModel):
     content_type: ContentType
     duration_minutes: int
     xp_reward: int
+
+
+class ModuleResponse(ModuleOutline):
     status: ProgressStatus = ProgressStatus.NOT_STARTED
     progress_percentage: float = 0
     completed_at: Optional[datetime] = None
@@ -71,6 +75,23 @@ class LearningPathResponse(BaseModel):
     modules: Optional[List[ModuleResponse]] = None
 
 
+class CatalogFacets(BaseModel):
+    category: Dict[str, int] = {}
+    difficulty: Dict[str, int] = {}
+
+
+class LearningCatalogResponse(BaseModel):
+    items: List[LearningPathResponse]
+    total: int
+    facets: CatalogFacets
+
+
+class PathOutline(BaseModel):
+    path_id: str
+    updated_at: datetime
+    modules: List[ModuleOutline] = []
+
+
 # ============== Enrollment ==============
 
 class EnrollmentResponse(BaseModel):
@@ -99,6 +120,46 @@ class ModuleProgressResponse(BaseModel):
     completed_at: Optional[datetime] = None
 
 
+class ProgressSyncEvent(BaseModel):
+    event_id: str = Field(..., min_length=1, max_length=100)
+    module_id: UUID
+    completed: bool = False
+    progress_percentage: float = Field(0, ge=0, le=100)
+    video_progress_seconds: Optional[int] = Field(None, ge=0)
+    quiz_score: Optional[float] = Field(None, ge=0, le=100)
+    occurred_at: Optional[datetime] = None
+
+
+class ProgressSyncRequest(BaseModel):
+    events: List[ProgressSyncEvent]
+
+
+class SyncResultStatus(str, Enum):
+    APPLIED = "applied"
+    ALREADY_COMPLETED = "already_completed"
+    DUPLICATE = "duplicate"
+    REJECTED = "rejected"
+
+
+class ProgressSyncResult(BaseModel):
+    event_id: str
+    module_id: str
+    path_id: Optional[str] = None
+    status: SyncResultStatus
+    xp_earned: int = 0
+    error: Optional[str] = None
+
+
+class PathProgress(BaseModel):
+    path_id: str
+    progress_percentage: float
+
+
+class ProgressSyncResponse(BaseModel):
+    results: List[ProgressSyncResult]
+    paths: List[PathProgress] = []
+
+
 # ============== Certificate ==============
 
 class CertificateResponse(BaseModel):
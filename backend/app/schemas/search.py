@@ -0,0 +1,23 @@
+"""Search schemas."""
+
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from enum import Enum
+
+
+class SearchResultType(str, Enum):
+    LEARNING_PATH = "learning_path"
+    POST = "post"
+    CAREER_ROLE = "career_role"
+
+
+class SearchResult(BaseModel):
+    type: SearchResultType
+    id: str
+    title: Optional[str] = None
+    # Title and body excerpt with matches wrapped in <mark></mark>
+    title_highlight: Optional[str] = None
+    snippet: Optional[str] = None
+    rank: float
+    created_at: Optional[datetime] = None
@@ -0,0 +1,156 @@
+"""Badge rules engine backed by the versioned badge catalog."""
+
+from dataclasses import dataclass
+from typing import List, Dict, Any, TYPE_CHECKING
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import logging
+
+from app.core.config import settings
+from app.services.catalog import VersionedCatalog, CatalogSnapshot
+
+if TYPE_CHECKING:
+    from app.services.gamification import GamificationService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BadgeDefinition:
+    """Static badge definition as stored in the `badges` table."""
+    id: str
+    name: str
+    slug: str
+    tier: str
+    requirement_type: str
+    requirement_value: int
+    xp_reward: int
+
+
+class BadgeCatalog(VersionedCatalog):
+    """Active badges in the versioned catalog cache, indexed by requirement type."""
+
+    def __init__(self, check_seconds: float):
+        super().__init__(
+            "badges",
+            """
+            SELECT id, name, slug, description, icon, color, tier, rarity, category,
+                   requirement_type, requirement_value, xp_reward
+            FROM badges
+            WHERE is_active = true
+            ORDER BY tier, name
+            """,
+            check_seconds,
+        )
+        self._by_requirement: Dict[str, List[BadgeDefinition]] = {}
+
+    def _on_load(self, snapshot: CatalogSnapshot):
+        by_requirement: Dict[str, List[BadgeDefinition]] = {}
+        for item in snapshot.items:
+            badge = BadgeDefinition(
+                id=item["id"],
+                name=item["name"],
+                slug=item["slug"],
+                tier=item["tier"],
+                requirement_type=item["requirement_type"],
+                requirement_value=item["requirement_value"],
+                xp_reward=item["xp_reward"] or 0,
+            )
+            by_requirement.setdefault(badge.requirement_type, []).append(badge)
+        self._by_requirement = by_requirement
+
+    async def for_requirement(self, db: AsyncSession, requirement_type: str) -> List[BadgeDefinition]:
+        """Get active badges whose requirement matches an event type."""
+        await self.get(db)
+        return self._by_requirement.get(requirement_type, [])
+
+
+badge_catalog = BadgeCatalog(settings.CATALOG_VERSION_CHECK_SECONDS)
+
+
+class BadgeEngine:
+    """Evaluates every candidate badge for an event with one write round trip."""
+
+    def __init__(self, gamification: "GamificationService"):
+        self.gamification = gamification
+        self.db = gamification.db
+
+    async def evaluate(
+        self,
+        user_id: str,
+        event_type: str,
+        count: int = 1,
+        commit: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply an event to all matching badges and award XP for new unlocks.
+
+        Progress for every candidate badge is written with one multi-row upsert;
+        already unlocked badges are left untouched and rows that reach their
+        requirement are returned as newly unlocked.
+        """
+        badges = await badge_catalog.for_requirement(self.db, event_type)
+        if not badges or count <= 0:
+            return []
+
+        result = await self.db.execute(
+            text("""
+            INSERT INTO user_badges (user_id, badge_id, progress, is_unlocked, unlocked_at)
+            SELECT
+                CAST(:user_id AS uuid),
+                b.badge_id,
+                :count,
+                :count >= b.requirement_value,
+                CASE WHEN :count >= b.requirement_value THEN NOW() END
+            FROM unnest(CAST(:badge_ids AS uuid[]), CAST(:requirements AS integer[]))
+                AS b(badge_id, requirement_value)
+            ORDER BY b.badge_id
+            -- EXCLUDED only carries user_badges columns, so the update branch
+            -- looks the catalog requirement up in the bound arrays by badge id
+            ON CONFLICT (user_id, badge_id) DO UPDATE SET
+                progress = user_badges.progress + EXCLUDED.progress,
+                is_unlocked = user_badges.progress + EXCLUDED.progress
+                    >= (CAST(:requirements AS integer[]))[array_position(CAST(:badge_ids AS uuid[]), EXCLUDED.badge_id)],
+                unlocked_at = CASE
+                    WHEN user_badges.progress + EXCLUDED.progress
+                        >= (CAST(:requirements AS integer[]))[array_position(CAST(:badge_ids AS uuid[]), EXCLUDED.badge_id)]
+                    THEN NOW()
+                END
+            WHERE user_badges.is_unlocked = false
+            RETURNING badge_id, is_unlocked
+            """),
+            {
+                "user_id": user_id,
+                "count": count,
+                "badge_ids": [b.id for b in badges],
+                "requirements": [b.requirement_value for b in badges],
+            }
+        )
+        unlocked_ids = {str(row.badge_id) for row in result.fetchall() if row.is_unlocked}
+        unlocked = [b for b in badges if b.id in unlocked_ids]
+
+        # One ledger write for everything unlocked by this event
+        total_xp = sum(b.xp_reward for b in unlocked)
+        if total_xp > 0:
+            await self.gamification.award_xp(
+                user_id=user_id,
+                amount=total_xp,
+                source_type="badge",
+                source_id=unlocked[0].id if len(unlocked) == 1 else None,
+                description=f"Unlocked badge{'s' if len(unlocked) > 1 else ''}: "
+                            f"{', '.join(b.name for b in unlocked)}",
+                commit=False,
+            )
+
+        if commit:
+            await self.db.commit()
+
+        return [
+            {
+                "id": b.id,
+                "name": b.name,
+                "tier": b.tier,
+                "xp_reward": b.xp_reward,
+            }
+            for b in unlocked
+        ]
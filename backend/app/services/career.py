@@ -0,0 +1,162 @@
+"""
+Career assessment and skill gap analysis.
+
+Role matching and learning path recommendations come from the vectorized
+model in ml_engine.py; this module turns assessment input into model input
+and shapes the results stored on career_assessments.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import numpy as np
+
+from app.services.ml_engine import (
+    recommendation_engine,
+    skill_levels,
+    REQUIRED_WEIGHT,
+    RECOMMENDED_WEIGHT,
+)
+
+ALTERNATIVE_ROLES = 3
+RECOMMENDED_PATHS = 5
+# Numeric assessment answers are 1-5 ratings; this or higher makes a trait
+TRAIT_THRESHOLD = 4
+
+
+@dataclass
+class CareerRecommendation:
+    """Result of an assessment, in the shape stored on career_assessments."""
+    personality_traits: List[str]
+    recommended_role_id: Optional[Any]
+    match_score: float
+    alternative_roles: List[Dict[str, Any]]
+    skill_gaps: List[Dict[str, Any]]
+    recommended_paths: List[Dict[str, Any]]
+
+
+def personality_traits(answers: Optional[Dict[str, Any]]) -> List[str]:
+    """Traits rated TRAIT_THRESHOLD or higher, strongest first."""
+    rated = [
+        (trait, value) for trait, value in (answers or {}).items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    ]
+    return [trait for trait, value in sorted(rated, key=lambda r: -r[1]) if value >= TRAIT_THRESHOLD]
+
+
+def skill_gap_report(
+    levels: Dict[str, int],
+    required_skills: Optional[List[Any]],
+    recommended_skills: Optional[List[Any]],
+) -> Dict[str, Any]:
+    """Matched skills, gaps (required first, largest first) and the weighted match."""
+    required = skill_levels(required_skills)
+    recommended = {
+        name: level for name, level in skill_levels(recommended_skills).items()
+        if name not in required
+    }
+
+    matched: List[str] = []
+    gaps: List[Dict[str, Any]] = []
+    earned = total = 0.0
+    for skills, is_required, weight in (
+        (required, True, REQUIRED_WEIGHT),
+        (recommended, False, RECOMMENDED_WEIGHT),
+    ):
+        for name, required_level in skills.items():
+            current = levels.get(name, 0)
+            total += weight
+            earned += weight * min(current / required_level, 1.0)
+            if current >= required_level:
+                matched.append(name)
+                continue
+            gaps.append({
+                "skill": name,
+                "current_level": current,
+                "required_level": required_level,
+                "gap": required_level - current,
+                "is_required": is_required,
+                "priority": "high" if is_required and not current else "medium" if is_required else "low",
+            })
+
+    gaps.sort(key=lambda g: (not g["is_required"], -g["gap"], g["skill"]))
+    return {
+        "match_percentage": round(100 * earned / total, 2) if total else 100.0,
+        "matched_skills": sorted(matched),
+        "skill_gaps": gaps,
+    }
+
+
+def _gap_weights(gaps: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Weight of each missing skill when ranking paths that teach it."""
+    return {
+        g["skill"]: (REQUIRED_WEIGHT if g["is_required"] else RECOMMENDED_WEIGHT) * g["gap"] / g["required_level"]
+        for g in gaps
+    }
+
+
+class CareerAdvisorService:
+    """Career role matching, skill gaps and learning path suggestions."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _enrolled_paths(self, user_id: Any) -> Set[str]:
+        result = await self.db.execute(
+            text("SELECT path_id FROM enrollments WHERE user_id = :user_id"),
+            {"user_id": str(user_id)}
+        )
+        return {str(row.path_id) for row in result.fetchall()}
+
+    async def analyze_and_recommend(
+        self,
+        user_id: Any,
+        answers: Dict[str, Any],
+        current_skills: List[Any],
+        interests: List[str],
+    ) -> CareerRecommendation:
+        """Score every active role against the assessment and pick the best."""
+        model = await recommendation_engine.model(self.db)
+        levels = skill_levels(current_skills)
+        traits = personality_traits(answers)
+        if not model.roles:
+            return CareerRecommendation(traits, None, 0.0, [], [], [])
+
+        scores = model.score_roles(levels, interests or [])
+        ranked = np.argsort(-scores, kind="stable")[:1 + ALTERNATIVE_ROLES]
+        best = model.roles[ranked[0]]
+        report = skill_gap_report(levels, best["required_skills"], best["recommended_skills"])
+        enrolled = await self._enrolled_paths(user_id)
+
+        return CareerRecommendation(
+            personality_traits=traits,
+            recommended_role_id=best["id"],
+            match_score=float(scores[ranked[0]]),
+            alternative_roles=[
+                {
+                    "role_id": model.roles[i]["id"],
+                    "title": model.roles[i]["title"],
+                    "match_score": float(scores[i]),
+                }
+                for i in ranked[1:]
+            ],
+            skill_gaps=report["skill_gaps"],
+            recommended_paths=model.recommend_paths(
+                _gap_weights(report["skill_gaps"]), enrolled, RECOMMENDED_PATHS
+            ),
+        )
+
+    async def analyze_skill_gaps(
+        self,
+        current_skills: Optional[List[Any]],
+        required_skills: Optional[List[Any]],
+        recommended_skills: Optional[List[Any]],
+    ) -> Dict[str, Any]:
+        """Gaps between the given skills and a role's, with paths covering them."""
+        report = skill_gap_report(skill_levels(current_skills), required_skills, recommended_skills)
+        model = await recommendation_engine.model(self.db)
+        report["recommended_paths"] = model.recommend_paths(
+            _gap_weights(report["skill_gaps"]), set(), RECOMMENDED_PATHS
+        )
+        return report
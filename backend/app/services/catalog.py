@@ -0,0 +1,158 @@
+"""
+Versioned in-process cache for static catalogs (badges, quests).
+
+Each catalog has a row in `catalog_versions` that a trigger bumps whenever the
+catalog table changes (see 013_catalog_versions.sql). Processes keep the
+catalog in memory and only re-check the version every few seconds; on a new
+version the catalog is taken from Redis (if another process already loaded it)
+or reloaded from Postgres.
+"""
+
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Iterable
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import logging
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """One version of a catalog: JSON-safe item dicts in display order."""
+    name: str
+    version: int
+    items: List[Dict[str, Any]]
+
+    @property
+    def etag(self) -> str:
+        return f"{self.name}-v{self.version}"
+
+    def etag_for(self, rows: Iterable[Any], *params: Any) -> str:
+        """ETag for a per-user view: catalog version + the user's rows + request filters."""
+        digest = hashlib.sha1(self.etag.encode())
+        digest.update(json.dumps([_jsonable(p) for p in params]).encode())
+        for row in sorted(tuple(str(_jsonable(v)) for v in row) for row in rows):
+            digest.update("|".join(row).encode())
+        return f'"{digest.hexdigest()}"'
+
+
+class VersionedCatalog:
+    """A catalog table cached in-process until its catalog_versions entry changes."""
+
+    def __init__(self, name: str, query: str, check_seconds: float):
+        self.name = name
+        self.query = query
+        self.check_interval = timedelta(seconds=check_seconds)
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """Re-check the catalog version on next access."""
+        self._checked_at = None
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._snapshot is not None
+            and self._checked_at is not None
+            and datetime.utcnow() - self._checked_at < self.check_interval
+        )
+
+    def _on_load(self, snapshot: CatalogSnapshot):
+        """Hook for subclasses to build lookup indexes for a new snapshot."""
+
+    @property
+    def _redis_key_prefix(self) -> str:
+        return f"catalog:{self.name}:v"
+
+    async def _current_version(self, db: AsyncSession) -> int:
+        result = await db.execute(
+            text("SELECT version FROM catalog_versions WHERE name = :name"),
+            {"name": self.name}
+        )
+        return result.scalar() or 0
+
+    async def _load_from_db(self, db: AsyncSession) -> List[Dict[str, Any]]:
+        result = await db.execute(text(self.query))
+        return [
+            {key: _jsonable(value) for key, value in row._mapping.items()}
+            for row in result.fetchall()
+        ]
+
+    async def _load_from_redis(self, version: int) -> Optional[List[Dict[str, Any]]]:
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            cached = await redis.get(f"{self._redis_key_prefix}{version}")
+        except Exception as e:
+            logger.warning(f"Redis read failed for catalog '{self.name}': {e}")
+            return None
+        return json.loads(cached) if cached else None
+
+    async def _store_in_redis(self, version: int, items: List[Dict[str, Any]]):
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.set(
+                f"{self._redis_key_prefix}{version}",
+                json.dumps(items),
+                ex=settings.REDIS_CACHE_TTL,
+            )
+        except Exception as e:
+            logger.warning(f"Redis write failed for catalog '{self.name}': {e}")
+
+    async def get(self, db: AsyncSession) -> CatalogSnapshot:
+        """Get the current catalog snapshot, reloading it if the version moved."""
+        if self._is_fresh():
+            return self._snapshot
+
+        async with self._lock:
+            if self._is_fresh():
+                return self._snapshot
+
+            version = await self._current_version(db)
+            if self._snapshot is None or self._snapshot.version != version:
+                items = await self._load_from_redis(version)
+                if items is None:
+                    items = await self._load_from_db(db)
+                    await self._store_in_redis(version, items)
+
+                snapshot = CatalogSnapshot(self.name, version, items)
+                self._on_load(snapshot)
+                self._snapshot = snapshot
+                logger.debug(f"Catalog '{self.name}' loaded at version {version} ({len(items)} items)")
+
+            self._checked_at = datetime.utcnow()
+            return self._snapshot
+
+
+quest_catalog = VersionedCatalog(
+    "quests",
+    """
+    SELECT id, title, description, quest_type, category, requirement_type,
+           requirement_value, xp_reward, starts_at, expires_at
+    FROM quests
+    WHERE is_active = true
+    ORDER BY quest_type, xp_reward DESC
+    """,
+    settings.CATALOG_VERSION_CHECK_SECONDS,
+)
@@ -0,0 +1,187 @@
+"""
+Threaded comment loading.
+
+Every comment carries its thread position (root_id, depth and a materialized
+path, see 017_comment_threads.sql). A page of threads is two queries: a keyset
+page of top-level comments, then one LATERAL query taking the first replies of
+each thread in path (depth-first) order. Parents always come before their
+replies, so the nested tree is built in a single pass. Nodes whose replies
+were cut off by the per-thread or depth bound get a `replies_cursor` to load
+the rest from /comments/{id}/replies.
+"""
+
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+from app.services.user_cards import user_cards
+from app.services.viewer_state import ViewerStateService
+from app.utils.helpers import encode_cursor
+
+_COMMENT_COLUMNS = """
+    c.id, c.post_id, c.author_id, c.parent_id, c.root_id, c.depth, c.path,
+    c.content, c.likes_count, c.replies_count, c.created_at
+"""
+
+
+def comment_response(c, author: Dict[str, Any], is_liked: bool) -> Dict[str, Any]:
+    """Serialize a comment row with its author's user card."""
+    return {
+        "id": str(c.id),
+        "author": author,
+        "content": c.content,
+        "likes_count": c.likes_count,
+        "is_liked": is_liked,
+        "parent_id": str(c.parent_id) if c.parent_id else None,
+        "created_at": c.created_at,
+    }
+
+
+def build_comment_tree(rows, authors: Dict[str, Dict[str, Any]], liked: Set[str]) -> List[Dict[str, Any]]:
+    """
+    Nest comment rows under their parents in one pass.
+
+    Rows must list parents before their replies (path order within a thread).
+    Rows whose parent is not among them are returned at the top level.
+    """
+    nodes: Dict[str, Dict[str, Any]] = {}
+    # Path of the last loaded row in each node's subtree, where "load more" resumes
+    resume_path: Dict[str, str] = {}
+    top: List[Dict[str, Any]] = []
+
+    for row in rows:
+        if str(row.author_id) not in authors:
+            continue
+        node = comment_response(row, authors[str(row.author_id)], str(row.id) in liked)
+        node.update(depth=row.depth, replies_count=row.replies_count, replies=[], replies_cursor=None)
+        nodes[node["id"]] = node
+        resume_path[node["id"]] = row.path
+
+        parent = nodes.get(node["parent_id"]) if node["parent_id"] else None
+        if parent is None:
+            top.append(node)
+            continue
+        parent["replies"].append(node)
+        while parent is not None:
+            resume_path[parent["id"]] = row.path
+            parent = nodes.get(parent["parent_id"]) if parent["parent_id"] else None
+
+    for node_id, node in nodes.items():
+        if node["replies_count"] > len(node["replies"]):
+            node["replies_cursor"] = encode_cursor(resume_path[node_id])
+
+    return top
+
+
+class CommentThreadService:
+    """Loads bounded pages of comment threads."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_threads(
+        self,
+        user_id: str,
+        post_id: str,
+        limit: int,
+        replies_per_thread: int,
+        max_depth: int,
+        after: Optional[Tuple[datetime, str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        A page of top-level comments with the first replies of each thread.
+
+        Returns (threads, next_cursor); `after` is the (created_at, id) of the
+        last top-level comment of the previous page.
+        """
+        query = f"""
+            SELECT {_COMMENT_COLUMNS}
+            FROM comments c
+            WHERE c.post_id = :post_id AND c.parent_id IS NULL
+        """
+        params: Dict[str, Any] = {"post_id": post_id, "limit": limit}
+        if after:
+            query += """
+                AND (c.created_at, c.id)
+                    > (CAST(:after_created_at AS timestamptz), CAST(:after_id AS uuid))
+            """
+            params["after_created_at"], params["after_id"] = after
+        query += " ORDER BY c.created_at, c.id LIMIT :limit"
+
+        roots = (await self.db.execute(text(query), params)).fetchall()
+        next_cursor = encode_cursor(roots[-1].created_at, roots[-1].id) if len(roots) == limit else None
+
+        replies = []
+        root_ids = [str(r.id) for r in roots if r.replies_count]
+        if root_ids and replies_per_thread:
+            result = await self.db.execute(
+                text(f"""
+                SELECT r.*
+                FROM unnest(CAST(:root_ids AS uuid[])) WITH ORDINALITY AS t(root_id, ord)
+                CROSS JOIN LATERAL (
+                    SELECT {_COMMENT_COLUMNS}
+                    FROM comments c
+                    WHERE c.root_id = t.root_id AND c.depth BETWEEN 1 AND :max_depth
+                    ORDER BY c.path
+                    LIMIT :per_thread
+                ) r
+                ORDER BY t.ord, r.path
+                """),
+                {"root_ids": root_ids, "max_depth": max_depth, "per_thread": replies_per_thread}
+            )
+            replies = result.fetchall()
+
+        rows = [*roots, *replies]
+        return await self._tree(user_id, rows), next_cursor
+
+    async def get_comment(self, comment_id: str):
+        """Thread position of a comment, or None."""
+        result = await self.db.execute(
+            text("SELECT id, post_id, root_id, depth, path FROM comments WHERE id = :comment_id"),
+            {"comment_id": comment_id}
+        )
+        return result.first()
+
+    async def get_replies(
+        self,
+        user_id: str,
+        comment,
+        limit: int,
+        max_depth: int,
+        after_path: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        The next replies under `comment` (a row from get_comment), nested.
+
+        Rows continue in path order after `after_path`, at most `max_depth`
+        levels below the comment. Returns (replies, next_cursor).
+        """
+        result = await self.db.execute(
+            text(f"""
+            SELECT {_COMMENT_COLUMNS}
+            FROM comments c
+            WHERE c.root_id = :root_id
+              AND c.path > :after_path AND c.path < :path_end
+              AND c.depth <= :max_depth
+            ORDER BY c.path
+            LIMIT :limit
+            """),
+            {
+                "root_id": str(comment.root_id),
+                "after_path": after_path or comment.path,
+                # Every descendant path is "<path>/..." and "0" sorts right after "/"
+                "path_end": comment.path + "0",
+                "max_depth": comment.depth + max_depth,
+                "limit": limit,
+            }
+        )
+        rows = result.fetchall()
+        next_cursor = encode_cursor(rows[-1].path) if len(rows) == limit else None
+        return await self._tree(user_id, rows), next_cursor
+
+    async def _tree(self, user_id: str, rows) -> List[Dict[str, Any]]:
+        """Hydrate authors and the viewer's likes for `rows`, then nest them."""
+        authors = await user_cards.get_many(self.db, [c.author_id for c in rows])
+        liked = await ViewerStateService(self.db).liked(user_id, "comment", [str(c.id) for c in rows])
+        return build_comment_tree(rows, authors, liked)
@@ -0,0 +1,163 @@
+"""
+Reconciliation of denormalized counters (post likes/comments, comment likes,
+path module totals and completed modules per enrollment).
+
+The counters are maintained incrementally in the same transaction as the
+source write: by the `update_post_stats` trigger (see
+016_counter_maintenance.sql), by `update_path_total_modules` and by the
+module completion endpoint (see 021_enrollment_progress.sql). This reconciler walks each counted table in id
+chunks, recounts the source rows for the chunk with one GROUP BY and corrects
+any drift. Corrections are applied as deltas, so a concurrent trigger update
+to the same row is never overwritten. Drift found per run is written to
+`counter_drift_log`.
+"""
+
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Serializes chunk corrections across workers so a delta is never applied twice
+COUNTER_LOCK_KEY = 5_005_015
+
+
+@dataclass(frozen=True)
+class CounterSpec:
+    """A denormalized counter column and the rows it counts."""
+    table: str
+    column: str
+    source_table: str
+    source_key: str
+    source_filter: str = ""
+
+    @property
+    def name(self) -> str:
+        return f"{self.table}.{self.column}"
+
+
+COUNTERS = [
+    CounterSpec("posts", "likes_count", "reactions", "target_id", "AND target_type = 'post'"),
+    CounterSpec("posts", "comments_count", "comments", "post_id"),
+    CounterSpec("comments", "likes_count", "reactions", "target_id", "AND target_type = 'comment'"),
+    CounterSpec("learning_paths", "total_modules", "learning_modules", "path_id"),
+    # Fixing the count re-derives enrollments.progress_percentage by trigger
+    CounterSpec("enrollments", "completed_modules_count", "module_progress", "enrollment_id", "AND status = 'completed'"),
+]
+
+# Keyset start; every row id sorts after the nil UUID
+_FIRST_ID = "00000000-0000-0000-0000-000000000000"
+
+_RECONCILE_CHUNK = """
+    WITH chunk AS (
+        SELECT id, COALESCE({column}, 0) AS recorded
+        FROM {table}
+        WHERE id > CAST(:after AS uuid)
+        ORDER BY id
+        LIMIT :chunk_size
+    ),
+    actual AS (
+        SELECT {source_key} AS id, COUNT(*) AS actual
+        FROM {source_table}
+        WHERE {source_key} IN (SELECT id FROM chunk) {source_filter}
+        GROUP BY {source_key}
+    ),
+    drift AS (
+        SELECT c.id, COALESCE(a.actual, 0) - c.recorded AS delta
+        FROM chunk c
+        LEFT JOIN actual a ON a.id = c.id
+    ),
+    fixed AS (
+        UPDATE {table} t
+        SET {column} = COALESCE(t.{column}, 0) + d.delta
+        FROM drift d
+        WHERE t.id = d.id AND d.delta <> 0
+        RETURNING d.delta
+    )
+    SELECT
+        (SELECT COUNT(*) FROM chunk) AS checked,
+        (SELECT id FROM chunk ORDER BY id DESC LIMIT 1) AS last_id,
+        (SELECT COUNT(*) FROM fixed) AS fixed,
+        (SELECT COALESCE(SUM(ABS(delta)), 0) FROM fixed) AS total_drift,
+        (SELECT COALESCE(MAX(ABS(delta)), 0) FROM fixed) AS max_drift
+"""
+
+
+@dataclass
+class DriftStats:
+    """Drift found and fixed for one counter in one reconciliation run."""
+    counter: str
+    rows_checked: int = 0
+    rows_fixed: int = 0
+    total_drift: int = 0
+    max_drift: int = 0
+
+
+class CounterReconciler:
+    """Recounts denormalized counters in chunks and fixes drift."""
+
+    def __init__(self, db: AsyncSession, chunk_size: int = 1000):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    async def reconcile(self, spec: CounterSpec) -> DriftStats:
+        """Reconcile one counter over its whole table, one committed chunk at a time."""
+        started_at = datetime.now(timezone.utc)
+        stats = DriftStats(spec.name)
+        query = text(_RECONCILE_CHUNK.format(**asdict(spec)))
+
+        after = _FIRST_ID
+        while True:
+            await self.db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": COUNTER_LOCK_KEY})
+            result = await self.db.execute(query, {"after": after, "chunk_size": self.chunk_size})
+            row = result.first()
+            await self.db.commit()
+
+            if not row.checked:
+                break
+
+            stats.rows_checked += row.checked
+            stats.rows_fixed += row.fixed
+            stats.total_drift += row.total_drift
+            stats.max_drift = max(stats.max_drift, row.max_drift)
+
+            if row.checked < self.chunk_size:
+                break
+            after = str(row.last_id)
+
+        await self.db.execute(
+            text("""
+            INSERT INTO counter_drift_log
+                (counter, rows_checked, rows_fixed, total_drift, max_drift, started_at)
+            VALUES (:counter, :rows_checked, :rows_fixed, :total_drift, :max_drift, :started_at)
+            """),
+            {**asdict(stats), "started_at": started_at}
+        )
+        await self.db.commit()
+
+        if stats.rows_fixed:
+            logger.warning(
+                f"Counter drift on {stats.counter}: {stats.rows_fixed}/{stats.rows_checked} rows fixed, "
+                f"total drift {stats.total_drift}, max drift {stats.max_drift}"
+            )
+        return stats
+
+    async def reconcile_all(self) -> List[DriftStats]:
+        """Reconcile every registered counter."""
+        return [await self.reconcile(spec) for spec in COUNTERS]
+
+
+async def reconcile_counters():
+    """Background job: recount denormalized counters and fix drift."""
+    async with AsyncSessionLocal() as session:
+        stats = await CounterReconciler(session, settings.COUNTER_RECONCILE_CHUNK_SIZE).reconcile_all()
+    logger.info(
+        "Counter reconciliation finished: "
+        + ", ".join(f"{s.counter} {s.rows_fixed}/{s.rows_checked} fixed" for s in stats)
+    )
@@ -1,12 +1,15 @@
 """Gamification service for XP, levels, badges, and streaks."""
 
-from datetime import datetime, date, timedelta
-from typing import Optional, List, Dict, Any
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import text
 import logging
 
 from app.core.config import settings
+from app.services.badges import BadgeEngine
+from app.services.streaks import StreakService
+from app.utils.gamification_calculator import get_level_curve
 
 logger = logging.getLogger(__name__)
 
@@ -17,36 +20,15 @@ class GamificationService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.level_thresholds = settings.LEVEL_THRESHOLDS
+        self.level_curve = get_level_curve(self.level_thresholds)
     
     def calculate_level(self, xp: int) -> int:
         """Calculate user level from XP."""
-        level = 1
-        for threshold in self.level_thresholds:
-            if xp >= threshold:
-                level += 1
-            else:
-                break
-        return level
+        return self.level_curve.level_for(xp)
     
     def get_level_progress(self, xp: int, level: int) -> Dict[str, Any]:
         """Get progress towards next level."""
-        if level <= len(self.level_thresholds):
-            current_threshold = self.level_thresholds[level - 2] if level > 1 else 0
-            next_threshold = self.level_thresholds[level - 1]
-        else:
-            current_threshold = self.level_thresholds[-1]
-            next_threshold = current_threshold
-        
-        xp_in_level = xp - current_threshold
-        xp_for_level = next_threshold - current_threshold
-        progress = (xp_in_level / xp_for_level) * 100 if xp_for_level > 0 else 100
-        
-        return {
-            "xp_in_level": xp_in_level,
-            "xp_for_level": xp_for_level,
-            "progress_percentage": min(100, max(0, progress)),
-            "xp_to_next": max(0, next_threshold - xp),
-        }
+        return self.level_curve.progress(xp, level)
     
     async def award_xp(
         self,
@@ -54,224 +36,182 @@ class GamificationService:
         amount: int,
         source_type: str,
         source_id: Optional[str] = None,
-        description: Optional[str] = None
+        description: Optional[str] = None,
+        commit: bool = True
     ) -> Dict[str, Any]:
-        """Award XP to a user."""
-        # Get current user data
+        """
+        Award XP to a user.
+
+        The balance update, level recalculation and ledger insert run as one
+        statement. The user row is locked first, so concurrent awards for the
+        same user are serialized by Postgres and none of them get lost.
+        """
         result = await self.db.execute(
-            "SELECT experience_points, current_level FROM users WHERE id = :user_id",
-            {"user_id": user_id}
-        )
-        user = result.first()
-        
-        if not user:
-            raise ValueError("User not found")
-        
-        old_xp = user.experience_points
-        old_level = user.current_level
-        new_xp = old_xp + amount
-        new_level = self.calculate_level(new_xp)
-        
-        # Update user
-        await self.db.execute(
-            """
-            UPDATE users 
-            SET experience_points = :new_xp, current_level = :new_level
-            WHERE id = :user_id
-            """,
-            {"new_xp": new_xp, "new_level": new_level, "user_id": user_id}
-        )
-        
-        # Log transaction
-        await self.db.execute(
-            """
-            INSERT INTO xp_transactions (user_id, amount, balance_after, source_type, source_id, description)
-            VALUES (:user_id, :amount, :balance, :source_type, :source_id, :description)
-            """,
+            text("""
+            WITH previous AS (
+                SELECT id, current_level
+                FROM users
+                WHERE id = :user_id
+                FOR UPDATE
+            ),
+            updated AS (
+                UPDATE users u SET
+                    experience_points = u.experience_points + :amount,
+                    current_level = 1 + (
+                        SELECT COUNT(*) FROM unnest(CAST(:thresholds AS integer[])) AS t(threshold)
+                        WHERE t.threshold <= u.experience_points + :amount
+                    )
+                FROM previous p
+                WHERE u.id = p.id
+                RETURNING u.id, u.experience_points, u.current_level, p.current_level AS previous_level
+            ),
+            ledger AS (
+                INSERT INTO xp_transactions (user_id, amount, balance_after, source_type, source_id, description)
+                SELECT id, :amount, experience_points, :source_type, CAST(:source_id AS uuid), :description
+                FROM updated
+            )
+            SELECT experience_points, current_level, previous_level FROM updated
+            """),
             {
                 "user_id": user_id,
                 "amount": amount,
-                "balance": new_xp,
+                "thresholds": self.level_thresholds,
                 "source_type": source_type,
                 "source_id": source_id,
                 "description": description,
             }
         )
-        
-        await self.db.commit()
-        
-        leveled_up = new_level > old_level
-        
+        user = result.first()
+
+        if not user:
+            raise ValueError("User not found")
+
+        if commit:
+            await self.db.commit()
+
+        leveled_up = user.current_level > user.previous_level
+
         if leveled_up:
-            logger.info(f"User {user_id} leveled up to {new_level}")
+            logger.info(f"User {user_id} leveled up to {user.current_level}")
             # Could trigger notification here
-        
+
         return {
             "xp_earned": amount,
-            "new_total": new_xp,
-            "new_level": new_level,
+            "new_total": user.experience_points,
+            "new_level": user.current_level,
             "leveled_up": leveled_up,
         }
-    
-    async def update_streak(self, user_id: str) -> Dict[str, Any]:
-        """Update user's daily streak."""
-        today = date.today()
-        
-        # Get current streak data
+
+    async def award_xp_many(
+        self,
+        awards: List[Tuple],
+        commit: bool = True
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Award XP for many (user_id, amount, source_type[, source_id[, description]]) tuples.
+
+        Amounts are summed per user into one UPDATE, user rows are locked in id
+        order so concurrent batches cannot deadlock, and every award still gets
+        its own ledger row with the running balance after it. Awards for
+        unknown users are dropped. Returns the result per user_id.
+        """
+        awards = [tuple(award) + (None,) * (5 - len(award)) for award in awards if award[1]]
+        if not awards:
+            return {}
+
         result = await self.db.execute(
-            "SELECT * FROM user_streaks WHERE user_id = :user_id",
-            {"user_id": user_id}
-        )
-        streak = result.first()
-        
-        if not streak:
-            # Create new streak record
-            await self.db.execute(
-                """
-                INSERT INTO user_streaks (user_id, current_streak, longest_streak, last_activity_date)
-                VALUES (:user_id, 1, 1, :today)
-                """,
-                {"user_id": user_id, "today": today}
-            )
-            await self.db.commit()
-            return {"current_streak": 1, "longest_streak": 1, "streak_extended": True}
-        
-        last_activity = streak.last_activity_date
-        current_streak = streak.current_streak
-        longest_streak = streak.longest_streak
-        
-        # Check if streak is frozen
-        if streak.streak_frozen_until and streak.streak_frozen_until >= today:
-            # Streak is frozen, just update activity date
-            await self.db.execute(
-                "UPDATE user_streaks SET last_activity_date = :today WHERE user_id = :user_id",
-                {"today": today, "user_id": user_id}
+            text("""
+            WITH awards AS (
+                SELECT *
+                FROM unnest(
+                    CAST(:user_ids AS uuid[]),
+                    CAST(:amounts AS integer[]),
+                    CAST(:source_types AS varchar[]),
+                    CAST(:source_ids AS uuid[]),
+                    CAST(:descriptions AS text[])
+                ) WITH ORDINALITY AS a(user_id, amount, source_type, source_id, description, ord)
+            ),
+            deltas AS (
+                SELECT user_id, SUM(amount) AS delta
+                FROM awards
+                GROUP BY user_id
+            ),
+            previous AS (
+                SELECT u.id, u.current_level
+                FROM users u
+                JOIN deltas d ON d.user_id = u.id
+                ORDER BY u.id
+                FOR UPDATE OF u
+            ),
+            updated AS (
+                UPDATE users u SET
+                    experience_points = u.experience_points + d.delta,
+                    current_level = 1 + (
+                        SELECT COUNT(*) FROM unnest(CAST(:thresholds AS integer[])) AS t(threshold)
+                        WHERE t.threshold <= u.experience_points + d.delta
+                    )
+                FROM deltas d, previous p
+                WHERE u.id = d.user_id AND p.id = u.id
+                RETURNING u.id, u.experience_points, u.current_level, p.current_level AS previous_level
+            ),
+            ledger AS (
+                -- Balance after each award = final total minus the awards that came after it
+                INSERT INTO xp_transactions (user_id, amount, balance_after, source_type, source_id, description)
+                SELECT
+                    a.user_id,
+                    a.amount,
+                    up.experience_points
+                        - (SUM(a.amount) OVER (PARTITION BY a.user_id ORDER BY a.ord DESC) - a.amount),
+                    a.source_type,
+                    a.source_id,
+                    a.description
+                FROM awards a
+                JOIN updated up ON up.id = a.user_id
+                ORDER BY a.ord
             )
-            await self.db.commit()
-            return {
-                "current_streak": current_streak,
-                "longest_streak": longest_streak,
-                "streak_extended": False,
-                "is_frozen": True,
-            }
-        
-        if last_activity == today:
-            # Already logged activity today
-            return {
-                "current_streak": current_streak,
-                "longest_streak": longest_streak,
-                "streak_extended": False,
-            }
-        elif last_activity == today - timedelta(days=1):
-            # Consecutive day - extend streak
-            new_streak = current_streak + 1
-            new_longest = max(new_streak, longest_streak)
-            
-            # Check for milestone
-            milestones = [7, 14, 30, 60, 90, 180, 365]
-            milestone_reached = new_streak in milestones
-            
-            await self.db.execute(
-                """
-                UPDATE user_streaks 
-                SET current_streak = :new_streak, 
-                    longest_streak = :new_longest,
-                    last_activity_date = :today,
-                    milestones_reached = milestones_reached || :milestone::jsonb
-                WHERE user_id = :user_id
-                """,
-                {
-                    "new_streak": new_streak,
-                    "new_longest": new_longest,
-                    "today": today,
-                    "user_id": user_id,
-                    "milestone": f'[{new_streak}]' if milestone_reached else '[]',
-                }
-            )
-            await self.db.commit()
-            
-            return {
-                "current_streak": new_streak,
-                "longest_streak": new_longest,
-                "streak_extended": True,
-                "milestone_reached": new_streak if milestone_reached else None,
+            SELECT id, experience_points, current_level, previous_level FROM updated
+            """),
+            {
+                "user_ids": [str(a[0]) for a in awards],
+                "amounts": [a[1] for a in awards],
+                "source_types": [a[2] for a in awards],
+                "source_ids": [str(a[3]) if a[3] is not None else None for a in awards],
+                "descriptions": [a[4] for a in awards],
+                "thresholds": self.level_thresholds,
             }
-        else:
-            # Streak broken - reset
-            await self.db.execute(
-                """
-                UPDATE user_streaks 
-                SET current_streak = 1, last_activity_date = :today
-                WHERE user_id = :user_id
-                """,
-                {"today": today, "user_id": user_id}
-            )
+        )
+        rows = result.fetchall()
+
+        if commit:
             await self.db.commit()
-            
-            return {
-                "current_streak": 1,
-                "longest_streak": longest_streak,
-                "streak_extended": True,
-                "streak_reset": True,
+
+        deltas: Dict[str, int] = defaultdict(int)
+        for award in awards:
+            deltas[str(award[0])] += award[1]
+
+        results = {}
+        for row in rows:
+            user_id = str(row.id)
+            leveled_up = row.current_level > row.previous_level
+            if leveled_up:
+                logger.info(f"User {user_id} leveled up to {row.current_level}")
+            results[user_id] = {
+                "xp_earned": deltas[user_id],
+                "new_total": row.experience_points,
+                "new_level": row.current_level,
+                "leveled_up": leveled_up,
             }
+
+        dropped = set(deltas) - set(results)
+        if dropped:
+            logger.warning(f"Dropped XP awards for unknown users: {', '.join(sorted(dropped))}")
+
+        return results
+    
+    async def update_streak(self, user_id: str, commit: bool = True) -> Dict[str, Any]:
+        """Update user's daily streak."""
+        return await StreakService(self.db).record_activity(user_id, commit=commit)
     
     async def check_badge_progress(self, user_id: str, event_type: str, count: int = 1) -> List[Dict]:
         """Check and update badge progress for an event."""
-        unlocked_badges = []
-        
-        # Get badges matching this event type that user hasn't unlocked
-        result = await self.db.execute(
-            """
-            SELECT b.*, COALESCE(ub.progress, 0) as current_progress, ub.is_unlocked
-            FROM badges b
-            LEFT JOIN user_badges ub ON b.id = ub.badge_id AND ub.user_id = :user_id
-            WHERE b.requirement_type = :event_type 
-              AND b.is_active = true
-              AND (ub.is_unlocked IS NULL OR ub.is_unlocked = false)
-            """,
-            {"user_id": user_id, "event_type": event_type}
-        )
-        badges = result.fetchall()
-        
-        for badge in badges:
-            new_progress = badge.current_progress + count
-            is_unlocked = new_progress >= badge.requirement_value
-            
-            # Upsert progress
-            await self.db.execute(
-                """
-                INSERT INTO user_badges (user_id, badge_id, progress, is_unlocked, unlocked_at)
-                VALUES (:user_id, :badge_id, :progress, :is_unlocked, :unlocked_at)
-                ON CONFLICT (user_id, badge_id) DO UPDATE SET
-                    progress = :progress,
-                    is_unlocked = :is_unlocked,
-                    unlocked_at = CASE WHEN :is_unlocked THEN :unlocked_at ELSE user_badges.unlocked_at END
-                """,
-                {
-                    "user_id": user_id,
-                    "badge_id": str(badge.id),
-                    "progress": new_progress,
-                    "is_unlocked": is_unlocked,
-                    "unlocked_at": datetime.utcnow() if is_unlocked else None,
-                }
-            )
-            
-            if is_unlocked:
-                # Award XP for badge
-                await self.award_xp(
-                    user_id=user_id,
-                    amount=badge.xp_reward,
-                    source_type="badge",
-                    source_id=str(badge.id),
-                    description=f"Unlocked badge: {badge.name}"
-                )
-                
-                unlocked_badges.append({
-                    "id": str(badge.id),
-                    "name": badge.name,
-                    "tier": badge.tier,
-                    "xp_reward": badge.xp_reward,
-                })
-        
-        await self.db.commit()
-        return unlocked_badges
+        return await BadgeEngine(self).evaluate(user_id, event_type, count)
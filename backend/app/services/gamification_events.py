@@ -0,0 +1,351 @@
+"""
+Gamification event pipeline.
+
+Request handlers publish events (module completed, quest claimed, ...) instead of
+writing XP synchronously, or stage them in the gamification_outbox table when
+the event must commit together with the handler's own writes (see
+011_gamification_events.sql). A background worker drains both in batches,
+coalesces XP per user into one UPDATE, bulk-inserts the ledger rows and runs
+streak and badge evaluation, all in one transaction.
+
+Delivery is at-least-once: a batch that fails is put back (local queue), left
+pending and reclaimed once idle (Redis stream) or left in the outbox. Every
+event carries an `event_id` that the worker records in
+gamification_processed_events in the same transaction, so a redelivered event
+is skipped instead of applied twice.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Tuple
+from uuid import uuid4
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis
+from app.services.badges import BadgeEngine
+from app.services.gamification import GamificationService
+
+logger = logging.getLogger(__name__)
+
+
+# Event types
+MODULE_COMPLETED = "module_completed"
+QUEST_CLAIMED = "quest_claimed"
+HABIT_COMPLETED = "habit_completed"
+SESSION_COMPLETED = "session_completed"
+ASSESSMENT_COMPLETED = "assessment_completed"
+
+# Badge requirement_type advanced by each event type
+BADGE_REQUIREMENTS = {
+    MODULE_COMPLETED: "modules_completed",
+    QUEST_CLAIMED: "quests_completed",
+    HABIT_COMPLETED: "habits_completed",
+    SESSION_COMPLETED: "sessions_completed",
+    ASSESSMENT_COMPLETED: "assessments_completed",
+}
+
+# Events that count as daily activity for streaks
+STREAK_EVENTS = {MODULE_COMPLETED, HABIT_COMPLETED, SESSION_COMPLETED}
+
+
+@dataclass
+class GamificationEvent:
+    """A gamification-relevant user action."""
+    event_type: str
+    user_id: str
+    xp: int = 0
+    source_type: Optional[str] = None
+    source_id: Optional[str] = None
+    description: Optional[str] = None
+    occurred_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    event_id: str = field(default_factory=lambda: uuid4().hex)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, data: str, default_id: Optional[str] = None) -> "GamificationEvent":
+        """Decode an event; payloads written before event ids existed use `default_id`."""
+        payload = json.loads(data)
+        if default_id and "event_id" not in payload:
+            payload["event_id"] = default_id
+        return cls(**payload)
+
+
+# ============== Queue backends ==============
+
+class LocalEventQueue:
+    """In-process queue (single worker process, tests and development)."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def publish(self, event: GamificationEvent):
+        self._queue.put_nowait(event)
+
+    async def consume(self, max_items: int) -> List[Tuple[Optional[str], GamificationEvent]]:
+        events = []
+        while len(events) < max_items:
+            try:
+                events.append((None, self._queue.get_nowait()))
+            except asyncio.QueueEmpty:
+                break
+        return events
+
+    async def ack(self, ids: List[str]):
+        pass
+
+    async def release(self, batch: List[Tuple[Optional[str], GamificationEvent]]):
+        """Put back a batch that failed to process."""
+        for _, event in batch:
+            self._queue.put_nowait(event)
+
+
+class RedisStreamEventQueue:
+    """Redis stream with a consumer group, shared by all API workers."""
+
+    def __init__(self, stream: str, group: str):
+        self.stream = stream
+        self.group = group
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._group_ready = False
+        self._reclaim_cursor = "0-0"
+        self._next_reclaim = 0.0
+
+    async def _ensure_group(self, redis):
+        if self._group_ready:
+            return
+        try:
+            await redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def publish(self, event: GamificationEvent):
+        redis = get_redis()
+        await redis.xadd(
+            self.stream,
+            {"event": event.to_json()},
+            maxlen=settings.GAMIFICATION_EVENT_STREAM_MAXLEN,
+            approximate=True,
+        )
+
+    def _decode(self, entries) -> List[Tuple[Optional[str], GamificationEvent]]:
+        return [
+            (entry_id, GamificationEvent.from_json(fields["event"], default_id=f"stream:{entry_id}"))
+            for entry_id, fields in entries
+        ]
+
+    async def _reclaim(self, redis, max_items: int) -> List[Tuple[Optional[str], GamificationEvent]]:
+        """Take over entries pending longer than the reclaim idle time (any consumer)."""
+        idle_seconds = settings.GAMIFICATION_EVENT_RECLAIM_IDLE_SECONDS
+        response = await redis.xautoclaim(
+            self.stream,
+            self.group,
+            self.consumer,
+            min_idle_time=idle_seconds * 1000,
+            start_id=self._reclaim_cursor,
+            count=max_items,
+        )
+        self._reclaim_cursor = response[0]
+        if self._reclaim_cursor == "0-0":
+            # Scanned the whole pending list; look again after another idle period
+            self._next_reclaim = time.monotonic() + idle_seconds
+
+        entries = response[1]
+        # Entries trimmed from the stream come back without fields (Redis < 7)
+        await self.ack([entry_id for entry_id, fields in entries if not fields])
+        return self._decode([(entry_id, fields) for entry_id, fields in entries if fields])
+
+    async def consume(self, max_items: int) -> List[Tuple[Optional[str], GamificationEvent]]:
+        redis = get_redis()
+        await self._ensure_group(redis)
+
+        # Re-deliver entries whose batch failed or whose consumer died
+        if time.monotonic() >= self._next_reclaim:
+            reclaimed = await self._reclaim(redis, max_items)
+            if reclaimed:
+                return reclaimed
+
+        response = await redis.xreadgroup(
+            self.group, self.consumer, {self.stream: ">"}, count=max_items
+        )
+        return self._decode(response[0][1] if response else [])
+
+    async def ack(self, ids: List[str]):
+        if ids:
+            await get_redis().xack(self.stream, self.group, *ids)
+
+    async def release(self, batch: List[Tuple[Optional[str], GamificationEvent]]):
+        """Failed entries stay pending and are reclaimed once idle."""
+
+
+event_queue = LocalEventQueue()
+
+
+def init_event_queue():
+    """Select the queue backend once Redis has (or hasn't) connected."""
+    global event_queue
+
+    if settings.GAMIFICATION_EVENT_BACKEND == "redis":
+        if get_redis() is not None:
+            event_queue = RedisStreamEventQueue(
+                settings.GAMIFICATION_EVENT_STREAM,
+                settings.GAMIFICATION_EVENT_GROUP,
+            )
+            logger.info("Gamification events using Redis stream backend")
+            return
+        logger.warning("Redis unavailable - gamification events using local queue")
+
+    event_queue = LocalEventQueue()
+
+
+async def publish_event(event: GamificationEvent):
+    """Enqueue an event for the gamification worker."""
+    await event_queue.publish(event)
+
+
+async def stage_events(db: AsyncSession, events: List[GamificationEvent]):
+    """Write events to the outbox in the caller's transaction; they apply once it commits."""
+    if events:
+        await db.execute(
+            text("INSERT INTO gamification_outbox (payload) SELECT unnest(CAST(:payloads AS text[]))"),
+            {"payloads": [e.to_json() for e in events]}
+        )
+
+
+# ============== Worker ==============
+
+class GamificationWorker:
+    """Drains gamification events in batches and applies them with bulk writes."""
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+
+    async def drain(self):
+        """Apply the outbox, then process queued events until the queue is empty."""
+        await self.drain_outbox()
+
+        while True:
+            batch = await event_queue.consume(self.batch_size)
+            if not batch:
+                return
+
+            try:
+                await self.process([event for _, event in batch])
+            except Exception:
+                await event_queue.release(batch)
+                raise
+            await event_queue.ack([entry_id for entry_id, _ in batch if entry_id is not None])
+
+            if len(batch) < self.batch_size:
+                return
+
+    async def drain_outbox(self):
+        """Apply staged events; rows are deleted in the transaction that applies them."""
+        while True:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    text("""
+                    DELETE FROM gamification_outbox
+                    WHERE id IN (
+                        SELECT id FROM gamification_outbox
+                        ORDER BY id
+                        LIMIT :batch_size
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING payload
+                    """),
+                    {"batch_size": self.batch_size}
+                )
+                rows = result.fetchall()
+                events = await self._claim(session, [GamificationEvent.from_json(row.payload) for row in rows])
+                if events:
+                    await self._apply(session, events)
+                await session.commit()
+
+            if events:
+                logger.debug(f"Processed {len(events)} outbox gamification events")
+            if len(rows) < self.batch_size:
+                return
+
+    async def _claim(self, session: AsyncSession, events: List[GamificationEvent]) -> List[GamificationEvent]:
+        """Record the batch's event ids; returns only events not processed before."""
+        if not events:
+            return []
+        unique = list({e.event_id: e for e in events}.values())
+        result = await session.execute(
+            text("""
+            INSERT INTO gamification_processed_events (event_id)
+            SELECT unnest(CAST(:event_ids AS text[]))
+            ON CONFLICT (event_id) DO NOTHING
+            RETURNING event_id
+            """),
+            {"event_ids": [e.event_id for e in unique]}
+        )
+        fresh = {row.event_id for row in result.fetchall()}
+        return [e for e in unique if e.event_id in fresh]
+
+    async def process(self, events: List[GamificationEvent]):
+        """Apply a batch exactly once: dedup, XP, streaks and badges commit together."""
+        async with AsyncSessionLocal() as session:
+            events = await self._claim(session, events)
+            if events:
+                await self._apply(session, events)
+            await session.commit()
+
+        logger.debug(f"Processed {len(events)} gamification events")
+
+    async def _apply(self, session: AsyncSession, events: List[GamificationEvent]):
+        gamification = GamificationService(session)
+
+        # XP: one coalesced update and ledger insert for the whole batch
+        await gamification.award_xp_many(
+            [
+                (e.user_id, e.xp, e.source_type or e.event_type, e.source_id, e.description)
+                for e in events if e.xp
+            ],
+            commit=False,
+        )
+
+        # Streaks: one update per active user per flush
+        for user_id in {e.user_id for e in events if e.event_type in STREAK_EVENTS}:
+            await gamification.update_streak(user_id, commit=False)
+
+        # Badges: one evaluation per (user, requirement) with the summed count
+        badge_counts: Dict[Tuple[str, str], int] = defaultdict(int)
+        for event in events:
+            requirement = BADGE_REQUIREMENTS.get(event.event_type)
+            if requirement:
+                badge_counts[(event.user_id, requirement)] += 1
+
+        engine = BadgeEngine(gamification)
+        for (user_id, requirement), count in badge_counts.items():
+            await engine.evaluate(user_id, requirement, count, commit=False)
+
+
+async def trim_processed_events():
+    """Background job: forget processed event ids past the redelivery window."""
+    older_than = datetime.now(timezone.utc) - timedelta(days=settings.GAMIFICATION_EVENT_DEDUP_DAYS)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text("DELETE FROM gamification_processed_events WHERE processed_at < :older_than"),
+            {"older_than": older_than}
+        )
+        await session.commit()
+    if result.rowcount:
+        logger.info(f"Trimmed {result.rowcount} processed gamification event ids")
+
+
+gamification_worker = GamificationWorker(settings.GAMIFICATION_EVENT_BATCH_SIZE)
@@ -0,0 +1,98 @@
+"""
+Batched re-scoring of the precomputed `posts.hot_score`.
+
+The score (see post_hot_score in 020_hot_scores.sql) only changes when a
+post's likes, comments or views do, and every counter write bumps
+`posts.updated_at`. The scorer therefore only looks at posts updated since
+its previous run and rewrites the ones whose score moved, so the hot feed can
+be served straight from the (hot_score, id) index.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Re-read a little before the previous run so rows committed by transactions
+# that started before it (and so carry an older updated_at) are not missed
+_OVERLAP = timedelta(minutes=1)
+
+# Keyset start; every row id sorts after the nil UUID
+_FIRST_ID = "00000000-0000-0000-0000-000000000000"
+
+_RESCORE_BATCH = """
+    WITH batch AS (
+        SELECT id FROM posts
+        WHERE updated_at >= :since
+          AND id > CAST(:after AS uuid)
+        ORDER BY id
+        LIMIT :batch_size
+    ),
+    rescored AS (
+        UPDATE posts p
+        SET hot_score = post_hot_score(p.likes_count, p.comments_count, p.views_count, p.created_at)
+        FROM batch
+        WHERE p.id = batch.id
+          AND p.hot_score IS DISTINCT FROM post_hot_score(p.likes_count, p.comments_count, p.views_count, p.created_at)
+        RETURNING p.id
+    )
+    SELECT
+        (SELECT COUNT(*) FROM batch) AS checked,
+        (SELECT id FROM batch ORDER BY id DESC LIMIT 1) AS last_id,
+        (SELECT COUNT(*) FROM rescored) AS rescored
+"""
+
+
+class HotScoreService:
+    """Re-scores posts with recent activity."""
+
+    def __init__(self, db: AsyncSession, batch_size: int = 1000):
+        self.db = db
+        self.batch_size = batch_size
+
+    async def rescore_since(self, since: datetime) -> int:
+        """Re-score posts updated since `since`; returns the number of scores changed."""
+        rescored = 0
+        after = _FIRST_ID
+        while True:
+            result = await self.db.execute(
+                text(_RESCORE_BATCH),
+                {"since": since, "after": after, "batch_size": self.batch_size}
+            )
+            row = result.first()
+            await self.db.commit()
+
+            rescored += row.rescored
+            if row.checked < self.batch_size:
+                return rescored
+            after = str(row.last_id)
+
+
+class HotScorer:
+    """Background job state: the start of the previous successful run."""
+
+    def __init__(self):
+        self._last_run: Optional[datetime] = None
+
+    async def run(self):
+        async with AsyncSessionLocal() as session:
+            started = (await session.execute(text("SELECT NOW()"))).scalar()
+            since = (
+                self._last_run - _OVERLAP
+                if self._last_run
+                else started - timedelta(seconds=settings.HOT_SCORE_LOOKBACK_SECONDS)
+            )
+            rescored = await HotScoreService(session, settings.HOT_SCORE_BATCH_SIZE).rescore_since(since)
+
+        self._last_run = started
+        if rescored:
+            logger.debug(f"Re-scored {rescored} hot posts")
+
+
+hot_scorer = HotScorer()
@@ -0,0 +1,280 @@
+"""Leaderboard service backed by the precomputed leaderboard_cache table."""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("daily", "weekly", "monthly", "all_time")
+
+# Arbitrary key for pg_try_advisory_xact_lock so only one worker rebuilds at a time
+LEADERBOARD_LOCK_KEY = 5_005_001
+
+_ALL_TIME_SOURCE = """
+    ranked AS (
+        SELECT
+            u.id AS user_id,
+            u.experience_points,
+            u.current_level,
+            COALESCE(s.current_streak, 0) AS current_streak,
+            COALESCE(b.badges_count, 0) AS badges_count,
+            ROW_NUMBER() OVER (ORDER BY u.experience_points DESC, u.id) AS rank
+        FROM users u
+        LEFT JOIN user_streaks s ON s.user_id = u.id
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS badges_count
+            FROM user_badges
+            WHERE is_unlocked = true
+            GROUP BY user_id
+        ) b ON b.user_id = u.id
+        WHERE u.is_active = true
+    )
+"""
+
+# Period XP is summed from pre-aggregated rollups (see 009_xp_rollups.sql):
+# at most 24 hourly rows per user for a day, 7 or 31 daily rows otherwise.
+ROLLUP_SOURCES = {
+    "daily": ("xp_rollups_hourly", "bucket_start"),
+    "weekly": ("xp_rollups_daily", "bucket_date"),
+    "monthly": ("xp_rollups_daily", "bucket_date"),
+}
+
+_PERIOD_SOURCE = """
+    period_xp AS (
+        SELECT user_id, SUM(xp) AS xp
+        FROM {rollup_table}
+        WHERE {bucket_column} >= :since
+        GROUP BY user_id
+        HAVING SUM(xp) > 0
+    ),
+    ranked AS (
+        SELECT
+            u.id AS user_id,
+            p.xp AS experience_points,
+            u.current_level,
+            COALESCE(s.current_streak, 0) AS current_streak,
+            COALESCE(b.badges_count, 0) AS badges_count,
+            ROW_NUMBER() OVER (ORDER BY p.xp DESC, u.id) AS rank
+        FROM period_xp p
+        JOIN users u ON u.id = p.user_id
+        LEFT JOIN user_streaks s ON s.user_id = u.id
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS badges_count
+            FROM user_badges
+            WHERE is_unlocked = true
+            GROUP BY user_id
+        ) b ON b.user_id = u.id
+        WHERE u.is_active = true
+    )
+"""
+
+# Upsert only rows whose ranking actually changed and drop users that fell out
+_REFRESH_TAIL = """
+    upserted AS (
+        INSERT INTO leaderboard_cache
+            (user_id, rank, experience_points, current_level, current_streak, badges_count, period, updated_at)
+        SELECT user_id, rank, experience_points, current_level, current_streak, badges_count, :period, NOW()
+        FROM ranked
+        ON CONFLICT (user_id, period) DO UPDATE SET
+            rank = EXCLUDED.rank,
+            experience_points = EXCLUDED.experience_points,
+            current_level = EXCLUDED.current_level,
+            current_streak = EXCLUDED.current_streak,
+            badges_count = EXCLUDED.badges_count,
+            updated_at = EXCLUDED.updated_at
+        WHERE (leaderboard_cache.rank, leaderboard_cache.experience_points, leaderboard_cache.current_level,
+               leaderboard_cache.current_streak, leaderboard_cache.badges_count)
+            IS DISTINCT FROM
+              (EXCLUDED.rank, EXCLUDED.experience_points, EXCLUDED.current_level,
+               EXCLUDED.current_streak, EXCLUDED.badges_count)
+        RETURNING 1
+    ),
+    removed AS (
+        DELETE FROM leaderboard_cache lc
+        WHERE lc.period = :period
+          AND NOT EXISTS (SELECT 1 FROM ranked r WHERE r.user_id = lc.user_id)
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM upserted) AS upserted,
+        (SELECT COUNT(*) FROM removed) AS removed
+"""
+
+# Names and avatars are embedded from the user card cache by the endpoint
+_ENTRY_COLUMNS = """
+    lc.rank,
+    lc.user_id,
+    lc.experience_points,
+    lc.current_level,
+    lc.current_streak
+"""
+
+
+def period_start(period: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Get the (UTC) start of the current leaderboard period."""
+    now = now or datetime.now(timezone.utc)
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if period == "daily":
+        return day_start
+    if period == "weekly":
+        return day_start - timedelta(days=day_start.weekday())
+    if period == "monthly":
+        return day_start.replace(day=1)
+    return None
+
+
+class LeaderboardService:
+    """Service for building and reading precomputed leaderboards."""
+
+    # Per-process refresher state: last ledger row seen, last rebuild time and period windows
+    _last_xp_at: Optional[datetime] = None
+    _last_refresh_at: Optional[datetime] = None
+    _windows: Dict[str, Optional[datetime]] = {}
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def refresh(self, period: str) -> Dict[str, int]:
+        """Rebuild the rankings for one period in a single set-based statement."""
+        if period not in PERIODS:
+            raise ValueError(f"Unknown leaderboard period: {period}")
+
+        params: Dict[str, Any] = {"period": period}
+        if period == "all_time":
+            source = _ALL_TIME_SOURCE
+        else:
+            rollup_table, bucket_column = ROLLUP_SOURCES[period]
+            source = _PERIOD_SOURCE.format(rollup_table=rollup_table, bucket_column=bucket_column)
+            since = period_start(period)
+            params["since"] = since if bucket_column == "bucket_start" else since.date()
+
+        result = await self.db.execute(
+            text(f"WITH {source}, {_REFRESH_TAIL}"),
+            params
+        )
+        row = result.first()
+        return {"upserted": row.upserted, "removed": row.removed}
+
+    async def refresh_all(self, force: bool = False) -> bool:
+        """
+        Rebuild every period if anything changed since the last rebuild.
+
+        Returns True if the leaderboards were rebuilt.
+        """
+        cls = type(self)
+        now = datetime.now(timezone.utc)
+
+        last_xp_at = (
+            await self.db.execute(text("SELECT MAX(created_at) FROM xp_transactions"))
+        ).scalar()
+        windows = {period: period_start(period, now) for period in PERIODS}
+        max_age = timedelta(seconds=settings.LEADERBOARD_MAX_STALENESS_SECONDS)
+
+        stale = (
+            force
+            or cls._last_refresh_at is None
+            or last_xp_at != cls._last_xp_at
+            or windows != cls._windows
+            or now - cls._last_refresh_at >= max_age
+        )
+        if not stale:
+            return False
+
+        locked = (
+            await self.db.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"),
+                {"key": LEADERBOARD_LOCK_KEY}
+            )
+        ).scalar()
+        if not locked:
+            # Another worker is rebuilding right now
+            return False
+
+        for period in PERIODS:
+            stats = await self.refresh(period)
+            logger.debug(f"Leaderboard '{period}' refreshed: {stats}")
+
+        await self.db.commit()
+
+        cls._last_xp_at = last_xp_at
+        cls._last_refresh_at = now
+        cls._windows = windows
+        return True
+
+    async def get_top(self, period: str, limit: int) -> List[Any]:
+        """Read the top `limit` entries for a period (index range scan on period, rank)."""
+        result = await self.db.execute(
+            text(f"""
+            SELECT {_ENTRY_COLUMNS}
+            FROM leaderboard_cache lc
+            WHERE lc.period = :period
+            ORDER BY lc.rank
+            LIMIT :limit
+            """),
+            {"period": period, "limit": limit}
+        )
+        return result.fetchall()
+
+    async def get_rank(self, user_id: str, period: str = "all_time") -> Optional[int]:
+        """Look up a user's rank via the (user_id, period) unique index."""
+        result = await self.db.execute(
+            text("SELECT rank FROM leaderboard_cache WHERE user_id = :user_id AND period = :period"),
+            {"user_id": user_id, "period": period}
+        )
+        return result.scalar()
+
+    async def get_around(self, user_id: str, period: str, radius: int) -> List[Any]:
+        """Read the user's own entry and `radius` neighbours on each side."""
+        result = await self.db.execute(
+            text(f"""
+            WITH me AS (
+                SELECT rank FROM leaderboard_cache
+                WHERE user_id = :user_id AND period = :period
+            )
+            SELECT {_ENTRY_COLUMNS}
+            FROM me
+            JOIN leaderboard_cache lc
+              ON lc.period = :period
+             AND lc.rank BETWEEN me.rank - :radius AND me.rank + :radius
+            ORDER BY lc.rank
+            """),
+            {"user_id": user_id, "period": period, "radius": radius}
+        )
+        return result.fetchall()
+
+    async def get_friends(self, user_id: str, period: str, limit: int) -> List[Any]:
+        """Rank the user and the people they follow within a period."""
+        result = await self.db.execute(
+            text("""
+            SELECT
+                ROW_NUMBER() OVER (ORDER BY lc.rank) AS rank,
+                lc.user_id,
+                lc.experience_points,
+                lc.current_level,
+                lc.current_streak
+            FROM leaderboard_cache lc
+            WHERE lc.period = :period
+              AND (
+                  lc.user_id IN (SELECT following_id FROM follows WHERE follower_id = :user_id)
+                  OR lc.user_id = :user_id
+              )
+            ORDER BY lc.rank
+            LIMIT :limit
+            """),
+            {"user_id": user_id, "period": period, "limit": limit}
+        )
+        return result.fetchall()
+
+
+async def refresh_leaderboards():
+    """Background job: rebuild leaderboard_cache when XP has changed."""
+    async with AsyncSessionLocal() as session:
+        if await LeaderboardService(session).refresh_all():
+            logger.info("Leaderboards refreshed")
@@ -0,0 +1,300 @@
+"""
+CPU recommendation engine for career roles and learning paths.
+
+Skills from career roles (`required_skills`, `recommended_skills`) and
+published learning paths (`skills_covered`) share one vocabulary. Roles are a
+sparse (roles x skills) weight matrix with rows summing to 1, so matching a
+user against every role is one sparse matrix-vector product. Paths are a
+binary (paths x skills) matrix scored by how much of a skill gap they cover,
+blended with item-item co-enrollment similarity (cosine over the users x paths
+enrollment matrix).
+
+The matrices are rebuilt when the `career_roles` or `learning_paths` catalog
+version moves (see 025_career_role_catalog.sql); enrollments, which change
+constantly, are reloaded by the recommendation-refresh background job.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Iterable, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import numpy as np
+from scipy import sparse
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.catalog import VersionedCatalog, CatalogSnapshot
+from app.services.path_catalog import path_catalog
+
+logger = logging.getLogger(__name__)
+
+# Skill levels are 1-5; plain skill names count as the default required level
+DEFAULT_SKILL_LEVEL = 3
+REQUIRED_WEIGHT = 1.0
+RECOMMENDED_WEIGHT = 0.5
+# Share of the role match given to the user's stated interests
+INTEREST_WEIGHT = 0.1
+# Share of a path score given to co-enrollment similarity
+CO_ENROLLMENT_WEIGHT = 0.3
+
+
+def normalize_skill(skill: Any) -> Optional[Tuple[str, int]]:
+    """(name, level) of a skill given as a name or a {"name", "level"} dict."""
+    if isinstance(skill, str):
+        name, level = skill, DEFAULT_SKILL_LEVEL
+    elif isinstance(skill, dict):
+        name = skill.get("name") or skill.get("skill")
+        level = skill.get("level") or skill.get("proficiency") or skill.get("required_level")
+    else:
+        return None
+    if not isinstance(name, str) or not name.strip():
+        return None
+    try:
+        level = int(level)
+    except (TypeError, ValueError):
+        level = DEFAULT_SKILL_LEVEL
+    return name.strip().lower(), min(max(level, 1), 5)
+
+
+def skill_levels(skills: Optional[Iterable[Any]]) -> Dict[str, int]:
+    """Highest level per normalized skill name."""
+    levels: Dict[str, int] = {}
+    for skill in skills or []:
+        normalized = normalize_skill(skill)
+        if normalized:
+            name, level = normalized
+            levels[name] = max(level, levels.get(name, 0))
+    return levels
+
+
+def field_key(value: str) -> str:
+    """'Data Science' / 'data-science' -> 'data_science' (CareerField values)."""
+    return "_".join(value.strip().lower().replace("-", " ").split())
+
+
+career_role_catalog = VersionedCatalog(
+    "career_roles",
+    """
+    SELECT id, title, field, required_skills, recommended_skills
+    FROM career_roles
+    WHERE is_active = true
+    ORDER BY title, id
+    """,
+    settings.CATALOG_VERSION_CHECK_SECONDS,
+)
+
+
+@dataclass(frozen=True)
+class RecommendationModel:
+    """Vectorized roles and paths for one (roles, paths) catalog version pair."""
+    versions: Tuple[int, int]
+    skills: Dict[str, int]
+    roles: List[Dict[str, Any]]
+    role_fields: np.ndarray
+    role_weights: sparse.csr_matrix
+    paths: List[Dict[str, Any]]
+    path_ids: np.ndarray
+    path_skills: sparse.csr_matrix
+    co_enrollment: sparse.csr_matrix
+
+    def skill_vector(self, weights: Dict[str, float]) -> np.ndarray:
+        vector = np.zeros(len(self.skills))
+        for name, weight in weights.items():
+            column = self.skills.get(name)
+            if column is not None:
+                vector[column] = weight
+        return vector
+
+    def score_roles(self, levels: Dict[str, int], interests: Iterable[str]) -> np.ndarray:
+        """Match score (0-100) of every role, in catalog order."""
+        user = self.skill_vector({
+            name: min(level / DEFAULT_SKILL_LEVEL, 1.0) for name, level in levels.items()
+        })
+        skill_match = self.role_weights @ user
+        interest_keys = np.array([field_key(i) for i in interests if isinstance(i, str)], dtype=object)
+        interest_match = np.isin(self.role_fields, interest_keys).astype(float)
+        return np.round(100 * ((1 - INTEREST_WEIGHT) * skill_match + INTEREST_WEIGHT * interest_match), 2)
+
+    def recommend_paths(
+        self,
+        gaps: Dict[str, float],
+        enrolled: Set[str],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Published paths ranked by the share of the weighted skill `gaps` they
+        cover, blended with co-enrollment similarity to the `enrolled` paths.
+        """
+        if not self.paths or limit <= 0:
+            return []
+
+        gap = self.skill_vector(gaps)
+        total = gap.sum()
+        coverage = self.path_skills @ gap / total if total else np.zeros(len(self.paths))
+
+        enrolled_mask = np.isin(self.path_ids, np.array(list(enrolled), dtype=object))
+        similarity = self.co_enrollment @ enrolled_mask.astype(float)
+        if similarity.max(initial=0) > 0:
+            similarity = similarity / similarity.max()
+            scores = (1 - CO_ENROLLMENT_WEIGHT) * coverage + CO_ENROLLMENT_WEIGHT * similarity
+        else:
+            scores = coverage
+
+        scores[enrolled_mask] = 0
+        ranked = [i for i in np.argsort(-scores, kind="stable")[:limit] if scores[i] > 0]
+
+        gap_columns = set(np.flatnonzero(gap))
+        names = {column: name for name, column in self.skills.items()}
+        recommendations = []
+        for i in ranked:
+            path = self.paths[i]
+            covered = self.path_skills[i].indices
+            recommendations.append({
+                "path_id": path["id"],
+                "title": path["title"],
+                "slug": path["slug"],
+                "score": round(float(scores[i]) * 100, 2),
+                "matched_skills": sorted(names[c] for c in covered if c in gap_columns),
+            })
+        return recommendations
+
+
+def _co_enrollment(path_ids: np.ndarray, enrollments: Tuple[np.ndarray, np.ndarray]) -> sparse.csr_matrix:
+    """Cosine similarity between paths over the users who enrolled in them."""
+    n_paths = len(path_ids)
+    user_ids, enrolled_paths = enrollments
+    index = {path_id: i for i, path_id in enumerate(path_ids)}
+    columns = np.fromiter((index.get(p, -1) for p in enrolled_paths), dtype=np.int64, count=len(enrolled_paths))
+    known = columns >= 0
+    if not known.any():
+        return sparse.csr_matrix((n_paths, n_paths))
+
+    _, rows = np.unique(user_ids[known], return_inverse=True)
+    users_by_path = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, columns[known])),
+        shape=(rows.max() + 1, n_paths),
+    )
+    users_by_path.data[:] = 1
+
+    co_counts = (users_by_path.T @ users_by_path).tocsr()
+    norms = np.sqrt(co_counts.diagonal())
+    inverse = sparse.diags(np.divide(1.0, norms, out=np.zeros(n_paths), where=norms > 0))
+    similarity = inverse @ co_counts @ inverse
+    similarity = (similarity - sparse.diags(similarity.diagonal())).tocsr()
+    similarity.eliminate_zeros()
+    return similarity
+
+
+def build_model(
+    roles: CatalogSnapshot,
+    paths: CatalogSnapshot,
+    enrollments: Tuple[np.ndarray, np.ndarray],
+) -> RecommendationModel:
+    """Vectorize role and path skills into one vocabulary."""
+    role_skills = []
+    for role in roles.items:
+        required = skill_levels(role["required_skills"])
+        recommended = {
+            name: level for name, level in skill_levels(role["recommended_skills"]).items()
+            if name not in required
+        }
+        role_skills.append((required, recommended))
+    path_skills = [skill_levels(path["skills_covered"]) for path in paths.items]
+
+    vocabulary: Dict[str, int] = {}
+    for required, recommended in role_skills:
+        for name in (*required, *recommended):
+            vocabulary.setdefault(name, len(vocabulary))
+    for covered in path_skills:
+        for name in covered:
+            vocabulary.setdefault(name, len(vocabulary))
+
+    rows, columns, weights = [], [], []
+    for i, (required, recommended) in enumerate(role_skills):
+        total = REQUIRED_WEIGHT * len(required) + RECOMMENDED_WEIGHT * len(recommended)
+        for names, weight in ((required, REQUIRED_WEIGHT), (recommended, RECOMMENDED_WEIGHT)):
+            for name in names:
+                rows.append(i)
+                columns.append(vocabulary[name])
+                weights.append(weight / total)
+    role_weights = sparse.csr_matrix(
+        (weights, (rows, columns)), shape=(len(roles.items), len(vocabulary))
+    )
+
+    rows, columns = [], []
+    for i, covered in enumerate(path_skills):
+        for name in covered:
+            rows.append(i)
+            columns.append(vocabulary[name])
+    path_matrix = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, columns)), shape=(len(paths.items), len(vocabulary))
+    )
+
+    path_ids = np.array([str(path["id"]) for path in paths.items], dtype=object)
+    return RecommendationModel(
+        versions=(roles.version, paths.version),
+        skills=vocabulary,
+        roles=roles.items,
+        role_fields=np.array([field_key(role["field"] or "") for role in roles.items], dtype=object),
+        role_weights=role_weights,
+        paths=paths.items,
+        path_ids=path_ids,
+        path_skills=path_matrix,
+        co_enrollment=_co_enrollment(path_ids, enrollments),
+    )
+
+
+class RecommendationEngine:
+    """Keeps the current RecommendationModel, rebuilt on catalog changes."""
+
+    def __init__(self):
+        self._model: Optional[RecommendationModel] = None
+        self._enrollments: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._lock = asyncio.Lock()
+
+    async def _load_enrollments(self, db: AsyncSession) -> Tuple[np.ndarray, np.ndarray]:
+        result = await db.execute(text("SELECT user_id, path_id FROM enrollments"))
+        rows = result.fetchall()
+        return (
+            np.array([str(r.user_id) for r in rows], dtype=object),
+            np.array([str(r.path_id) for r in rows], dtype=object),
+        )
+
+    async def model(self, db: AsyncSession) -> RecommendationModel:
+        """The model for the current catalogs, rebuilding it if either moved."""
+        roles = await career_role_catalog.get(db)
+        paths = await path_catalog.get(db)
+        model = self._model
+        if model is not None and model.versions == (roles.version, paths.version):
+            return model
+
+        async with self._lock:
+            if self._model is None or self._model.versions != (roles.version, paths.version):
+                if self._enrollments is None:
+                    self._enrollments = await self._load_enrollments(db)
+                self._model = build_model(roles, paths, self._enrollments)
+                logger.debug(
+                    f"Recommendation model built: {len(roles.items)} roles, "
+                    f"{len(paths.items)} paths, {len(self._model.skills)} skills"
+                )
+            return self._model
+
+    async def refresh(self, db: AsyncSession):
+        """Reload enrollments and rebuild the model."""
+        enrollments = await self._load_enrollments(db)
+        roles = await career_role_catalog.get(db)
+        paths = await path_catalog.get(db)
+        async with self._lock:
+            self._enrollments = enrollments
+            self._model = build_model(roles, paths, enrollments)
+
+
+recommendation_engine = RecommendationEngine()
+
+
+async def refresh_recommendations():
+    """Background job: rebuild the model with current co-enrollment data."""
+    async with AsyncSessionLocal() as session:
+        await recommendation_engine.refresh(session)
@@ -0,0 +1,189 @@
+"""
+In-memory catalog of published learning paths with faceted filtering.
+
+The published path list is held in the versioned catalog cache (see
+catalog.py; the `learning_paths` version is bumped by trigger, see
+023_learning_path_catalog.sql) and, per version, encoded into columns: path
+ids plus integer category/difficulty codes. Category and difficulty filters
+are boolean masks over those columns, facet counts are `bincount`s of the
+codes (precomputed for the unfiltered catalog), and only the user's
+enrollments and full-text matches are read from Postgres per request.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import numpy as np
+
+from app.core.config import settings
+from app.services.catalog import VersionedCatalog, CatalogSnapshot
+
+FACETS = ("category", "difficulty")
+
+
+@dataclass(frozen=True)
+class FacetColumn:
+    """One facet encoded as integer codes (-1 = no value) into `labels`."""
+    labels: Tuple[str, ...]
+    codes: np.ndarray
+    counts: Dict[str, int]
+
+    @classmethod
+    def encode(cls, values: List[Optional[str]]) -> "FacetColumn":
+        labels = tuple(sorted({v for v in values if v is not None}))
+        index = {label: code for code, label in enumerate(labels)}
+        codes = np.fromiter((index.get(v, -1) for v in values), dtype=np.int32, count=len(values))
+        column = cls(labels, codes, {})
+        object.__setattr__(column, "counts", column.count(np.ones(len(values), dtype=bool)))
+        return column
+
+    def mask(self, value: str) -> np.ndarray:
+        if value not in self.labels:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.codes == self.labels.index(value)
+
+    def count(self, mask: np.ndarray) -> Dict[str, int]:
+        codes = self.codes[mask]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.labels))
+        return {label: int(n) for label, n in zip(self.labels, counts) if n}
+
+
+@dataclass(frozen=True)
+class CatalogColumns:
+    """Columnar view of one catalog snapshot, in catalog order."""
+    version: int
+    ids: np.ndarray
+    facets: Dict[str, FacetColumn]
+
+
+class LearningPathCatalog(VersionedCatalog):
+    """Published learning paths, ordered featured first then newest."""
+
+    def __init__(self, check_seconds: float):
+        super().__init__(
+            "learning_paths",
+            """
+            SELECT id, title, slug, description, short_description, thumbnail_url,
+                   category, difficulty, estimated_hours, total_modules, skills_covered, is_featured
+            FROM learning_paths
+            WHERE is_published = true
+            ORDER BY is_featured DESC, created_at DESC, id
+            """,
+            check_seconds,
+        )
+        self._columns: Optional[CatalogColumns] = None
+
+    def _on_load(self, snapshot: CatalogSnapshot):
+        self._columns = CatalogColumns(
+            version=snapshot.version,
+            ids=np.array([item["id"] for item in snapshot.items], dtype=object),
+            facets={
+                facet: FacetColumn.encode([item[facet] for item in snapshot.items])
+                for facet in FACETS
+            },
+        )
+
+    async def select(
+        self,
+        db: AsyncSession,
+        filters: Dict[str, Optional[str]],
+        only_ids: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, int]]]:
+        """
+        Paths matching the facet `filters` (and within `only_ids` if given).
+
+        Returns (items, facets); each facet's counts apply every other filter
+        but not its own, so they show what choosing another value would give.
+        """
+        snapshot = await self.get(db)
+        columns = self._columns
+        base = np.ones(len(columns.ids), dtype=bool)
+        if only_ids is not None:
+            base = np.isin(columns.ids, np.array(list(only_ids), dtype=object))
+
+        masks = {
+            facet: columns.facets[facet].mask(value)
+            for facet, value in filters.items() if value
+        }
+        if only_ids is None and not masks:
+            facets = {facet: column.counts for facet, column in columns.facets.items()}
+            return snapshot.items, facets
+
+        selected = base.copy()
+        for mask in masks.values():
+            selected &= mask
+
+        facets = {}
+        for facet, column in columns.facets.items():
+            others = base.copy()
+            for other, mask in masks.items():
+                if other != facet:
+                    others &= mask
+            facets[facet] = column.count(others)
+
+        return [snapshot.items[i] for i in np.flatnonzero(selected)], facets
+
+
+path_catalog = LearningPathCatalog(settings.CATALOG_VERSION_CHECK_SECONDS)
+
+
+class PathCatalogService:
+    """Catalog queries with the caller's enrollment overlay."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _enrollments(self, user_id: str) -> Dict[str, Any]:
+        result = await self.db.execute(
+            text("""
+            SELECT path_id, id, progress_percentage, status
+            FROM enrollments
+            WHERE user_id = :user_id
+            """),
+            {"user_id": user_id}
+        )
+        return {str(e.path_id): e for e in result.fetchall()}
+
+    async def _search(self, search: str) -> List[str]:
+        result = await self.db.execute(
+            text("""
+            SELECT id FROM learning_paths
+            WHERE is_published = true
+              AND (search_vector @@ websearch_to_tsquery('english', :search) OR title % :search)
+            """),
+            {"search": search}
+        )
+        return [str(row.id) for row in result.fetchall()]
+
+    async def browse(
+        self,
+        user_id: str,
+        category: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        search: Optional[str] = None,
+        enrolled_only: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, int]]]:
+        """Filtered catalog items with enrollment fields, plus facet counts."""
+        enrollments = await self._enrollments(user_id)
+
+        only_ids = None
+        if search:
+            only_ids = set(await self._search(search))
+        if enrolled_only:
+            only_ids = set(enrollments) if only_ids is None else only_ids & set(enrollments)
+
+        items, facets = await path_catalog.select(
+            self.db, {"category": category, "difficulty": difficulty}, only_ids
+        )
+        paths = []
+        for item in items:
+            enrollment = enrollments.get(item["id"])
+            paths.append({
+                **item,
+                "skills_covered": item["skills_covered"] or [],
+                "is_enrolled": enrollment is not None,
+                "progress_percentage": (enrollment.progress_percentage or 0) if enrollment else 0,
+                "enrollment_status": enrollment.status if enrollment else None,
+            })
+        return paths, facets
@@ -0,0 +1,60 @@
+"""
+Cached module outlines of learning paths.
+
+A path's outline (its published modules' titles, order, duration and XP) is
+the same for every learner, so it is cached per path and keyed by the path's
+`updated_at`, which a trigger bumps on any module change (see
+022_path_outlines.sql). Callers pass the `updated_at` they already read with
+the path row; a newer value simply misses the cache. Outlines live in an
+in-process LRU and, when available, in Redis (see tiered_cache.py); all misses
+of a batch are loaded with one query.
+"""
+
+from functools import partial
+from datetime import datetime
+from typing import Dict, Any, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.services.tiered_cache import TieredCache
+
+Outline = List[Dict[str, Any]]
+
+
+class PathOutlineCache:
+    """LRU of path outlines keyed by (path_id, updated_at)."""
+
+    def __init__(self, max_size: int):
+        self._cache = TieredCache("path_outline", max_size, settings.REDIS_CACHE_TTL)
+
+    async def _load(self, db: AsyncSession, path_ids: List[str]) -> Dict[str, Outline]:
+        result = await db.execute(
+            text("""
+            SELECT path_id, id, title, description, order_index, content_type, duration_minutes, xp_reward
+            FROM learning_modules
+            WHERE path_id = ANY(CAST(:path_ids AS uuid[])) AND is_published = true
+            ORDER BY path_id, order_index
+            """),
+            {"path_ids": path_ids}
+        )
+        outlines: Dict[str, Outline] = {path_id: [] for path_id in path_ids}
+        for m in result.fetchall():
+            outlines[str(m.path_id)].append({
+                "id": str(m.id),
+                "title": m.title,
+                "description": m.description,
+                "order_index": m.order_index,
+                "content_type": m.content_type,
+                "duration_minutes": m.duration_minutes,
+                "xp_reward": m.xp_reward,
+            })
+        return outlines
+
+    async def get_many(self, db: AsyncSession, versions: Dict[str, datetime]) -> Dict[str, Outline]:
+        """Outlines for {path_id: updated_at}; paths without published modules get []."""
+        wanted = {str(path_id): updated_at.isoformat() for path_id, updated_at in versions.items()}
+        return await self._cache.get_many(wanted, partial(self._load, db))
+
+
+path_outlines = PathOutlineCache(settings.PATH_OUTLINE_CACHE_SIZE)
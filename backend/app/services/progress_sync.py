@@ -0,0 +1,289 @@
+"""
+Bulk application of offline learning progress.
+
+Mobile clients queue progress while offline and replay it on reconnect as one
+POST /learning/progress/sync. A batch takes the same few statements whatever
+its size: one resolving every referenced module with the caller's enrollment,
+one claiming the client event ids (replays conflict on progress_sync_events
+and are reported as duplicates, see 024_progress_sync.sql), and one upserting
+all module progress with multi-row INSERT ... ON CONFLICT while bumping each
+touched enrollment's completed-module counter once.
+
+Completions use the same guarded upsert as the single-module endpoint, so only
+modules that really transition to completed are counted and earn XP. Their
+events are staged in the gamification outbox in the same transaction, and the
+gamification worker writes the XP ledger for the whole batch at once.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.schemas.learning import ProgressSyncEvent, SyncResultStatus
+from app.services.gamification_events import GamificationEvent, stage_events, MODULE_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+_APPLY = """
+    WITH completed AS (
+        INSERT INTO module_progress (
+            user_id, module_id, enrollment_id, status, progress_percentage,
+            started_at, completed_at, last_accessed_at
+        )
+        SELECT :user_id, t.module_id, t.enrollment_id, 'completed', 100, t.at, t.at, t.at
+        FROM unnest(
+            CAST(:completed_modules AS uuid[]),
+            CAST(:completed_enrollments AS uuid[]),
+            CAST(:completed_at AS timestamptz[])
+        ) AS t(module_id, enrollment_id, at)
+        ON CONFLICT (user_id, module_id) DO UPDATE SET
+            status = 'completed',
+            progress_percentage = 100,
+            started_at = COALESCE(module_progress.started_at, EXCLUDED.started_at),
+            completed_at = EXCLUDED.completed_at,
+            last_accessed_at = GREATEST(module_progress.last_accessed_at, EXCLUDED.last_accessed_at)
+        WHERE module_progress.status <> 'completed'
+        RETURNING module_id, enrollment_id
+    ),
+    progressed AS (
+        INSERT INTO module_progress (
+            user_id, module_id, enrollment_id, status, progress_percentage,
+            video_progress_seconds, quiz_score, started_at, last_accessed_at
+        )
+        SELECT :user_id, t.module_id, t.enrollment_id, 'in_progress', t.progress,
+               COALESCE(t.video_seconds, 0), t.quiz_score, t.at, t.at
+        FROM unnest(
+            CAST(:progress_modules AS uuid[]),
+            CAST(:progress_enrollments AS uuid[]),
+            CAST(:progress_percentages AS numeric[]),
+            CAST(:progress_video_seconds AS integer[]),
+            CAST(:progress_quiz_scores AS numeric[]),
+            CAST(:progress_at AS timestamptz[])
+        ) AS t(module_id, enrollment_id, progress, video_seconds, quiz_score, at)
+        ON CONFLICT (user_id, module_id) DO UPDATE SET
+            status = 'in_progress',
+            progress_percentage = GREATEST(module_progress.progress_percentage, EXCLUDED.progress_percentage),
+            video_progress_seconds = GREATEST(module_progress.video_progress_seconds, EXCLUDED.video_progress_seconds),
+            quiz_score = COALESCE(EXCLUDED.quiz_score, module_progress.quiz_score),
+            started_at = COALESCE(module_progress.started_at, EXCLUDED.started_at),
+            last_accessed_at = GREATEST(module_progress.last_accessed_at, EXCLUDED.last_accessed_at)
+        WHERE module_progress.status <> 'completed'
+        RETURNING module_id
+    ),
+    enrollment AS (
+        UPDATE enrollments e SET
+            completed_modules_count = e.completed_modules_count + COALESCE(c.completed, 0),
+            last_activity_at = :now
+        FROM unnest(CAST(:enrollment_ids AS uuid[])) AS t(id)
+        LEFT JOIN (
+            SELECT enrollment_id, COUNT(*) AS completed FROM completed GROUP BY enrollment_id
+        ) c ON c.enrollment_id = t.id
+        WHERE e.id = t.id
+        RETURNING e.path_id, e.progress_percentage
+    )
+    SELECT 'completed' AS kind, module_id AS id, CAST(NULL AS numeric) AS progress_percentage FROM completed
+    UNION ALL
+    SELECT 'progressed', module_id, NULL FROM progressed
+    UNION ALL
+    SELECT 'path', path_id, progress_percentage FROM enrollment
+"""
+
+
+@dataclass
+class _ModuleChanges:
+    """All claimed events of one module in a batch, coalesced into one upsert row."""
+    module: Any
+    at: datetime
+    completed_at: Optional[datetime] = None
+    progress: float = 0
+    video_seconds: Optional[int] = None
+    quiz_score: Optional[float] = None
+    events: List[int] = field(default_factory=list)
+
+
+def _client_time(occurred_at: Optional[datetime], now: datetime) -> datetime:
+    """Client timestamp in UTC (naive ones are taken as UTC), never later than the server clock."""
+    if occurred_at is None:
+        return now
+    if occurred_at.tzinfo is None:
+        occurred_at = occurred_at.replace(tzinfo=timezone.utc)
+    return min(occurred_at.astimezone(timezone.utc), now)
+
+
+class ProgressSyncService:
+    """Applies batches of client progress events idempotently."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _resolve(self, user_id: str, module_ids: Set[str]) -> Dict[str, Any]:
+        """Referenced modules with the caller's enrollment in their path (or None)."""
+        result = await self.db.execute(
+            text("""
+            SELECT m.id, m.path_id, m.xp_reward, e.id AS enrollment_id
+            FROM learning_modules m
+            LEFT JOIN enrollments e ON e.path_id = m.path_id AND e.user_id = :user_id
+            WHERE m.id = ANY(CAST(:module_ids AS uuid[]))
+            """),
+            {"user_id": user_id, "module_ids": list(module_ids)}
+        )
+        return {str(m.id): m for m in result.fetchall()}
+
+    async def _claim(self, user_id: str, events: List[ProgressSyncEvent]) -> Set[str]:
+        """Record event ids; returns the ones not seen before."""
+        if not events:
+            return set()
+        result = await self.db.execute(
+            text("""
+            INSERT INTO progress_sync_events (user_id, client_event_id, module_id)
+            SELECT :user_id, t.event_id, t.module_id
+            FROM unnest(CAST(:event_ids AS text[]), CAST(:module_ids AS uuid[])) AS t(event_id, module_id)
+            ON CONFLICT (user_id, client_event_id) DO NOTHING
+            RETURNING client_event_id
+            """),
+            {
+                "user_id": user_id,
+                "event_ids": [e.event_id for e in events],
+                "module_ids": [str(e.module_id) for e in events],
+            }
+        )
+        return {row.client_event_id for row in result.fetchall()}
+
+    async def _apply(self, user_id: str, changes: List[_ModuleChanges], now: datetime):
+        completions = [c for c in changes if c.completed_at]
+        progress = [c for c in changes if not c.completed_at]
+        result = await self.db.execute(
+            text(_APPLY),
+            {
+                "user_id": user_id,
+                "now": now,
+                "completed_modules": [str(c.module.id) for c in completions],
+                "completed_enrollments": [str(c.module.enrollment_id) for c in completions],
+                "completed_at": [c.completed_at for c in completions],
+                "progress_modules": [str(c.module.id) for c in progress],
+                "progress_enrollments": [str(c.module.enrollment_id) for c in progress],
+                "progress_percentages": [c.progress for c in progress],
+                "progress_video_seconds": [c.video_seconds for c in progress],
+                "progress_quiz_scores": [c.quiz_score for c in progress],
+                "progress_at": [c.at for c in progress],
+                "enrollment_ids": list({str(c.module.enrollment_id) for c in changes}),
+            }
+        )
+        return result.fetchall()
+
+    async def sync(
+        self,
+        user_id: str,
+        events: List[ProgressSyncEvent],
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Apply a batch of progress events.
+
+        Returns (results, paths): one result per event, in request order, and
+        the new progress of every enrollment the batch touched.
+        """
+        now = datetime.now(timezone.utc)
+        modules = await self._resolve(user_id, {str(e.module_id) for e in events})
+
+        results: List[Dict[str, Any]] = []
+        valid: List[int] = []
+        seen: Set[str] = set()
+        for i, event in enumerate(events):
+            module = modules.get(str(event.module_id))
+            results.append({
+                "event_id": event.event_id,
+                "module_id": str(event.module_id),
+                "path_id": str(module.path_id) if module else None,
+                "status": SyncResultStatus.DUPLICATE,
+                "xp_earned": 0,
+            })
+            if event.event_id in seen:
+                continue
+            seen.add(event.event_id)
+            if module is None:
+                results[i].update(status=SyncResultStatus.REJECTED, error="Module not found")
+            elif module.enrollment_id is None:
+                results[i].update(status=SyncResultStatus.REJECTED, error="Not enrolled in this path")
+            else:
+                valid.append(i)
+
+        claimed = await self._claim(user_id, [events[i] for i in valid])
+
+        changes: Dict[str, _ModuleChanges] = {}
+        for i in valid:
+            event = events[i]
+            if event.event_id not in claimed:
+                continue
+            at = _client_time(event.occurred_at, now)
+            change = changes.setdefault(str(event.module_id), _ModuleChanges(modules[str(event.module_id)], at))
+            change.events.append(i)
+            change.at = max(change.at, at)
+            if event.completed:
+                change.completed_at = min(change.completed_at or at, at)
+            change.progress = max(change.progress, event.progress_percentage)
+            if event.video_progress_seconds is not None:
+                change.video_seconds = max(change.video_seconds or 0, event.video_progress_seconds)
+            if event.quiz_score is not None:
+                change.quiz_score = event.quiz_score
+
+        if not changes:
+            await self.db.commit()
+            return results, []
+
+        rows = await self._apply(user_id, list(changes.values()), now)
+
+        applied = {str(row.id) for row in rows if row.kind in ("completed", "progressed")}
+        paths = [
+            {"path_id": str(row.id), "progress_percentage": row.progress_percentage}
+            for row in rows if row.kind == "path"
+        ]
+
+        xp_events = []
+        for module_id, change in changes.items():
+            xp_reward = change.module.xp_reward or settings.XP_PER_MODULE
+            completed_now = bool(change.completed_at) and module_id in applied
+            if completed_now:
+                xp_events.append(GamificationEvent(
+                    event_type=MODULE_COMPLETED,
+                    user_id=user_id,
+                    xp=xp_reward,
+                    source_type="module",
+                    source_id=module_id,
+                    description="Module completed",
+                ))
+            for i in change.events:
+                if module_id not in applied:
+                    results[i]["status"] = SyncResultStatus.ALREADY_COMPLETED
+                elif not events[i].completed:
+                    results[i]["status"] = SyncResultStatus.APPLIED
+                elif completed_now:
+                    # Only the first completion of the module in the batch earns XP
+                    results[i].update(status=SyncResultStatus.APPLIED, xp_earned=xp_reward)
+                    completed_now = False
+                else:
+                    results[i]["status"] = SyncResultStatus.ALREADY_COMPLETED
+
+        # XP, streaks and badges are applied by the gamification worker from the
+        # outbox, committed together with the progress
+        await stage_events(self.db, xp_events)
+        await self.db.commit()
+
+        return results, paths
+
+
+async def trim_progress_sync_events():
+    """Background job: forget client event ids past the retention window."""
+    older_than = datetime.now(timezone.utc) - timedelta(days=settings.PROGRESS_SYNC_RETENTION_DAYS)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text("DELETE FROM progress_sync_events WHERE created_at < :older_than"),
+            {"older_than": older_than}
+        )
+        await session.commit()
+    if result.rowcount:
+        logger.info(f"Trimmed {result.rowcount} progress sync events")
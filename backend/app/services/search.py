@@ -0,0 +1,196 @@
+"""
+Full-text search over learning paths, community posts and career roles.
+
+Each table has a weighted `search_vector` kept current by a trigger (see
+018_search.sql). Queries use websearch syntax against the GIN-indexed vectors
+and fall back to trigram similarity on titles, so small typos still match.
+Results from all sources are ranked together, paged by keyset on
+(rank, type, id), and highlighted only for the rows of the returned page.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import logging
+
+from app.utils.helpers import encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Weight of title trigram similarity relative to the full-text rank
+TRIGRAM_WEIGHT = 0.5
+
+_HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=30, MinWords=10, StartSel=<mark>, StopSel=</mark>"
+_TITLE_HEADLINE_OPTIONS = "HighlightAll=true, StartSel=<mark>, StopSel=</mark>"
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    """A searchable table and how its rows appear in results."""
+    type: str
+    table: str
+    vector_function: str
+    title: str
+    body: str
+    visible: str
+
+
+SEARCH_SOURCES = {
+    source.type: source
+    for source in [
+        SearchSource(
+            "learning_path", "learning_paths", "learning_path_search_vector",
+            "t.title", "COALESCE(t.short_description, t.description)",
+            "t.is_published = true",
+        ),
+        SearchSource(
+            "post", "posts", "post_search_vector",
+            "COALESCE(t.title, left(t.content, 120))", "t.content",
+            "t.is_published = true AND t.moderation_status = 'approved'",
+        ),
+        SearchSource(
+            "career_role", "career_roles", "career_role_search_vector",
+            "t.title", "t.description",
+            "t.is_active = true",
+        ),
+    ]
+}
+
+_SOURCE_QUERY = """
+    SELECT CAST('{type}' AS text) AS type, t.id, {title} AS title, {body} AS body, t.created_at,
+           CAST(ts_rank_cd(t.search_vector, q.query)
+                + {trigram_weight} * similarity(COALESCE(t.title, ''), :q) AS float8) AS rank
+    FROM {table} t, q
+    WHERE (t.search_vector @@ q.query OR t.title % :q) AND {visible}
+"""
+
+# Keyset start; every row id sorts after the nil UUID
+_FIRST_ID = "00000000-0000-0000-0000-000000000000"
+
+_REINDEX_CHUNK = """
+    WITH chunk AS (
+        SELECT id FROM {table}
+        WHERE id > CAST(:after AS uuid)
+        ORDER BY id
+        LIMIT :chunk_size
+    ),
+    updated AS (
+        UPDATE {table} t
+        SET search_vector = {vector_function}(t)
+        FROM chunk
+        WHERE t.id = chunk.id AND t.search_vector IS DISTINCT FROM {vector_function}(t)
+        RETURNING t.id
+    )
+    SELECT
+        (SELECT COUNT(*) FROM chunk) AS checked,
+        (SELECT id FROM chunk ORDER BY id DESC LIMIT 1) AS last_id,
+        (SELECT COUNT(*) FROM updated) AS updated
+"""
+
+
+class SearchService:
+    """Ranked search across all search sources."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def search(
+        self,
+        q: str,
+        types: Optional[List[str]] = None,
+        limit: int = 20,
+        after: Optional[Tuple[float, str, str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Search `q` in the given source types (default: all).
+
+        Returns (results, next_cursor); `after` is the (rank, type, id) of the
+        last result of the previous page.
+        """
+        sources = [SEARCH_SOURCES[t] for t in (types or SEARCH_SOURCES)]
+        hits = "\nUNION ALL\n".join(
+            _SOURCE_QUERY.format(
+                type=source.type,
+                table=source.table,
+                title=source.title,
+                body=source.body,
+                visible=source.visible,
+                trigram_weight=TRIGRAM_WEIGHT,
+            )
+            for source in sources
+        )
+
+        params: Dict[str, Any] = {"q": q, "limit": limit}
+        page_filter = ""
+        if after:
+            params["after_rank"], params["after_type"], params["after_id"] = after
+            page_filter = """
+                WHERE rank < :after_rank
+                   OR (rank = :after_rank AND (type, id) > (:after_type, CAST(:after_id AS uuid)))
+            """
+
+        result = await self.db.execute(
+            text(f"""
+            WITH q AS (SELECT websearch_to_tsquery('english', :q) AS query),
+            hits AS ({hits}),
+            page AS (
+                SELECT * FROM hits
+                {page_filter}
+                ORDER BY rank DESC, type, id
+                LIMIT :limit
+            )
+            SELECT
+                page.type, page.id, page.title, page.created_at, page.rank,
+                ts_headline('english', COALESCE(page.title, ''), q.query, '{_TITLE_HEADLINE_OPTIONS}') AS title_highlight,
+                ts_headline('english', COALESCE(page.body, ''), q.query, '{_HEADLINE_OPTIONS}') AS snippet
+            FROM page, q
+            ORDER BY page.rank DESC, page.type, page.id
+            """),
+            params
+        )
+        rows = result.fetchall()
+
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = encode_cursor(last.rank, last.type, last.id)
+
+        return [
+            {
+                "type": r.type,
+                "id": str(r.id),
+                "title": r.title,
+                "title_highlight": r.title_highlight,
+                "snippet": r.snippet,
+                "rank": r.rank,
+                "created_at": r.created_at,
+            }
+            for r in rows
+        ], next_cursor
+
+    async def reindex(self, source: SearchSource, chunk_size: int = 1000) -> Tuple[int, int]:
+        """
+        Recompute stale search vectors of one source, one committed chunk at a time.
+
+        Returns (rows checked, rows updated). Only rows whose vector changed are
+        written, so an up-to-date index costs reads only.
+        """
+        query = text(_REINDEX_CHUNK.format(table=source.table, vector_function=source.vector_function))
+        checked = updated = 0
+        after = _FIRST_ID
+
+        while True:
+            result = await self.db.execute(query, {"after": after, "chunk_size": chunk_size})
+            row = result.first()
+            await self.db.commit()
+
+            checked += row.checked
+            updated += row.updated
+            if row.checked < chunk_size:
+                break
+            after = str(row.last_id)
+
+        if updated:
+            logger.info(f"Search index for {source.table}: {updated}/{checked} rows reindexed")
+        return checked, updated
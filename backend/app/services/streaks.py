@@ -0,0 +1,178 @@
+"""Daily activity streaks: one upsert per activity and a set-based reset sweep."""
+
+from datetime import date, timedelta
+from typing import Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+STREAK_MILESTONES = [7, 14, 30, 60, 90, 180, 365]
+
+# The streak row is locked in `prev`, the transition (created / frozen /
+# unchanged / extended / reset) is decided in `classified` and the new values
+# are written back by a single upsert.
+_RECORD_ACTIVITY = """
+    WITH prev AS (
+        SELECT
+            COALESCE(current_streak, 0) AS current_streak,
+            COALESCE(longest_streak, 0) AS longest_streak,
+            last_activity_date,
+            streak_frozen_until,
+            COALESCE(milestones_reached, '[]'::jsonb) AS milestones_reached
+        FROM user_streaks
+        WHERE user_id = CAST(:user_id AS uuid)
+        FOR UPDATE
+    ),
+    classified AS (
+        SELECT
+            CASE
+                WHEN p.current_streak IS NULL THEN 'created'
+                WHEN p.streak_frozen_until >= CAST(:today AS date) THEN 'frozen'
+                WHEN p.last_activity_date = CAST(:today AS date) THEN 'unchanged'
+                WHEN p.last_activity_date = CAST(:yesterday AS date) THEN 'extended'
+                ELSE 'reset'
+            END AS status,
+            COALESCE(p.current_streak, 0) AS current_streak,
+            COALESCE(p.longest_streak, 0) AS longest_streak,
+            COALESCE(p.milestones_reached, '[]'::jsonb) AS milestones_reached
+        FROM (SELECT 1) AS one
+        LEFT JOIN prev p ON true
+    ),
+    next AS (
+        SELECT
+            c.status,
+            n.current_streak,
+            GREATEST(c.longest_streak, n.current_streak) AS longest_streak,
+            CASE
+                WHEN c.status = 'extended' AND n.current_streak = ANY(CAST(:milestones AS integer[]))
+                THEN n.current_streak
+            END AS milestone_reached,
+            c.milestones_reached
+        FROM classified c
+        CROSS JOIN LATERAL (
+            SELECT CASE c.status
+                WHEN 'extended' THEN c.current_streak + 1
+                WHEN 'frozen' THEN c.current_streak
+                WHEN 'unchanged' THEN c.current_streak
+                ELSE 1
+            END AS current_streak
+        ) n
+    ),
+    upserted AS (
+        INSERT INTO user_streaks (user_id, current_streak, longest_streak, last_activity_date, milestones_reached)
+        SELECT
+            CAST(:user_id AS uuid),
+            current_streak,
+            longest_streak,
+            CAST(:today AS date),
+            milestones_reached || CASE
+                WHEN milestone_reached IS NOT NULL THEN jsonb_build_array(milestone_reached)
+                ELSE '[]'::jsonb
+            END
+        FROM next
+        WHERE status <> 'unchanged'
+        ON CONFLICT (user_id) DO UPDATE SET
+            current_streak = EXCLUDED.current_streak,
+            longest_streak = EXCLUDED.longest_streak,
+            last_activity_date = EXCLUDED.last_activity_date,
+            milestones_reached = EXCLUDED.milestones_reached
+    )
+    SELECT status, current_streak, longest_streak, milestone_reached FROM next
+"""
+
+# Streaks whose last activity is before yesterday can no longer be extended
+# (unless a freeze covers today), so their current_streak is zeroed in bulk.
+_RESET_BROKEN = """
+    WITH broken AS (
+        SELECT id
+        FROM user_streaks
+        WHERE current_streak > 0
+          AND last_activity_date < CAST(:yesterday AS date)
+          AND (streak_frozen_until IS NULL OR streak_frozen_until < CAST(:today AS date))
+        ORDER BY id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE user_streaks s
+    SET current_streak = 0
+    FROM broken
+    WHERE s.id = broken.id
+"""
+
+
+class StreakService:
+    """Service for recording daily activity and expiring broken streaks."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record_activity(
+        self,
+        user_id: str,
+        today: Optional[date] = None,
+        commit: bool = True
+    ) -> Dict[str, Any]:
+        """Record activity for a user and extend, reset or keep their streak."""
+        today = today or date.today()
+
+        result = await self.db.execute(
+            text(_RECORD_ACTIVITY),
+            {
+                "user_id": user_id,
+                "today": today,
+                "yesterday": today - timedelta(days=1),
+                "milestones": STREAK_MILESTONES,
+            }
+        )
+        row = result.first()
+
+        if commit:
+            await self.db.commit()
+
+        response: Dict[str, Any] = {
+            "current_streak": row.current_streak,
+            "longest_streak": row.longest_streak,
+            "streak_extended": row.status in ("created", "extended", "reset"),
+        }
+        if row.status == "frozen":
+            response["is_frozen"] = True
+        elif row.status == "extended":
+            response["milestone_reached"] = row.milestone_reached
+        elif row.status == "reset":
+            response["streak_reset"] = True
+
+        return response
+
+    async def reset_broken_streaks(self, today: Optional[date] = None, batch_size: int = 5000) -> int:
+        """
+        Zero current_streak for every streak broken as of `today`.
+
+        Works in batches, each committed separately. Rows locked by a concurrent
+        activity upsert are skipped; that upsert resets the streak itself.
+        Returns the number of streaks reset.
+        """
+        today = today or date.today()
+        params = {"today": today, "yesterday": today - timedelta(days=1), "batch_size": batch_size}
+
+        total = 0
+        while True:
+            result = await self.db.execute(text(_RESET_BROKEN), params)
+            await self.db.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                return total
+
+
+async def reset_broken_streaks():
+    """Background job: expire streaks that were not extended yesterday."""
+    async with AsyncSessionLocal() as session:
+        reset = await StreakService(session).reset_broken_streaks(
+            batch_size=settings.STREAK_SWEEP_BATCH_SIZE
+        )
+        if reset:
+            logger.info(f"Reset {reset} broken streaks")
@@ -0,0 +1,114 @@
+"""
+Two-tier read-through cache: an in-process LRU over an optional Redis tier.
+
+Values are JSON-serializable and stored in Redis as one string per key. Local
+entries can expire after a TTL and carry a version (e.g. a row's updated_at);
+asking for another version is a miss, and versioned Redis keys simply age out.
+Keys missed by both tiers are handed to the caller's loader in one call. Redis
+failures are logged and fall through to the loader.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+import logging
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Loads the values of the given keys; keys left out do not exist
+Loader = Callable[[List[str]], Awaitable[Dict[str, Any]]]
+
+
+class TieredCache:
+    """LRU (optional TTL, versioned entries) with an optional Redis tier."""
+
+    def __init__(self, prefix: str, max_size: int, redis_ttl: int, local_ttl: Optional[float] = None):
+        self.prefix = prefix
+        self.max_size = max_size
+        self.redis_ttl = redis_ttl
+        self.local_ttl = local_ttl
+        # key -> (expires_at or None, version, value)
+        self._entries: "OrderedDict[str, Tuple[Optional[float], str, Any]]" = OrderedDict()
+
+    def _redis_key(self, key: str, version: str) -> str:
+        return f"{self.prefix}:{key}:{version}" if version else f"{self.prefix}:{key}"
+
+    def _get_local(self, key: str, version: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] != version:
+            return None
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def _set_local(self, key: str, version: str, value: Any):
+        expires_at = time.monotonic() + self.local_ttl if self.local_ttl is not None else None
+        self._entries[key] = (expires_at, version, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_many(self, versions: Dict[str, str], load: Loader) -> Dict[str, Any]:
+        """Values for {key: version} ("" when unversioned); keys `load` leaves out are left out."""
+        values: Dict[str, Any] = {}
+        missing = []
+        for key, version in versions.items():
+            value = self._get_local(key, version)
+            if value is None:
+                missing.append(key)
+            else:
+                values[key] = value
+
+        if not missing:
+            return values
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                cached = await redis.mget([self._redis_key(key, versions[key]) for key in missing])
+            except Exception as e:
+                logger.warning(f"Redis read failed for {self.prefix}: {e}")
+                cached = [None] * len(missing)
+            still_missing = []
+            for key, raw in zip(missing, cached):
+                if raw is None:
+                    still_missing.append(key)
+                    continue
+                values[key] = json.loads(raw)
+                self._set_local(key, versions[key], values[key])
+            missing = still_missing
+
+        if not missing:
+            return values
+
+        loaded = await load(missing)
+        for key, value in loaded.items():
+            values[key] = value
+            self._set_local(key, versions[key], value)
+
+        if redis is not None and loaded:
+            try:
+                pipe = redis.pipeline(transaction=False)
+                for key, value in loaded.items():
+                    pipe.set(self._redis_key(key, versions[key]), json.dumps(value), ex=self.redis_ttl)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Redis write failed for {self.prefix}: {e}")
+
+        return values
+
+    async def invalidate(self, key: str):
+        """Drop an unversioned entry from both tiers."""
+        self._entries.pop(key, None)
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.delete(self._redis_key(key, ""))
+        except Exception as e:
+            logger.warning(f"Redis delete failed for {self.prefix} {key}: {e}")
@@ -0,0 +1,388 @@
+"""
+Personalized home timelines (posts by followed users).
+
+New posts are fanned out on write: their ids are pushed into the timeline of
+every follower (Redis sorted sets, or the `home_timelines` table when Redis is
+not available). A timeline counts as materialized once it has been built, even
+if it is empty. Authors with more than TIMELINE_FANOUT_MAX_FOLLOWERS followers
+are not fanned out; their posts are merged in when a timeline is read.
+Following or unfollowing someone queues a rebuild of the follower's timeline.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# (post_id, created_at) in timeline order, newest first
+TimelineEntry = Tuple[str, datetime]
+
+REBUILD_QUEUE_KEY = "timeline:rebuild"
+
+_VISIBLE_POST = "p.is_published = true AND p.moderation_status = 'approved'"
+
+# Recent posts of the user and every followed author below the fan-out threshold
+_REBUILD_SOURCE = f"""
+    SELECT id, author_id, created_at FROM (
+        SELECT p.id, p.author_id, p.created_at
+        FROM follows f
+        JOIN users a ON a.id = f.following_id AND a.followers_count <= :threshold
+        CROSS JOIN LATERAL (
+            SELECT p.id, p.author_id, p.created_at
+            FROM posts p
+            WHERE p.author_id = f.following_id AND {_VISIBLE_POST}
+            ORDER BY p.created_at DESC, p.id DESC
+            LIMIT :max_length
+        ) p
+        WHERE f.follower_id = :user_id
+        UNION ALL
+        (
+            SELECT p.id, p.author_id, p.created_at
+            FROM posts p
+            WHERE p.author_id = :user_id AND {_VISIBLE_POST}
+            ORDER BY p.created_at DESC, p.id DESC
+            LIMIT :max_length
+        )
+    ) entries
+    ORDER BY created_at DESC, id DESC
+    LIMIT :max_length
+"""
+
+
+def _score(created_at: datetime) -> int:
+    return int(created_at.timestamp() * 1000)
+
+
+def _from_score(score: float) -> datetime:
+    return datetime.fromtimestamp(int(score) / 1000, tz=timezone.utc)
+
+
+# ============== Stores ==============
+
+class RedisTimelineStore:
+    """One sorted set per user: member = post id, score = created_at in ms."""
+
+    def __init__(self, max_length: int):
+        self.max_length = max_length
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"timeline:{user_id}"
+
+    @staticmethod
+    def _built_key(user_id: str) -> str:
+        # Set by replace(); an empty sorted set does not exist in Redis
+        return f"timeline_built:{user_id}"
+
+    async def push(self, db: AsyncSession, post_id: str, author_id: str, created_at: datetime, user_ids: List[str]):
+        """Add a post to the timelines that are already materialized."""
+        redis = get_redis()
+        score = _score(created_at)
+        for start in range(0, len(user_ids), 1000):
+            chunk = user_ids[start:start + 1000]
+
+            # Missing timelines are rebuilt (including this post) on first read
+            pipe = redis.pipeline(transaction=False)
+            for user_id in chunk:
+                pipe.exists(self._key(user_id), self._built_key(user_id))
+            exists = await pipe.execute()
+
+            pipe = redis.pipeline(transaction=False)
+            for user_id, present in zip(chunk, exists):
+                if present:
+                    pipe.zadd(self._key(user_id), {post_id: score})
+                    pipe.zremrangebyrank(self._key(user_id), 0, -(self.max_length + 1))
+            await pipe.execute()
+
+    async def replace(self, db: AsyncSession, user_id: str, entries: List[Tuple[str, str, datetime]]):
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.delete(self._key(user_id))
+        if entries:
+            pipe.zadd(self._key(user_id), {post_id: _score(created_at) for post_id, _, created_at in entries})
+        pipe.set(self._built_key(user_id), 1)
+        await pipe.execute()
+
+    async def page(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        before: Optional[TimelineEntry],
+        limit: int
+    ) -> Optional[List[TimelineEntry]]:
+        """Read one page; None if the user has no materialized timeline yet."""
+        redis = get_redis()
+        key = self._key(user_id)
+
+        if before is None:
+            rows = await redis.zrevrange(key, 0, limit - 1, withscores=True)
+            if not rows and not await redis.exists(self._built_key(user_id)):
+                return None
+        else:
+            # Inclusive on the cursor score, then drop ties already returned
+            before_id, before_at = before
+            before_score = _score(before_at)
+            rows = await redis.zrevrangebyscore(
+                key, before_score, "-inf", start=0, num=limit + 50, withscores=True
+            )
+            rows = [
+                (member, score) for member, score in rows
+                if score < before_score or (score == before_score and member < before_id)
+            ][:limit]
+
+        return [(member, _from_score(score)) for member, score in rows]
+
+
+class PostgresTimelineStore:
+    """Timelines materialized in the home_timelines table."""
+
+    def __init__(self, max_length: int):
+        self.max_length = max_length
+
+    async def push(self, db: AsyncSession, post_id: str, author_id: str, created_at: datetime, user_ids: List[str]):
+        """Add a post to the timelines that are already materialized."""
+        await db.execute(
+            text("""
+            INSERT INTO home_timelines (user_id, post_id, author_id, created_at)
+            SELECT t.follower_id, CAST(:post_id AS uuid), CAST(:author_id AS uuid), CAST(:created_at AS timestamptz)
+            FROM unnest(CAST(:user_ids AS uuid[])) AS t(follower_id)
+            WHERE EXISTS (SELECT 1 FROM home_timeline_builds b WHERE b.user_id = t.follower_id)
+            ON CONFLICT (user_id, post_id) DO NOTHING
+            """),
+            {"post_id": post_id, "author_id": author_id, "created_at": created_at, "user_ids": user_ids}
+        )
+        await db.commit()
+
+    async def replace(self, db: AsyncSession, user_id: str, entries: List[Tuple[str, str, datetime]]):
+        await db.execute(
+            text("DELETE FROM home_timelines WHERE user_id = :user_id"),
+            {"user_id": user_id}
+        )
+        if entries:
+            await db.execute(
+                text("""
+                INSERT INTO home_timelines (user_id, post_id, author_id, created_at)
+                SELECT CAST(:user_id AS uuid), t.post_id, t.author_id, t.created_at
+                FROM unnest(
+                    CAST(:post_ids AS uuid[]),
+                    CAST(:author_ids AS uuid[]),
+                    CAST(:created_ats AS timestamptz[])
+                ) AS t(post_id, author_id, created_at)
+                """),
+                {
+                    "user_id": user_id,
+                    "post_ids": [e[0] for e in entries],
+                    "author_ids": [e[1] for e in entries],
+                    "created_ats": [e[2] for e in entries],
+                }
+            )
+        await db.execute(
+            text("""
+            INSERT INTO home_timeline_builds (user_id) VALUES (:user_id)
+            ON CONFLICT (user_id) DO UPDATE SET built_at = NOW()
+            """),
+            {"user_id": user_id}
+        )
+        await db.commit()
+
+    async def page(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        before: Optional[TimelineEntry],
+        limit: int
+    ) -> Optional[List[TimelineEntry]]:
+        """Read one page; None if the user has no materialized timeline yet."""
+        query = "SELECT post_id, created_at FROM home_timelines WHERE user_id = :user_id"
+        params: Dict[str, Any] = {"user_id": user_id, "limit": limit}
+        if before is not None:
+            query += " AND (created_at, post_id) < (:before_at, CAST(:before_id AS uuid))"
+            params["before_id"], params["before_at"] = before
+        query += " ORDER BY created_at DESC, post_id DESC LIMIT :limit"
+
+        result = await db.execute(text(query), params)
+        rows = result.fetchall()
+        if before is None and not rows:
+            built = await db.execute(
+                text("SELECT 1 FROM home_timeline_builds WHERE user_id = :user_id"),
+                {"user_id": user_id}
+            )
+            if built.first() is None:
+                return None
+        return [(str(row.post_id), row.created_at) for row in rows]
+
+    async def trim(self, db: AsyncSession, older_than: datetime, batch_size: int = 10000) -> int:
+        """Delete timeline entries older than `older_than` in batches."""
+        total = 0
+        while True:
+            result = await db.execute(
+                text("""
+                DELETE FROM home_timelines
+                WHERE ctid IN (
+                    SELECT ctid FROM home_timelines
+                    WHERE created_at < :older_than
+                    LIMIT :batch_size
+                )
+                """),
+                {"older_than": older_than, "batch_size": batch_size}
+            )
+            await db.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                return total
+
+
+timeline_store = PostgresTimelineStore(settings.TIMELINE_MAX_LENGTH)
+
+# Rebuilds queued while Redis is unavailable
+_pending_rebuilds = set()
+
+
+def init_timeline_store():
+    """Select the timeline store once Redis has (or hasn't) connected."""
+    global timeline_store
+
+    if get_redis() is not None:
+        timeline_store = RedisTimelineStore(settings.TIMELINE_MAX_LENGTH)
+        logger.info("Home timelines using Redis sorted sets")
+    else:
+        timeline_store = PostgresTimelineStore(settings.TIMELINE_MAX_LENGTH)
+        logger.info("Home timelines using home_timelines table")
+
+
+# ============== Service ==============
+
+class TimelineService:
+    """Service for fanning out posts and reading home timelines."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.threshold = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+        self.max_length = settings.TIMELINE_MAX_LENGTH
+
+    async def fan_out(self, post_id: str, author_id: str, created_at: datetime) -> int:
+        """Push a new post into the author's and their followers' timelines."""
+        result = await self.db.execute(
+            text("""
+            SELECT f.follower_id
+            FROM follows f
+            JOIN users a ON a.id = f.following_id
+            WHERE f.following_id = :author_id AND a.followers_count <= :threshold
+            """),
+            {"author_id": author_id, "threshold": self.threshold}
+        )
+        user_ids = [str(row.follower_id) for row in result.fetchall()]
+        # Celebrities (over the threshold) only land in their own timeline
+        user_ids.append(str(author_id))
+
+        await timeline_store.push(self.db, str(post_id), str(author_id), created_at, user_ids)
+        return len(user_ids)
+
+    async def rebuild(self, user_id: str) -> int:
+        """Recreate a user's timeline from the recent posts of everyone they follow."""
+        result = await self.db.execute(
+            text(_REBUILD_SOURCE),
+            {"user_id": user_id, "threshold": self.threshold, "max_length": self.max_length}
+        )
+        entries = [(str(row.id), str(row.author_id), row.created_at) for row in result.fetchall()]
+        await timeline_store.replace(self.db, user_id, entries)
+        return len(entries)
+
+    async def get_page(
+        self,
+        user_id: str,
+        before: Optional[TimelineEntry],
+        limit: int
+    ) -> List[TimelineEntry]:
+        """Get one page of (post_id, created_at), newest first, older than `before`."""
+        entries = await timeline_store.page(self.db, user_id, before, limit)
+        if entries is None:
+            await self.rebuild(user_id)
+            entries = await timeline_store.page(self.db, user_id, before, limit) or []
+
+        # Fan-out on read for followed authors above the fan-out threshold
+        query = f"""
+            SELECT p.id, p.created_at
+            FROM follows f
+            JOIN users a ON a.id = f.following_id AND a.followers_count > :threshold
+            CROSS JOIN LATERAL (
+                SELECT p.id, p.created_at
+                FROM posts p
+                WHERE p.author_id = f.following_id AND {_VISIBLE_POST}
+                  {{before}}
+                ORDER BY p.created_at DESC, p.id DESC
+                LIMIT :limit
+            ) p
+            WHERE f.follower_id = :user_id
+        """
+        params: Dict[str, Any] = {"user_id": user_id, "threshold": self.threshold, "limit": limit}
+        if before is not None:
+            query = query.format(before="AND (p.created_at, p.id) < (:before_at, CAST(:before_id AS uuid))")
+            params["before_id"], params["before_at"] = before
+        else:
+            query = query.format(before="")
+
+        result = await self.db.execute(text(query), params)
+        pulled = [(str(row.id), row.created_at) for row in result.fetchall()]
+        if not pulled:
+            return entries
+
+        merged = {post_id: created_at for post_id, created_at in entries + pulled}
+        return sorted(merged.items(), key=lambda e: (e[1], e[0]), reverse=True)[:limit]
+
+
+# ============== Background work ==============
+
+async def fan_out_post(post_id: str, author_id: str, created_at: datetime):
+    """Background task: fan a newly created post out to follower timelines."""
+    try:
+        async with AsyncSessionLocal() as session:
+            delivered = await TimelineService(session).fan_out(post_id, author_id, created_at)
+        logger.debug(f"Post {post_id} fanned out to {delivered} timelines")
+    except Exception as e:
+        logger.error(f"Timeline fan-out failed for post {post_id}: {e}")
+
+
+async def schedule_timeline_rebuild(user_id: str):
+    """Queue a rebuild of a user's timeline (after follow/unfollow)."""
+    redis = get_redis()
+    if redis is not None:
+        await redis.sadd(REBUILD_QUEUE_KEY, user_id)
+    else:
+        _pending_rebuilds.add(user_id)
+
+
+async def rebuild_pending_timelines():
+    """Background job: rebuild every timeline queued since the last run."""
+    redis = get_redis()
+    if redis is not None:
+        user_ids = await redis.spop(REBUILD_QUEUE_KEY, settings.TIMELINE_REBUILD_BATCH_SIZE) or []
+    else:
+        user_ids = [_pending_rebuilds.pop() for _ in range(min(len(_pending_rebuilds), settings.TIMELINE_REBUILD_BATCH_SIZE))]
+
+    if not user_ids:
+        return
+
+    async with AsyncSessionLocal() as session:
+        service = TimelineService(session)
+        for user_id in user_ids:
+            await service.rebuild(user_id)
+    logger.debug(f"Rebuilt {len(user_ids)} home timelines")
+
+
+async def trim_timelines():
+    """Background job: drop materialized timeline entries past retention (Postgres store)."""
+    if not isinstance(timeline_store, PostgresTimelineStore):
+        return
+
+    older_than = datetime.now(timezone.utc) - timedelta(days=settings.TIMELINE_RETENTION_DAYS)
+    async with AsyncSessionLocal() as session:
+        removed = await timeline_store.trim(session, older_than)
+    if removed:
+        logger.info(f"Trimmed {removed} home timeline entries")
@@ -0,0 +1,119 @@
+"""
+Trending tags over sliding windows (1h, 24h, 7d).
+
+Visible posts are counted per tag into 5-minute `tag_buckets` and into a
+running total per window in `trending_tags` by triggers on posts (see
+019_trending_tags.sql), which count them down again when they are deleted,
+unpublished, rejected or retagged. A background job slides the windows forward
+by subtracting the buckets that fell out of each window, so "top N" is an
+index scan over `trending_tags` instead of an aggregate over posts. The top
+list of each window is additionally memoized in-process for a few seconds.
+"""
+
+import time
+from typing import List, Dict, Any, Iterable, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = ("1h", "24h", "7d")
+
+# Memoized top list per window: (expires_at, rows)
+_top_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+
+
+def normalize_tags(tags: Iterable[str]) -> List[str]:
+    """Lowercase, trim and de-duplicate tags, keeping their order."""
+    return list(dict.fromkeys(tag.strip().lower() for tag in tags if tag and tag.strip()))
+
+
+class TrendingTagsService:
+    """Top tags per window from the pre-aggregated running totals."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def top(self, window: str = "24h", limit: int = 10) -> List[Dict[str, Any]]:
+        """The `limit` most used tags of `window` (at most TRENDING_TAGS_MAX)."""
+        cached = _top_cache.get(window)
+        if cached is None or cached[0] <= time.monotonic():
+            result = await self.db.execute(
+                text("""
+                SELECT tag, posts_count
+                FROM trending_tags
+                WHERE window_name = :window AND posts_count > 0
+                ORDER BY posts_count DESC, tag
+                LIMIT :limit
+                """),
+                {"window": window, "limit": settings.TRENDING_TAGS_MAX}
+            )
+            rows = [{"tag": r.tag, "posts_count": r.posts_count} for r in result.fetchall()]
+            cached = (time.monotonic() + settings.TRENDING_TAGS_CACHE_SECONDS, rows)
+            _top_cache[window] = cached
+        return cached[1][:limit]
+
+    async def expire_window(self, window: str) -> int:
+        """Subtract the buckets that slid out of `window`; returns the tags touched."""
+        result = await self.db.execute(
+            text("""
+            SELECT expired_before, tag_bucket(NOW()) - length AS cutoff
+            FROM tag_windows
+            WHERE window_name = :window
+            FOR UPDATE
+            """),
+            {"window": window}
+        )
+        mark = result.first()
+        if mark is None or mark.cutoff <= mark.expired_before:
+            await self.db.commit()
+            return 0
+
+        result = await self.db.execute(
+            text("""
+            WITH expiring AS (
+                SELECT tag, SUM(posts_count) AS posts_count
+                FROM tag_buckets
+                WHERE bucket_start >= :expired_before AND bucket_start < :cutoff
+                GROUP BY tag
+            )
+            UPDATE trending_tags t
+            SET posts_count = GREATEST(t.posts_count - e.posts_count, 0)
+            FROM expiring e
+            WHERE t.window_name = :window AND t.tag = e.tag
+            """),
+            {"window": window, "expired_before": mark.expired_before, "cutoff": mark.cutoff}
+        )
+        touched = result.rowcount
+
+        await self.db.execute(
+            text("DELETE FROM trending_tags WHERE window_name = :window AND posts_count = 0"),
+            {"window": window}
+        )
+        await self.db.execute(
+            text("UPDATE tag_windows SET expired_before = :cutoff WHERE window_name = :window"),
+            {"window": window, "cutoff": mark.cutoff}
+        )
+        await self.db.commit()
+        return touched
+
+
+async def expire_trending_tags():
+    """Background job: slide every trending window forward and drop old buckets."""
+    async with AsyncSessionLocal() as session:
+        service = TrendingTagsService(session)
+        touched = {window: await service.expire_window(window) for window in WINDOWS}
+
+        # Buckets older than the longest window are no longer needed
+        await session.execute(text("""
+            DELETE FROM tag_buckets
+            WHERE bucket_start < (SELECT MIN(expired_before) FROM tag_windows)
+        """))
+        await session.commit()
+
+    if any(touched.values()):
+        logger.debug(f"Trending tag windows advanced: {touched}")
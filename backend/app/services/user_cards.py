@@ -0,0 +1,64 @@
+"""
+User cards (id, username, full name, avatar) for embedding authors in lists.
+
+Cards are looked up in three tiers: an in-process LRU with a short TTL, an
+optional Redis tier (one JSON string per user, see tiered_cache.py) and
+finally Postgres, with all misses of a batch filled by a single
+`id = ANY(:ids)` query. Profile and avatar updates call `invalidate`, which
+clears the local and Redis entries; other processes may serve the old card
+until their local TTL expires.
+"""
+
+from functools import partial
+from typing import Optional, Dict, Any, Iterable, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.services.tiered_cache import TieredCache
+
+
+class UserCardCache:
+    """LRU + TTL cache of user cards with an optional Redis tier."""
+
+    def __init__(self, max_size: int, local_ttl: float, redis_ttl: int):
+        self._cache = TieredCache("user_card", max_size, redis_ttl, local_ttl=local_ttl)
+
+    async def _load(self, db: AsyncSession, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        result = await db.execute(
+            text("""
+            SELECT id, username, full_name, profile_picture_url
+            FROM users
+            WHERE id = ANY(CAST(:ids AS uuid[]))
+            """),
+            {"ids": user_ids}
+        )
+        return {
+            str(u.id): {
+                "id": str(u.id),
+                "username": u.username,
+                "full_name": u.full_name,
+                "avatar_url": u.profile_picture_url,
+            }
+            for u in result.fetchall()
+        }
+
+    async def get(self, db: AsyncSession, user_id: str) -> Optional[Dict[str, Any]]:
+        """Card of one user, or None if the user does not exist."""
+        return (await self.get_many(db, [user_id])).get(str(user_id))
+
+    async def get_many(self, db: AsyncSession, user_ids: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """Cards by user id; unknown users are left out."""
+        ids = dict.fromkeys((str(i) for i in user_ids if i is not None), "")
+        return await self._cache.get_many(ids, partial(self._load, db))
+
+    async def invalidate(self, user_id: Any):
+        """Drop a user's card after a profile change."""
+        await self._cache.invalidate(str(user_id))
+
+
+user_cards = UserCardCache(
+    settings.USER_CARD_CACHE_SIZE,
+    settings.USER_CARD_LOCAL_TTL_SECONDS,
+    settings.USER_CARD_REDIS_TTL_SECONDS,
+)
@@ -0,0 +1,133 @@
+"""
+Buffered post view counting.
+
+Views are counted in memory (or in a Redis hash with HINCRBY when Redis is
+available) and flushed periodically as one batched UPDATE of
+`posts.views_count`, so reading a post never takes the post row lock.
+Repeat views by the same viewer within POST_VIEW_DEDUP_WINDOW_SECONDS are
+ignored; with Redis the window is tracked with one HyperLogLog per post.
+"""
+
+import time
+from collections import defaultdict
+from typing import Dict, Set, Tuple
+from sqlalchemy import text
+import logging
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "post_views:pending"
+
+
+class ViewCounter:
+    """Accumulates post views and flushes the deltas to Postgres."""
+
+    def __init__(self, dedup_window: int):
+        self.dedup_window = dedup_window
+        self._pending: Dict[str, int] = defaultdict(int)
+        # Local dedup: (post_id, viewer_id) pairs seen in the current window
+        self._seen: Set[Tuple[str, str]] = set()
+        self._seen_window = 0
+
+    def _window(self) -> int:
+        return int(time.time() // self.dedup_window)
+
+    async def record(self, post_id: str, viewer_id: str) -> int:
+        """Count a view; returns 1 if it was counted, 0 if deduplicated."""
+        redis = get_redis()
+        if redis is not None:
+            try:
+                return await self._record_redis(redis, post_id, viewer_id)
+            except Exception as e:
+                logger.warning(f"Redis view counter failed, buffering locally: {e}")
+
+        if self.dedup_window:
+            window = self._window()
+            if window != self._seen_window:
+                self._seen.clear()
+                self._seen_window = window
+            if (post_id, viewer_id) in self._seen:
+                return 0
+            self._seen.add((post_id, viewer_id))
+
+        self._pending[post_id] += 1
+        return 1
+
+    async def _record_redis(self, redis, post_id: str, viewer_id: str) -> int:
+        if self.dedup_window:
+            seen_key = f"post_views:seen:{post_id}:{self._window()}"
+            pipe = redis.pipeline(transaction=False)
+            pipe.pfadd(seen_key, viewer_id)
+            pipe.expire(seen_key, self.dedup_window)
+            added, _ = await pipe.execute()
+            if not added:
+                return 0
+
+        await redis.hincrby(PENDING_KEY, post_id, 1)
+        return 1
+
+    async def _take_pending(self) -> Dict[str, int]:
+        """Atomically take everything buffered so far (local and Redis)."""
+        deltas: Dict[str, int] = defaultdict(int)
+
+        local, self._pending = self._pending, defaultdict(int)
+        for post_id, delta in local.items():
+            deltas[post_id] += delta
+
+        redis = get_redis()
+        if redis is not None:
+            pipe = redis.pipeline(transaction=True)
+            pipe.hgetall(PENDING_KEY)
+            pipe.delete(PENDING_KEY)
+            try:
+                buffered, _ = await pipe.execute()
+            except Exception:
+                self._restore(local)
+                raise
+            for post_id, delta in (buffered or {}).items():
+                deltas[post_id] += int(delta)
+
+        return deltas
+
+    def _restore(self, deltas: Dict[str, int]):
+        """Put deltas back after a failed flush so they are retried."""
+        for post_id, delta in deltas.items():
+            self._pending[post_id] += delta
+
+    async def flush(self) -> int:
+        """Apply all buffered views in one UPDATE; returns the number of posts updated."""
+        try:
+            deltas = await self._take_pending()
+        except Exception as e:
+            logger.warning(f"Could not read buffered views from Redis: {e}")
+            return 0
+        if not deltas:
+            return 0
+
+        # Sorted so concurrent flushes from several workers lock rows in the same order
+        post_ids = sorted(deltas)
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    text("""
+                    UPDATE posts p
+                    SET views_count = COALESCE(p.views_count, 0) + d.delta
+                    FROM unnest(CAST(:post_ids AS uuid[]), CAST(:deltas AS integer[])) AS d(id, delta)
+                    WHERE p.id = d.id
+                    """),
+                    {"post_ids": post_ids, "deltas": [deltas[post_id] for post_id in post_ids]}
+                )
+                await session.commit()
+        except Exception:
+            self._restore(deltas)
+            raise
+
+        logger.debug(f"Flushed {sum(deltas.values())} views for {len(deltas)} posts")
+        return result.rowcount
+
+
+view_counter = ViewCounter(settings.POST_VIEW_DEDUP_WINDOW_SECONDS)
@@ -0,0 +1,124 @@
+"""
+Viewer state (liked / bookmarked) for pages of posts and comments.
+
+List endpoints fetch their rows first and then resolve the viewer's state for
+the whole page with one `target_id = ANY(:ids)` query per table. Results are
+cached per user in Redis hashes (field = target id, value "1"/"0", so misses
+are cached too) and kept current with write-through from the toggle endpoints.
+Read fills only add missing fields (HSETNX), so a fill computed before a toggle
+committed cannot overwrite the toggle's write-through.
+"""
+
+from typing import Iterable, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import logging
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+REACTIONS = "reactions"
+BOOKMARKS = "bookmarks"
+
+_LOOKUPS = {
+    REACTIONS: """
+        SELECT target_id FROM reactions
+        WHERE user_id = :user_id AND target_type = :target_type
+          AND target_id = ANY(CAST(:ids AS uuid[]))
+    """,
+    BOOKMARKS: """
+        SELECT target_id FROM bookmarks
+        WHERE user_id = :user_id AND target_type = :target_type
+          AND target_id = ANY(CAST(:ids AS uuid[]))
+    """,
+}
+
+
+def _key(user_id: str, table: str, target_type: str) -> str:
+    return f"viewer:{user_id}:{table}:{target_type}"
+
+
+class ViewerStateService:
+    """Resolves which items of a page the viewer has liked or bookmarked."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def liked(self, user_id: str, target_type: str, ids: Iterable[str]) -> Set[str]:
+        """Ids among `ids` the user has reacted to."""
+        return await self._resolve(user_id, REACTIONS, target_type, ids)
+
+    async def bookmarked(self, user_id: str, target_type: str, ids: Iterable[str]) -> Set[str]:
+        """Ids among `ids` the user has bookmarked."""
+        return await self._resolve(user_id, BOOKMARKS, target_type, ids)
+
+    async def for_posts(self, user_id: str, post_ids: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+        """(liked, bookmarked) post ids for a page of posts."""
+        post_ids = list(post_ids)
+        return (
+            await self.liked(user_id, "post", post_ids),
+            await self.bookmarked(user_id, "post", post_ids),
+        )
+
+    async def _resolve(self, user_id: str, table: str, target_type: str, ids: Iterable[str]) -> Set[str]:
+        ids = list(dict.fromkeys(str(i) for i in ids))
+        if not ids:
+            return set()
+
+        found: Set[str] = set()
+        missing = ids
+        redis = get_redis()
+        key = _key(user_id, table, target_type)
+
+        if redis is not None:
+            try:
+                cached = await redis.hmget(key, ids)
+                missing = [i for i, value in zip(ids, cached) if value is None]
+                found = {i for i, value in zip(ids, cached) if value == "1"}
+            except Exception as e:
+                logger.warning(f"Redis read failed for viewer state: {e}")
+                missing = ids
+
+        if not missing:
+            return found
+
+        result = await self.db.execute(
+            text(_LOOKUPS[table]),
+            {"user_id": user_id, "target_type": target_type, "ids": missing}
+        )
+        hits = {str(row.target_id) for row in result.fetchall()}
+        found |= hits
+
+        if redis is not None:
+            try:
+                pipe = redis.pipeline(transaction=False)
+                for i in missing:
+                    pipe.hsetnx(key, i, "1" if i in hits else "0")
+                pipe.expire(key, settings.VIEWER_STATE_TTL_SECONDS)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Redis write failed for viewer state: {e}")
+
+        return found
+
+
+async def record_viewer_state(user_id: str, table: str, target_type: str, target_id: str, value: bool):
+    """Write-through for a committed reaction/bookmark toggle."""
+    redis = get_redis()
+    if redis is None:
+        return
+    key = _key(user_id, table, target_type)
+    try:
+        pipe = redis.pipeline(transaction=False)
+        pipe.hset(key, str(target_id), "1" if value else "0")
+        pipe.expire(key, settings.VIEWER_STATE_TTL_SECONDS)
+        await pipe.execute()
+    except Exception as e:
+        # Drop the cached hash rather than leave a stale flag behind
+        logger.warning(f"Redis write-through failed for viewer state: {e}")
+        try:
+            await redis.delete(key)
+        except Exception:
+            pass
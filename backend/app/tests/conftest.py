@@ -0,0 +1,153 @@
+"""
+Shared test fixtures.
+
+Database tests run against a PostgreSQL database with supabase/migrations
+applied, given by TEST_DATABASE_URL (postgresql+asyncpg://...), and are skipped
+when it is not set. Each test runs inside one outer transaction that is rolled
+back afterwards; sessions handed to the code under test commit to savepoints,
+so set-up data is committed through `db` before other sessions are opened.
+"""
+
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+@pytest_asyncio.fixture
+async def db_connection():
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            yield conn
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_factory(db_connection):
+    """Stand-in for AsyncSessionLocal bound to the test transaction."""
+    return sessionmaker(
+        bind=db_connection,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+        join_transaction_mode="create_savepoint",
+    )
+
+
+@pytest.fixture
+def savepoint_engine(db_connection):
+    """Stand-in for the module-level engine, for code that opens its own connections."""
+
+    class SavepointEngine:
+        @asynccontextmanager
+        async def begin(self):
+            async with db_connection.begin_nested():
+                yield db_connection
+
+        @asynccontextmanager
+        async def connect(self):
+            yield db_connection
+
+    return SavepointEngine()
+
+
+@pytest_asyncio.fixture
+async def db(session_factory):
+    async with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+def make_user(db):
+    """Insert a user and return its id as a string."""
+
+    async def _make_user(experience_points: int = 0, **columns: Any) -> str:
+        user_id = str(uuid4())
+        values: Dict[str, Any] = {
+            "id": user_id,
+            "email": f"{user_id}@example.com",
+            "username": f"user_{user_id[:12]}",
+            "hashed_password": "x",
+            "full_name": f"User {user_id[:8]}",
+            "experience_points": experience_points,
+            **columns,
+        }
+        await db.execute(
+            text(
+                f"INSERT INTO users ({', '.join(values)}) "
+                f"VALUES ({', '.join(':' + column for column in values)})"
+            ),
+            values
+        )
+        return user_id
+
+    return _make_user
+
+
+@pytest.fixture
+def make_post(db):
+    """Insert a published post and return its id as a string."""
+
+    async def _make_post(author_id: str, **columns: Any) -> str:
+        values: Dict[str, Any] = {"author_id": author_id, "content": "Hello world", **columns}
+        result = await db.execute(
+            text(
+                f"INSERT INTO posts ({', '.join(values)}) "
+                f"VALUES ({', '.join(':' + column for column in values)}) RETURNING id"
+            ),
+            values
+        )
+        return str(result.scalar())
+
+    return _make_post
+
+
+@pytest.fixture
+def make_enrollment(db):
+    """Enroll a user in a new published path; returns (path_id, module_ids)."""
+
+    async def _make_enrollment(user_id: str, modules: int = 4, xp_reward: int = 30):
+        path_id = str(uuid4())
+        await db.execute(
+            text("""
+            INSERT INTO learning_paths (id, title, slug, is_published)
+            VALUES (:id, 'SQL Basics', :slug, true)
+            """),
+            {"id": path_id, "slug": f"sql-basics-{path_id}"}
+        )
+        result = await db.execute(
+            text("""
+            INSERT INTO learning_modules (path_id, title, order_index, xp_reward)
+            SELECT :path_id, 'Module ' || i, i, :xp_reward
+            FROM generate_series(1, :modules) AS i
+            RETURNING id
+            """),
+            {"path_id": path_id, "modules": modules, "xp_reward": xp_reward}
+        )
+        module_ids = [str(row.id) for row in result.fetchall()]
+        await db.execute(
+            text("INSERT INTO enrollments (user_id, path_id) VALUES (:user_id, :path_id)"),
+            {"user_id": user_id, "path_id": path_id}
+        )
+        return path_id, module_ids
+
+    return _make_enrollment
+
+
+async def scalar(db: AsyncSession, query: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    return (await db.execute(text(query), params or {})).scalar()
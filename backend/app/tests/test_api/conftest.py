@@ -0,0 +1,26 @@
+"""Fixtures for endpoint tests: one router mounted on a bare app."""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.database import get_db
+from app.core.security import get_current_user
+
+
+@pytest.fixture
+def make_client(db):
+    """Build a client for `router` that runs as `user_id` on the test session."""
+
+    def _make_client(router, user_id: str) -> httpx.AsyncClient:
+        app = FastAPI()
+        app.include_router(router)
+
+        async def override_get_db():
+            yield db
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user] = lambda: {"user_id": user_id, "role": "user"}
+        return httpx.AsyncClient(app=app, base_url="http://test")
+
+    return _make_client
@@ -0,0 +1,107 @@
+"""ETag / If-None-Match tests for the badge and quest catalogs."""
+
+import pytest
+from sqlalchemy import text
+
+from app.api.v1.endpoints import gamification
+from app.services.badges import badge_catalog
+from app.services.catalog import quest_catalog
+from app.tests.conftest import requires_db
+
+pytestmark = requires_db
+
+
+@pytest.fixture(autouse=True)
+def empty_catalog_caches(monkeypatch):
+    # Catalog versions roll back with each test, so never reuse a snapshot
+    for catalog in (badge_catalog, quest_catalog):
+        monkeypatch.setattr(catalog, "_snapshot", None)
+        monkeypatch.setattr(catalog, "_checked_at", None)
+    monkeypatch.setattr(badge_catalog, "_by_requirement", {})
+
+
+@pytest.fixture
+def client(db, make_user, make_client):
+    async def _client():
+        user_id = await make_user()
+        await db.commit()
+        return user_id, make_client(gamification.router, user_id)
+
+    return _client
+
+
+@pytest.mark.asyncio
+async def test_unchanged_badges_return_304(client):
+    _, http = await client()
+    async with http:
+        first = await http.get("/badges")
+        etag = first.headers["ETag"]
+        again = await http.get("/badges", headers={"If-None-Match": etag})
+        weak = await http.get("/badges", headers={"If-None-Match": f'"other", W/{etag}'})
+
+    assert first.status_code == 200 and first.json()
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+    assert weak.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_badge_progress_changes_the_etag(db, client):
+    user_id, http = await client()
+    async with http:
+        etag = (await http.get("/badges")).headers["ETag"]
+        await db.execute(
+            text("""
+            INSERT INTO user_badges (user_id, badge_id, progress)
+            SELECT :user_id, id, 1 FROM badges WHERE slug = 'quick-learner'
+            """),
+            {"user_id": user_id}
+        )
+        await db.commit()
+        response = await http.get("/badges", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [b["progress"] for b in response.json() if b["slug"] == "quick-learner"] == [1]
+
+
+@pytest.mark.asyncio
+async def test_badge_catalog_change_changes_the_etag(db, client):
+    _, http = await client()
+    async with http:
+        etag = (await http.get("/badges")).headers["ETag"]
+        await db.execute(
+            text("""
+            INSERT INTO badges (name, slug, icon, tier, category, requirement_type, requirement_value)
+            VALUES ('Night Owl', 'night-owl', 'moon', 'bronze', 'learning', 'modules_completed', 3)
+            """)
+        )
+        await db.commit()
+        badge_catalog.invalidate()
+        response = await http.get("/badges", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert "night-owl" in {b["slug"] for b in response.json()}
+
+
+@pytest.mark.asyncio
+async def test_unchanged_quests_return_304(db, client):
+    await db.execute(
+        text("""
+        INSERT INTO quests (title, quest_type, requirement_type, requirement_value, xp_reward)
+        VALUES ('Finish a module', 'daily', 'modules_completed', 1, 20)
+        """)
+    )
+    _, http = await client()
+    async with http:
+        first = await http.get("/quests")
+        again = await http.get("/quests", headers={"If-None-Match": first.headers["ETag"]})
+        other_filter = await http.get(
+            "/quests", params={"quest_type": "weekly"}, headers={"If-None-Match": first.headers["ETag"]}
+        )
+
+    assert first.status_code == 200 and first.json()
+    assert again.status_code == 304
+    assert other_filter.status_code == 200
@@ -0,0 +1,70 @@
+"""Community feed paging tests."""
+
+import pytest
+from sqlalchemy import text
+
+from app.api.v1.endpoints import community
+from app.tests.conftest import requires_db
+from app.utils.helpers import encode_cursor
+
+pytestmark = requires_db
+
+
+@pytest.fixture
+def posts(db, make_user, make_post):
+    """Five posts (one pinned) and a reader."""
+
+    async def _posts():
+        author = await make_user()
+        post_ids = [await make_post(author, title=f"Post {i}") for i in range(5)]
+        await db.execute(text("UPDATE posts SET is_pinned = true WHERE id = :id"), {"id": post_ids[2]})
+        reader = await make_user()
+        await db.commit()
+        return reader, post_ids
+
+    return _posts
+
+
+async def read_all(client, params):
+    seen, cursor = [], None
+    while True:
+        response = await client.get("/feed", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen += [post["id"] for post in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort", ["recent", "hot"])
+async def test_cursor_pages_cover_the_feed_once(posts, make_client, sort):
+    reader, post_ids = await posts()
+
+    async with make_client(community.router, reader) as client:
+        whole = await client.get("/feed", params={"limit": 50, "sort": sort})
+        paged = await read_all(client, {"limit": 2, "sort": sort})
+
+    assert paged == [post["id"] for post in whole.json()]
+    assert sorted(paged) == sorted(post_ids)
+    if sort == "recent":
+        assert paged[0] == post_ids[2]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort, cursor", [
+    ("recent", "not-a-cursor"),
+    ("recent", encode_cursor(False, "yesterday", "00000000-0000-0000-0000-000000000000")),
+    ("recent", encode_cursor(False, "2024-05-01T12:00:00+00:00", "not-a-uuid")),
+    ("recent", encode_cursor(1.5, "00000000-0000-0000-0000-000000000000")),
+    ("hot", encode_cursor("high", "00000000-0000-0000-0000-000000000000")),
+    ("hot", encode_cursor(False, "2024-05-01T12:00:00+00:00", "00000000-0000-0000-0000-000000000000")),
+])
+async def test_tampered_cursor_returns_400(posts, make_client, sort, cursor):
+    reader, _ = await posts()
+
+    async with make_client(community.router, reader) as client:
+        response = await client.get("/feed", params={"sort": sort, "cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,57 @@
+"""Leaderboard endpoint tests."""
+
+import pytest
+
+from app.api.v1.endpoints import gamification
+from app.services.leaderboard import LeaderboardService
+from app.tests.conftest import requires_db
+
+pytestmark = requires_db
+
+
+@pytest.fixture
+def ranked_users(db, make_user):
+    """Ten users ranked 1..10 on the all-time board."""
+
+    async def _ranked_users():
+        user_ids = [await make_user(experience_points=1000 - 100 * i) for i in range(10)]
+        await LeaderboardService(db).refresh("all_time")
+        await db.commit()
+        return user_ids
+
+    return _ranked_users
+
+
+@pytest.mark.asyncio
+async def test_around_me_adds_own_row_and_neighbours(ranked_users, make_client):
+    user_ids = await ranked_users()
+
+    async with make_client(gamification.router, user_ids[7]) as client:
+        response = await client.get("/leaderboard", params={"limit": 3, "around_me": 1})
+
+    assert response.status_code == 200
+    entries = response.json()
+    assert [e["rank"] for e in entries] == [1, 2, 3, 7, 8, 9]
+    assert [e["user_id"] for e in entries] == [user_ids[i] for i in (0, 1, 2, 6, 7, 8)]
+    assert [e["rank"] for e in entries if e["is_current_user"]] == [8]
+
+
+@pytest.mark.asyncio
+async def test_around_me_does_not_repeat_top_ranks(ranked_users, make_client):
+    user_ids = await ranked_users()
+
+    async with make_client(gamification.router, user_ids[3]) as client:
+        response = await client.get("/leaderboard", params={"limit": 3, "around_me": 2})
+
+    # Neighbours 2 and 3 are already in the top 3
+    assert [e["rank"] for e in response.json()] == [1, 2, 3, 4, 5, 6]
+
+
+@pytest.mark.asyncio
+async def test_around_me_is_a_no_op_inside_the_top(ranked_users, make_client):
+    user_ids = await ranked_users()
+
+    async with make_client(gamification.router, user_ids[1]) as client:
+        response = await client.get("/leaderboard", params={"limit": 3, "around_me": 5})
+
+    assert [e["rank"] for e in response.json()] == [1, 2, 3]
@@ -0,0 +1,152 @@
+"""Learning endpoint tests."""
+
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.api.v1.endpoints import learning
+from app.services import gamification_events
+from app.services.gamification_events import GamificationWorker
+from app.tests.conftest import requires_db, scalar
+
+pytestmark = requires_db
+
+
+@pytest.fixture
+def worker(monkeypatch, session_factory):
+    monkeypatch.setattr(gamification_events, "AsyncSessionLocal", session_factory)
+    return GamificationWorker(batch_size=100)
+
+
+async def enrollment_of(db, user_id: str, path_id: str):
+    result = await db.execute(
+        text("""
+        SELECT completed_modules_count, CAST(progress_percentage AS float)
+        FROM enrollments WHERE user_id = :user_id AND path_id = :path_id
+        """),
+        {"user_id": user_id, "path_id": path_id}
+    )
+    return tuple(result.first())
+
+
+@pytest.mark.asyncio
+async def test_completing_a_module_twice_counts_once(db, make_user, make_enrollment, make_client, worker):
+    user_id = await make_user()
+    path_id, module_ids = await make_enrollment(user_id, modules=4, xp_reward=30)
+    await db.commit()
+
+    async with make_client(learning.router, user_id) as client:
+        url = f"/paths/{path_id}/modules/{module_ids[0]}/complete"
+        first = await client.post(url)
+        second = await client.post(url)
+
+    assert first.status_code == 200
+    assert first.json()["xp_earned"] == 30
+    assert first.json()["progress_percentage"] == 25
+    assert second.status_code == 200
+    assert second.json()["message"] == "Module already completed"
+    assert second.json()["xp_earned"] == 0
+    assert second.json()["progress_percentage"] == 25
+    assert await enrollment_of(db, user_id, path_id) == (1, 25)
+
+    # Only the first completion staged XP
+    assert await scalar(db, "SELECT COUNT(*) FROM gamification_outbox") == 1
+    await worker.drain_outbox()
+    module_xp = await db.execute(
+        text("SELECT amount FROM xp_transactions WHERE user_id = :id AND source_type = 'module'"),
+        {"id": user_id}
+    )
+    assert [row.amount for row in module_xp] == [30]
+
+
+@pytest.mark.asyncio
+async def test_progress_follows_completions_and_path_size(db, make_user, make_enrollment, make_client):
+    user_id = await make_user()
+    path_id, module_ids = await make_enrollment(user_id, modules=3)
+    await db.commit()
+
+    async with make_client(learning.router, user_id) as client:
+        for module_id in module_ids[:2]:
+            response = await client.post(f"/paths/{path_id}/modules/{module_id}/complete")
+
+    assert response.json()["progress_percentage"] == 66.67
+    assert await enrollment_of(db, user_id, path_id) == (2, pytest.approx(66.67))
+
+    # A new module re-derives the percentage of existing enrollments
+    await db.execute(
+        text("INSERT INTO learning_modules (path_id, title, order_index) VALUES (:path_id, 'Extra', 4)"),
+        {"path_id": path_id}
+    )
+    assert await enrollment_of(db, user_id, path_id) == (2, 50)
+
+
+@pytest.mark.asyncio
+async def test_sync_reports_a_result_per_event(db, make_user, make_enrollment, make_client):
+    user_id, other_id = await make_user(), await make_user()
+    path_id, module_ids = await make_enrollment(user_id, modules=3, xp_reward=30)
+    _, other_modules = await make_enrollment(other_id)
+    await db.commit()
+
+    events = [
+        {"event_id": "e1", "module_id": module_ids[0], "progress_percentage": 40},
+        {"event_id": "e2", "module_id": module_ids[1], "completed": True, "occurred_at": "2024-05-01T12:00:00+02:00"},
+        {"event_id": "e1", "module_id": module_ids[0], "progress_percentage": 40},
+        {"event_id": "e3", "module_id": str(uuid4()), "completed": True},
+        {"event_id": "e4", "module_id": other_modules[0], "completed": True},
+        {"event_id": "e5", "module_id": module_ids[2], "completed": True, "occurred_at": "2024-05-01T12:00:00"},
+        {"event_id": "e6", "module_id": module_ids[2], "completed": True},
+    ]
+    async with make_client(learning.router, user_id) as client:
+        response = await client.post("/progress/sync", json={"events": events})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["event_id"], r["status"], r["xp_earned"]) for r in results] == [
+        ("e1", "applied", 0),
+        ("e2", "applied", 30),
+        ("e1", "duplicate", 0),
+        ("e3", "rejected", 0),
+        ("e4", "rejected", 0),
+        ("e5", "applied", 30),
+        ("e6", "already_completed", 0),
+    ]
+    assert results[3]["error"] == "Module not found"
+    assert results[4]["error"] == "Not enrolled in this path"
+    assert response.json()["paths"] == [{"path_id": path_id, "progress_percentage": 66.67}]
+    assert await enrollment_of(db, user_id, path_id) == (2, 66.67)
+
+    # Client times are stored in UTC; naive ones are taken as UTC
+    completed_at = await db.execute(
+        text("""
+        SELECT module_id, completed_at FROM module_progress
+        WHERE user_id = :user_id AND status = 'completed'
+        """),
+        {"user_id": user_id}
+    )
+    assert dict((str(row.module_id), row.completed_at) for row in completed_at) == {
+        module_ids[1]: datetime(2024, 5, 1, 10, tzinfo=timezone.utc),
+        module_ids[2]: datetime(2024, 5, 1, 12, tzinfo=timezone.utc),
+    }
+
+
+@pytest.mark.asyncio
+async def test_replayed_sync_batch_is_reported_as_duplicates(db, make_user, make_enrollment, make_client):
+    user_id = await make_user()
+    path_id, module_ids = await make_enrollment(user_id, modules=4, xp_reward=30)
+    await db.commit()
+
+    events = [
+        {"event_id": "a", "module_id": module_ids[0], "completed": True},
+        {"event_id": "b", "module_id": module_ids[1], "progress_percentage": 50},
+    ]
+    async with make_client(learning.router, user_id) as client:
+        first = await client.post("/progress/sync", json={"events": events})
+        replay = await client.post("/progress/sync", json={"events": events})
+
+    assert [r["status"] for r in first.json()["results"]] == ["applied", "applied"]
+    assert [(r["status"], r["xp_earned"]) for r in replay.json()["results"]] == [("duplicate", 0), ("duplicate", 0)]
+    assert replay.json()["paths"] == []
+    assert await enrollment_of(db, user_id, path_id) == (1, 25)
+    assert await scalar(db, "SELECT COUNT(*) FROM gamification_outbox") == 1
@@ -0,0 +1,60 @@
+"""Counter reconciliation tests."""
+
+import pytest
+from sqlalchemy import text
+
+from app.services.counters import COUNTERS, CounterReconciler
+from app.tests.conftest import requires_db, scalar
+
+pytestmark = requires_db
+
+POST_LIKES = next(spec for spec in COUNTERS if spec.name == "posts.likes_count")
+
+
+@pytest.mark.asyncio
+async def test_drift_is_fixed_across_chunks(db, make_user, make_post):
+    author = await make_user()
+    likers = [await make_user() for _ in range(2)]
+    posts = [await make_post(author) for _ in range(3)]
+    for liker in likers:
+        await db.execute(
+            text("INSERT INTO reactions (user_id, target_type, target_id) VALUES (:user_id, 'post', :post_id)"),
+            {"user_id": liker, "post_id": posts[0]}
+        )
+    await db.execute(
+        text("INSERT INTO reactions (user_id, target_type, target_id) VALUES (:user_id, 'post', :post_id)"),
+        {"user_id": likers[0], "post_id": posts[1]}
+    )
+    # Drift: 2 -> 10, 1 -> 0, 0 -> 5
+    await db.execute(
+        text("""
+        UPDATE posts SET likes_count = d.recorded
+        FROM unnest(CAST(:ids AS uuid[]), CAST(:recorded AS integer[])) AS d(id, recorded)
+        WHERE posts.id = d.id
+        """),
+        {"ids": posts, "recorded": [10, 0, 5]}
+    )
+    await db.commit()
+
+    stats = await CounterReconciler(db, chunk_size=1).reconcile(POST_LIKES)
+
+    likes = dict((await db.execute(text("SELECT id::text, likes_count FROM posts"))).fetchall())
+    assert [likes[post_id] for post_id in posts] == [2, 1, 0]
+    assert stats.rows_checked == await scalar(db, "SELECT COUNT(*) FROM posts")
+    assert (stats.rows_fixed, stats.total_drift, stats.max_drift) == (3, 14, 8)
+    assert await scalar(
+        db, "SELECT total_drift FROM counter_drift_log WHERE counter = 'posts.likes_count'"
+    ) == 14
+
+
+@pytest.mark.asyncio
+async def test_counters_without_drift_are_left_alone(db, make_user, make_post):
+    author = await make_user()
+    for _ in range(3):
+        await make_post(author)
+    await db.commit()
+
+    stats = await CounterReconciler(db, chunk_size=2).reconcile(POST_LIKES)
+
+    assert stats.rows_checked == await scalar(db, "SELECT COUNT(*) FROM posts")
+    assert stats.rows_fixed == 0
@@ -0,0 +1,142 @@
+"""Gamification event worker tests (in-process queue backend)."""
+
+import re
+
+import pytest
+from sqlalchemy import event, text
+
+from app.services import gamification_events
+from app.services.gamification import GamificationService
+from app.services.gamification_events import (
+    GamificationEvent,
+    GamificationWorker,
+    LocalEventQueue,
+    QUEST_CLAIMED,
+    stage_events,
+)
+from app.tests.conftest import requires_db, scalar
+
+pytestmark = requires_db
+
+USERS_UPDATE = re.compile(r"\bUPDATE users\b")
+
+
+@pytest.fixture
+def worker(monkeypatch, session_factory):
+    monkeypatch.setattr(gamification_events, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(gamification_events, "event_queue", LocalEventQueue())
+    return GamificationWorker(batch_size=100)
+
+
+@pytest.fixture
+def statements(db_connection):
+    """SQL statements executed during the test."""
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(db_connection.sync_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(db_connection.sync_engine, "before_cursor_execute", record)
+
+
+async def failing_award_xp_many(self, awards, commit=True):
+    raise RuntimeError("database went away")
+
+
+def quest_claimed(user_id: str, xp: int) -> GamificationEvent:
+    return GamificationEvent(event_type=QUEST_CLAIMED, user_id=user_id, xp=xp, source_type="quest")
+
+
+async def xp_of(db, user_id: str) -> int:
+    return await scalar(db, "SELECT experience_points FROM users WHERE id = :id", {"id": user_id})
+
+
+@pytest.mark.asyncio
+async def test_xp_is_coalesced_into_one_update_per_flush(db, make_user, worker, statements):
+    alice, bob = await make_user(), await make_user()
+    await db.commit()
+
+    for user_id, xp in ((alice, 10), (alice, 20), (bob, 5), (alice, 30)):
+        await gamification_events.publish_event(quest_claimed(user_id, xp))
+    statements.clear()
+    await worker.drain()
+
+    assert len([s for s in statements if USERS_UPDATE.search(s)]) == 1
+    assert await xp_of(db, alice) == 60
+    assert await xp_of(db, bob) == 5
+
+    ledger = await db.execute(
+        text("SELECT amount, balance_after FROM xp_transactions WHERE user_id = :id ORDER BY balance_after"),
+        {"id": alice}
+    )
+    assert [tuple(row) for row in ledger.fetchall()] == [(10, 10), (20, 30), (30, 60)]
+
+
+@pytest.mark.asyncio
+async def test_redelivered_event_is_a_no_op(db, make_user, worker):
+    user_id = await make_user()
+    await db.commit()
+    claimed = quest_claimed(user_id, 25)
+
+    # Delivered twice in one batch, then again in a later flush
+    await gamification_events.publish_event(claimed)
+    await gamification_events.publish_event(claimed)
+    await worker.drain()
+    await gamification_events.publish_event(claimed)
+    await worker.drain()
+
+    assert await xp_of(db, user_id) == 25
+    assert await scalar(db, "SELECT COUNT(*) FROM xp_transactions WHERE user_id = :id", {"id": user_id}) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_put_back_and_applied_once(db, make_user, worker, monkeypatch):
+    user_id = await make_user()
+    await db.commit()
+    await gamification_events.publish_event(quest_claimed(user_id, 40))
+
+    with monkeypatch.context() as patch:
+        patch.setattr(GamificationService, "award_xp_many", failing_award_xp_many)
+        with pytest.raises(RuntimeError):
+            await worker.drain()
+    assert await xp_of(db, user_id) == 0
+    assert await scalar(db, "SELECT COUNT(*) FROM gamification_processed_events") == 0
+
+    await worker.drain()
+    assert await xp_of(db, user_id) == 40
+
+
+@pytest.mark.asyncio
+async def test_outbox_row_is_discarded_with_its_transaction(db, make_user, worker):
+    user_id = await make_user()
+    await db.commit()
+
+    await stage_events(db, [quest_claimed(user_id, 15)])
+    await db.rollback()
+    await worker.drain()
+
+    assert await scalar(db, "SELECT COUNT(*) FROM gamification_outbox") == 0
+    assert await xp_of(db, user_id) == 0
+
+
+@pytest.mark.asyncio
+async def test_outbox_row_and_xp_commit_together(db, make_user, worker, monkeypatch):
+    user_id = await make_user()
+    await db.commit()
+    await stage_events(db, [quest_claimed(user_id, 15)])
+    await db.commit()
+
+    # A failed apply rolls back the outbox delete along with the XP
+    with monkeypatch.context() as patch:
+        patch.setattr(GamificationService, "award_xp_many", failing_award_xp_many)
+        with pytest.raises(RuntimeError):
+            await worker.drain()
+    assert await scalar(db, "SELECT COUNT(*) FROM gamification_outbox") == 1
+    assert await scalar(db, "SELECT COUNT(*) FROM gamification_processed_events") == 0
+    assert await xp_of(db, user_id) == 0
+
+    await worker.drain()
+    assert await scalar(db, "SELECT COUNT(*) FROM gamification_outbox") == 0
+    assert await xp_of(db, user_id) == 15
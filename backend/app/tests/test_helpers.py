@@ -0,0 +1,37 @@
+"""app.utils.helpers tests."""
+
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.utils.helpers import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    post_id = uuid4()
+
+    token = encode_cursor(True, created_at, post_id)
+    pinned, created, decoded_id = decode_cursor(token, 3)
+
+    assert "=" not in token
+    assert pinned is True
+    assert datetime.fromisoformat(created) == created_at
+    assert decoded_id == str(post_id)
+
+
+def test_cursor_round_trip_of_floats_and_strings():
+    assert decode_cursor(encode_cursor(1.25, "a/b+c"), 2) == [1.25, "a/b+c"]
+
+
+@pytest.mark.parametrize("token", [
+    "not base64 at all!",
+    encode_cursor(1, 2)[:-3],
+    encode_cursor(1, 2),
+    encode_cursor(1, 2, 3, 4),
+    "eyJhIjogMX0",  # {"a": 1}
+])
+def test_tampered_cursor_is_rejected(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token, 3)
@@ -0,0 +1,52 @@
+"""Hot score re-scoring tests."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.services.hot_scores import HotScoreService
+from app.tests.conftest import requires_db, scalar
+
+pytestmark = requires_db
+
+
+@pytest.mark.asyncio
+async def test_rescore_since_covers_every_batch(db, make_user, make_post):
+    author = await make_user()
+    posts = [await make_post(author) for _ in range(3)]
+    # Engagement changed after the posts were scored on insert
+    await db.execute(
+        text("UPDATE posts SET likes_count = 50 WHERE id = ANY(CAST(:ids AS uuid[]))"),
+        {"ids": posts}
+    )
+    await db.commit()
+
+    since = datetime.now(timezone.utc) - timedelta(hours=1)
+    rescored = await HotScoreService(db, batch_size=1).rescore_since(since)
+
+    assert rescored == 3
+    assert await scalar(
+        db,
+        """
+        SELECT COUNT(*) FROM posts
+        WHERE id = ANY(CAST(:ids AS uuid[]))
+          AND hot_score = post_hot_score(likes_count, comments_count, views_count, created_at)
+        """,
+        {"ids": posts}
+    ) == 3
+
+    # Nothing moved since, so a second pass writes nothing
+    assert await HotScoreService(db, batch_size=1).rescore_since(since) == 0
+
+
+@pytest.mark.asyncio
+async def test_rescore_since_skips_posts_updated_before(db, make_user, make_post):
+    author = await make_user()
+    post_id = await make_post(author)
+    await db.execute(text("UPDATE posts SET likes_count = 50 WHERE id = :id"), {"id": post_id})
+    await db.commit()
+
+    since = datetime.now(timezone.utc) + timedelta(hours=1)
+
+    assert await HotScoreService(db, batch_size=1).rescore_since(since) == 0
@@ -0,0 +1,46 @@
+"""scripts/recalculate_levels.py tests."""
+
+import pytest
+
+from scripts import recalculate_levels
+from app.tests.conftest import requires_db, scalar
+
+pytestmark = requires_db
+
+# XP and the level the default curve puts it at
+XP_LEVELS = [(0, 1), (100, 2), (350, 3), (1000, 5), (5200, 10)]
+
+
+@pytest.fixture
+def stale_users(db, make_user, monkeypatch, savepoint_engine):
+    monkeypatch.setattr(recalculate_levels, "engine", savepoint_engine)
+
+    async def _stale_users():
+        user_ids = [await make_user(experience_points=xp, current_level=7) for xp, _ in XP_LEVELS]
+        await db.commit()
+        return user_ids
+
+    return _stale_users
+
+
+async def level_of(db, user_id: str) -> int:
+    return await scalar(db, "SELECT current_level FROM users WHERE id = :id", {"id": user_id})
+
+
+@pytest.mark.asyncio
+async def test_levels_are_fixed_across_batches(db, stale_users):
+    user_ids = await stale_users()
+
+    await recalculate_levels.recalculate_levels(batch_size=2)
+
+    assert [await level_of(db, user_id) for user_id in user_ids] == [level for _, level in XP_LEVELS]
+
+
+@pytest.mark.asyncio
+async def test_dry_run_writes_nothing(db, stale_users, capsys):
+    user_ids = await stale_users()
+
+    await recalculate_levels.recalculate_levels(batch_size=1, dry_run=True)
+
+    assert [await level_of(db, user_id) for user_id in user_ids] == [7] * len(user_ids)
+    assert "5 users, 5 levels to change" in capsys.readouterr().out
@@ -0,0 +1,43 @@
+"""Search index maintenance tests."""
+
+import pytest
+from sqlalchemy import text
+
+from app.services.search import SEARCH_SOURCES, SearchService
+from app.tests.conftest import requires_db, scalar
+
+pytestmark = requires_db
+
+
+@pytest.mark.asyncio
+async def test_reindex_repairs_stale_vectors_across_chunks(db, make_user, make_post):
+    author = await make_user()
+    posts = [await make_post(author, title=f"Post {i}", content="Learning SQL window functions") for i in range(3)]
+    await db.execute(
+        text("UPDATE posts SET search_vector = NULL WHERE id = ANY(CAST(:ids AS uuid[]))"),
+        {"ids": posts[:2]}
+    )
+    await db.commit()
+
+    checked, updated = await SearchService(db).reindex(SEARCH_SOURCES["post"], chunk_size=1)
+
+    assert checked == await scalar(db, "SELECT COUNT(*) FROM posts")
+    assert updated == 2
+    assert await scalar(
+        db,
+        "SELECT COUNT(*) FROM posts WHERE id = ANY(CAST(:ids AS uuid[])) AND search_vector @@ to_tsquery('english', 'window')",
+        {"ids": posts}
+    ) == 3
+
+
+@pytest.mark.asyncio
+async def test_reindex_of_a_current_index_writes_nothing(db, make_user, make_post):
+    author = await make_user()
+    for _ in range(3):
+        await make_post(author)
+    await db.commit()
+
+    checked, updated = await SearchService(db).reindex(SEARCH_SOURCES["post"], chunk_size=2)
+
+    assert checked == await scalar(db, "SELECT COUNT(*) FROM posts")
+    assert updated == 0
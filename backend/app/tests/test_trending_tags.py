@@ -0,0 +1,118 @@
+"""Trending tag counter tests."""
+
+import json
+
+import pytest
+from sqlalchemy import text
+
+from app.tests.conftest import requires_db
+
+pytestmark = requires_db
+
+TAGS = ["python", "sql", "rust"]
+
+
+async def window_counts(db, window: str = "24h"):
+    result = await db.execute(
+        text("SELECT tag, posts_count FROM trending_tags WHERE window_name = :window AND tag = ANY(:tags)"),
+        {"window": window, "tags": TAGS}
+    )
+    counts = dict(result.fetchall())
+    return [counts.get(tag, 0) for tag in TAGS]
+
+
+async def bucket_counts(db):
+    result = await db.execute(
+        text("SELECT tag, SUM(posts_count) FROM tag_buckets WHERE tag = ANY(:tags) GROUP BY tag"),
+        {"tags": TAGS}
+    )
+    counts = dict(result.fetchall())
+    return [counts.get(tag, 0) for tag in TAGS]
+
+
+async def retag(db, post_id: str, tags):
+    await db.execute(
+        text("UPDATE posts SET tags = CAST(:tags AS jsonb) WHERE id = :id"),
+        {"id": post_id, "tags": json.dumps(tags)}
+    )
+
+
+@pytest.fixture
+def tagged_posts(db, make_user, make_post):
+    async def _tagged_posts(*tag_lists):
+        author = await make_user()
+        return [await make_post(author, tags=json.dumps(tags)) for tags in tag_lists]
+
+    return _tagged_posts
+
+
+@pytest.mark.asyncio
+async def test_deleted_posts_are_counted_down(db, tagged_posts):
+    first, second, third = await tagged_posts(["python", "sql"], ["python"], ["python", "rust"])
+    assert await window_counts(db) == [3, 1, 1]
+
+    await db.execute(text("DELETE FROM posts WHERE id = :id"), {"id": first})
+    assert await window_counts(db) == [2, 0, 1]
+
+    # One statement deleting several posts
+    await db.execute(
+        text("DELETE FROM posts WHERE id = ANY(CAST(:ids AS uuid[]))"),
+        {"ids": [second, third]}
+    )
+    assert await window_counts(db) == [0, 0, 0]
+    assert await window_counts(db, "7d") == [0, 0, 0]
+    assert await bucket_counts(db) == [0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_visibility_changes_move_posts_in_and_out(db, tagged_posts):
+    post_id, = await tagged_posts(["python", "sql"])
+
+    await db.execute(text("UPDATE posts SET is_published = false WHERE id = :id"), {"id": post_id})
+    assert await window_counts(db) == [0, 0, 0]
+
+    await db.execute(text("UPDATE posts SET is_published = true WHERE id = :id"), {"id": post_id})
+    assert await window_counts(db) == [1, 1, 0]
+
+    await db.execute(text("UPDATE posts SET moderation_status = 'rejected' WHERE id = :id"), {"id": post_id})
+    assert await window_counts(db) == [0, 0, 0]
+    assert await bucket_counts(db) == [0, 0, 0]
+
+    # Hidden posts are not counted when they change further
+    await retag(db, post_id, ["rust"])
+    assert await window_counts(db) == [0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_retagging_moves_the_count(db, tagged_posts):
+    post_id, = await tagged_posts(["python", "sql"])
+
+    await retag(db, post_id, ["python", "rust"])
+
+    assert await window_counts(db) == [1, 0, 1]
+    assert await bucket_counts(db) == [1, 0, 1]
+
+
+@pytest.mark.asyncio
+async def test_other_updates_leave_counts_alone(db, tagged_posts):
+    post_id, = await tagged_posts(["python"])
+
+    await db.execute(text("UPDATE posts SET likes_count = 5, is_published = true WHERE id = :id"), {"id": post_id})
+
+    assert await window_counts(db) == [1, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_windows_that_slid_past_a_bucket_are_left_alone(db, tagged_posts):
+    post_id, = await tagged_posts(["python"])
+    # The 1h window has already subtracted the post's bucket
+    await db.execute(text("""
+        UPDATE tag_windows SET expired_before = tag_bucket(NOW()) + INTERVAL '5 minutes'
+        WHERE window_name = '1h'
+    """))
+    await db.execute(text("UPDATE trending_tags SET posts_count = 0 WHERE window_name = '1h'"))
+
+    await db.execute(text("DELETE FROM posts WHERE id = :id"), {"id": post_id})
+
+    assert await window_counts(db, "1h") == [0, 0, 0]
+    assert await window_counts(db, "24h") == [0, 0, 0]
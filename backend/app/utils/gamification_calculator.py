@@ -0,0 +1,76 @@
+"""Level curve calculations shared by the gamification service and batch jobs."""
+
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+
+from app.core.config import settings
+
+
+class LevelCurve:
+    """
+    XP -> level mapping precomputed from a list of level thresholds.
+
+    Level 1 starts at 0 XP and every threshold reached adds one level, so a
+    level lookup is a binary search over the sorted thresholds.
+    """
+
+    def __init__(self, thresholds: Sequence[int]):
+        self.thresholds: Tuple[int, ...] = tuple(sorted(thresholds))
+        self.max_level = len(self.thresholds) + 1
+
+        # (level start, next level start) for every level, indexed by level
+        bounds: List[Tuple[int, int]] = [(0, 0)]
+        for level in range(1, self.max_level + 1):
+            if level < self.max_level:
+                start = self.thresholds[level - 2] if level > 1 else 0
+                bounds.append((start, self.thresholds[level - 1]))
+            else:
+                last = self.thresholds[-1] if self.thresholds else 0
+                bounds.append((last, last))
+        self._bounds = bounds
+        self._array = None
+
+    def level_for(self, xp: int) -> int:
+        """Get the level for an XP total."""
+        return 1 + bisect_right(self.thresholds, xp)
+
+    def progress(self, xp: int, level: Optional[int] = None) -> Dict[str, Any]:
+        """Get progress towards the next level."""
+        if level is None:
+            level = self.level_for(xp)
+        current_threshold, next_threshold = self._bounds[min(max(level, 1), self.max_level)]
+
+        xp_in_level = xp - current_threshold
+        xp_for_level = next_threshold - current_threshold
+        progress = (xp_in_level / xp_for_level) * 100 if xp_for_level > 0 else 100
+
+        return {
+            "xp_in_level": xp_in_level,
+            "xp_for_level": xp_for_level,
+            "progress_percentage": min(100, max(0, progress)),
+            "xp_to_next": max(0, next_threshold - xp),
+        }
+
+    def levels_for(self, xp_values):
+        """
+        Get levels for many XP totals at once (NumPy array in, array out).
+
+        Used by bulk recalculation after the curve is retuned; NumPy is only
+        imported when this path is used.
+        """
+        import numpy as np
+
+        if self._array is None:
+            self._array = np.asarray(self.thresholds, dtype=np.int64)
+        return 1 + np.searchsorted(self._array, np.asarray(xp_values, dtype=np.int64), side="right")
+
+
+@lru_cache(maxsize=8)
+def _curve_for(thresholds: Tuple[int, ...]) -> LevelCurve:
+    return LevelCurve(thresholds)
+
+
+def get_level_curve(thresholds: Optional[Sequence[int]] = None) -> LevelCurve:
+    """Get the (cached) level curve for the given or configured thresholds."""
+    return _curve_for(tuple(thresholds if thresholds is not None else settings.LEVEL_THRESHOLDS))
@@ -0,0 +1,48 @@
+"""General helper functions."""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List
+from uuid import UUID
+
+from fastapi import Request
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the request's If-None-Match header matches an ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" matches "x"
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode keyset values into an opaque, URL-safe continuation token."""
+    payload = json.dumps([_cursor_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """Decode a continuation token; raises ValueError if it is malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _cursor_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
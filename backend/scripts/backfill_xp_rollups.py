@@ -0,0 +1,159 @@
+"""
+Rebuild xp_rollups_hourly / xp_rollups_daily from the xp_transactions history.
+
+Works through the ledger one chunk (default: one UTC day) at a time, each in its
+own short transaction, and takes no locks that block concurrent ledger inserts.
+
+Only settled hours are rebuilt. The live rollup trigger adds a ledger row to the
+hour and day of its created_at, the start of the inserting transaction, so an
+hour that ended more than SETTLE ago is never written again and can be replaced
+outright; so can the daily buckets of whole settled days. The daily bucket of
+the day in progress is still shared with the trigger: it is corrected by adding
+the difference between the ledger and its old hourly buckets, never overwritten.
+
+Usage:
+    python scripts/backfill_xp_rollups.py [--since YYYY-MM-DD] [--until YYYY-MM-DD] [--chunk-days N]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine
+
+
+# Ledger transactions are assumed to commit within this long of starting
+SETTLE = timedelta(minutes=5)
+
+CLEAR_HOURLY = """
+    DELETE FROM xp_rollups_hourly
+    WHERE bucket_start >= :start AND bucket_start < :end
+"""
+
+REBUILD_HOURLY = """
+    INSERT INTO xp_rollups_hourly (user_id, bucket_start, xp, transactions_count)
+    SELECT
+        user_id,
+        date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+        SUM(amount),
+        COUNT(*)
+    FROM xp_transactions
+    WHERE created_at >= :start AND created_at < :end
+    GROUP BY 1, 2
+"""
+
+# Daily buckets of settled days are derived from the freshly rebuilt hourly buckets
+CLEAR_DAILY = """
+    DELETE FROM xp_rollups_daily
+    WHERE bucket_date >= :start_date AND bucket_date < :end_date
+"""
+
+REBUILD_DAILY = """
+    INSERT INTO xp_rollups_daily (user_id, bucket_date, xp, transactions_count)
+    SELECT
+        user_id,
+        (bucket_start AT TIME ZONE 'UTC')::date,
+        SUM(xp),
+        SUM(transactions_count)
+    FROM xp_rollups_hourly
+    WHERE bucket_start >= :start AND bucket_start < :end
+    GROUP BY 1, 2
+"""
+
+# Ledger minus current hourly buckets for the settled hours of the day in
+# progress, taken before those hours are replaced
+OPEN_DAY_DELTA = """
+    CREATE TEMPORARY TABLE open_day_delta ON COMMIT DROP AS
+    SELECT user_id, SUM(xp) AS xp, SUM(transactions_count) AS transactions_count
+    FROM (
+        SELECT user_id, amount AS xp, 1 AS transactions_count
+        FROM xp_transactions
+        WHERE created_at >= :start AND created_at < :end
+        UNION ALL
+        SELECT user_id, -xp, -transactions_count
+        FROM xp_rollups_hourly
+        WHERE bucket_start >= :start AND bucket_start < :end
+    ) d
+    GROUP BY user_id
+    HAVING SUM(xp) <> 0 OR SUM(transactions_count) <> 0
+"""
+
+# Added, like the trigger does, so concurrent trigger increments are kept
+APPLY_OPEN_DAY_DELTA = """
+    INSERT INTO xp_rollups_daily (user_id, bucket_date, xp, transactions_count)
+    SELECT user_id, CAST(:start_date AS date), xp, transactions_count
+    FROM open_day_delta
+    ORDER BY user_id
+    ON CONFLICT (user_id, bucket_date) DO UPDATE SET
+        xp = xp_rollups_daily.xp + EXCLUDED.xp,
+        transactions_count = xp_rollups_daily.transactions_count + EXCLUDED.transactions_count
+"""
+
+
+def parse_day(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+def settled_until(now: datetime) -> datetime:
+    """End of the last hour no running ledger transaction can still write to."""
+    return (now - SETTLE).replace(minute=0, second=0, microsecond=0)
+
+
+async def backfill_xp_rollups(since: datetime = None, until: datetime = None, chunk_days: int = 1):
+    if since is None:
+        async with engine.connect() as conn:
+            first = (await conn.execute(text("SELECT MIN(created_at) FROM xp_transactions"))).scalar()
+        if first is None:
+            print("No XP transactions found - nothing to backfill.")
+            return
+        since = first.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    settled = settled_until(datetime.now(timezone.utc))
+    if until is None or until > settled:
+        until = settled
+    open_day = until.replace(hour=0)
+
+    print(f"Rebuilding XP rollups from {since.isoformat()} to {until.isoformat()} in {chunk_days}-day chunks")
+
+    start = since
+    while start < open_day:
+        end = min(start + timedelta(days=chunk_days), open_day)
+        params = {"start": start, "end": end, "start_date": start.date(), "end_date": end.date()}
+
+        # One short transaction per chunk
+        async with engine.begin() as conn:
+            await conn.execute(text(CLEAR_HOURLY), params)
+            hourly = await conn.execute(text(REBUILD_HOURLY), params)
+            await conn.execute(text(CLEAR_DAILY), params)
+            daily = await conn.execute(text(REBUILD_DAILY), params)
+
+        print(f"{start.isoformat()} -> {end.isoformat()}: {hourly.rowcount} hourly, {daily.rowcount} daily buckets")
+        start = end
+
+    if start < until:
+        params = {"start": start, "end": until, "start_date": start.date()}
+        async with engine.begin() as conn:
+            await conn.execute(text(OPEN_DAY_DELTA), params)
+            await conn.execute(text(CLEAR_HOURLY), params)
+            hourly = await conn.execute(text(REBUILD_HOURLY), params)
+            daily = await conn.execute(text(APPLY_OPEN_DAY_DELTA), params)
+
+        print(f"{start.isoformat()} -> {until.isoformat()}: {hourly.rowcount} hourly, {daily.rowcount} daily buckets corrected")
+
+    print("XP rollup backfill complete.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild XP rollup buckets from xp_transactions")
+    parser.add_argument("--since", type=parse_day, help="First UTC day to rebuild (default: oldest transaction)")
+    parser.add_argument("--until", type=parse_day, help="UTC day to stop at, exclusive (default: last settled hour)")
+    parser.add_argument("--chunk-days", type=int, default=1, help="Days of history per transaction")
+    args = parser.parse_args()
+
+    asyncio.run(backfill_xp_rollups(args.since, args.until, args.chunk_days))
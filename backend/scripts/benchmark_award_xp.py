@@ -0,0 +1,122 @@
+"""
+Concurrency benchmark for GamificationService.award_xp / award_xp_many.
+
+Hammers a single user from many concurrent tasks (each with its own session)
+and then checks that the user's balance moved by exactly the sum of the
+ledger rows written during the run, and that the last ledger row's
+balance_after matches the final balance. Any lost update shows up as a
+mismatch.
+
+Writes real XP and ledger rows (source_type 'benchmark') - run it against a
+development database only.
+
+Usage:
+    python scripts/benchmark_award_xp.py --user-id UUID [--tasks 50] [--awards 20] [--amount 5] [--bulk]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import AsyncSessionLocal, engine
+from app.services.gamification import GamificationService
+
+
+SOURCE_TYPE = "benchmark"
+
+
+async def read_balance(user_id: str) -> int:
+    async with engine.connect() as conn:
+        balance = (
+            await conn.execute(
+                text("SELECT experience_points FROM users WHERE id = :user_id"),
+                {"user_id": user_id}
+            )
+        ).scalar()
+    if balance is None:
+        raise SystemExit(f"User {user_id} not found")
+    return balance
+
+
+async def hammer(user_id: str, awards: int, amount: int, bulk: bool):
+    """One task: award XP `awards` times, committing after each call."""
+    async with AsyncSessionLocal() as session:
+        service = GamificationService(session)
+        for i in range(awards):
+            if bulk:
+                # Two awards per call so the running balance path is exercised too
+                await service.award_xp_many([
+                    (user_id, amount, SOURCE_TYPE, None, "benchmark (bulk)"),
+                    (user_id, amount, SOURCE_TYPE, None, "benchmark (bulk)"),
+                ])
+            else:
+                await service.award_xp(user_id, amount, SOURCE_TYPE, description="benchmark")
+
+
+async def benchmark_award_xp(user_id: str, tasks: int, awards: int, amount: int, bulk: bool) -> bool:
+    start_balance = await read_balance(user_id)
+    async with engine.connect() as conn:
+        started_at = (await conn.execute(text("SELECT clock_timestamp()"))).scalar()
+
+    mode = "award_xp_many" if bulk else "award_xp"
+    print(f"Running {tasks} tasks x {awards} calls of {mode} for user {user_id} (start balance {start_balance})")
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(hammer(user_id, awards, amount, bulk) for _ in range(tasks)))
+    elapsed = time.perf_counter() - t0
+
+    calls = tasks * awards
+    per_call = 2 if bulk else 1
+    expected = calls * amount * per_call
+
+    final_balance = await read_balance(user_id)
+    async with engine.connect() as conn:
+        ledger = (
+            await conn.execute(
+                text("""
+                SELECT
+                    COUNT(*) AS rows,
+                    COALESCE(SUM(amount), 0) AS total,
+                    (ARRAY_AGG(balance_after ORDER BY balance_after DESC))[1] AS last_balance
+                FROM xp_transactions
+                WHERE user_id = :user_id
+                  AND source_type = :source_type
+                  AND created_at >= :started_at
+                """),
+                {"user_id": user_id, "source_type": SOURCE_TYPE, "started_at": started_at}
+            )
+        ).first()
+
+    print(f"{calls} calls in {elapsed:.2f}s ({calls / elapsed:.0f} calls/s)")
+    print(f"Expected XP:     {expected}")
+    print(f"Balance delta:   {final_balance - start_balance}")
+    print(f"Ledger rows/sum: {ledger.rows} / {ledger.total}")
+    print(f"Last ledger balance_after: {ledger.last_balance} (final balance {final_balance})")
+
+    ok = (
+        final_balance - start_balance == expected
+        and ledger.total == expected
+        and ledger.rows == calls * per_call
+        and ledger.last_balance == final_balance
+    )
+    print("OK - no lost updates" if ok else "MISMATCH - balance and ledger disagree")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check award_xp for lost updates under concurrency")
+    parser.add_argument("--user-id", required=True, help="User to award XP to")
+    parser.add_argument("--tasks", type=int, default=50, help="Concurrent tasks")
+    parser.add_argument("--awards", type=int, default=20, help="Calls per task")
+    parser.add_argument("--amount", type=int, default=5, help="XP per award")
+    parser.add_argument("--bulk", action="store_true", help="Use award_xp_many instead of award_xp")
+    args = parser.parse_args()
+
+    ok = asyncio.run(benchmark_award_xp(args.user_id, args.tasks, args.awards, args.amount, args.bulk))
+    sys.exit(0 if ok else 1)
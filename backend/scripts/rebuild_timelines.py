@@ -0,0 +1,77 @@
+"""
+Rebuild home timelines for all active users (or one user).
+
+Run after enabling timelines, after changing TIMELINE_FANOUT_MAX_FOLLOWERS, or
+after Redis lost its data. Uses Redis when REDIS_URL is reachable and the
+home_timelines table otherwise, the same as the API.
+
+Usage:
+    python scripts/rebuild_timelines.py [--user-id UUID] [--batch-size 500]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import AsyncSessionLocal
+from app.core.redis import connect_to_redis, close_redis_connection
+from app.services.timeline import TimelineService, init_timeline_store
+
+
+async def rebuild_timelines(user_id: str = None, batch_size: int = 500):
+    try:
+        await connect_to_redis()
+    except Exception as e:
+        print(f"Redis unavailable ({e}) - rebuilding the home_timelines table")
+    init_timeline_store()
+
+    try:
+        async with AsyncSessionLocal() as session:
+            service = TimelineService(session)
+
+            if user_id:
+                count = await service.rebuild(user_id)
+                print(f"Rebuilt timeline for {user_id}: {count} entries")
+                return
+
+            # Keyset start; every user id sorts after the nil UUID
+            after = "00000000-0000-0000-0000-000000000000"
+            rebuilt = 0
+            while True:
+                result = await session.execute(
+                    text("""
+                    SELECT id FROM users
+                    WHERE is_active = true
+                      AND id > CAST(:after AS uuid)
+                    ORDER BY id
+                    LIMIT :limit
+                    """),
+                    {"after": after, "limit": batch_size}
+                )
+                user_ids = [str(row.id) for row in result.fetchall()]
+                if not user_ids:
+                    break
+
+                for uid in user_ids:
+                    await service.rebuild(uid)
+                rebuilt += len(user_ids)
+                after = user_ids[-1]
+                print(f"{rebuilt} timelines rebuilt")
+
+            print(f"Done: {rebuilt} timelines rebuilt.")
+    finally:
+        await close_redis_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild home timelines")
+    parser.add_argument("--user-id", help="Rebuild a single user's timeline")
+    parser.add_argument("--batch-size", type=int, default=500, help="Users per batch")
+    args = parser.parse_args()
+
+    asyncio.run(rebuild_timelines(args.user_id, args.batch_size))
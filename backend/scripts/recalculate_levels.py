@@ -0,0 +1,115 @@
+"""
+Recalculate users.current_level for every user after the level curve changes.
+
+Users are streamed in id order (keyset pagination, no OFFSET) one batch at a
+time. Levels for a batch are computed with the vectorized level curve and only
+rows whose level actually changed are written, with one UPDATE per batch. Each
+batch is its own short transaction.
+
+A row whose XP changed after it was read is skipped: award_xp already
+recalculated its level with the current curve.
+
+Usage:
+    python scripts/recalculate_levels.py [--batch-size 5000] [--thresholds 100,300,...] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import text
+from app.core.database import engine
+from app.utils.gamification_calculator import get_level_curve
+
+
+# Keyset start; every row id sorts after the nil UUID
+FIRST_ID = "00000000-0000-0000-0000-000000000000"
+
+FETCH_BATCH = """
+    SELECT id, experience_points, current_level
+    FROM users
+    WHERE id > CAST(:after AS uuid)
+    ORDER BY id
+    LIMIT :limit
+"""
+
+APPLY_LEVELS = """
+    UPDATE users u
+    SET current_level = c.level
+    FROM unnest(
+        CAST(:ids AS uuid[]),
+        CAST(:xp AS integer[]),
+        CAST(:levels AS integer[])
+    ) AS c(id, xp, level)
+    WHERE u.id = c.id
+      AND u.experience_points = c.xp
+      AND u.current_level IS DISTINCT FROM c.level
+"""
+
+
+def parse_thresholds(value: str):
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+async def recalculate_levels(batch_size: int = 5000, thresholds=None, dry_run: bool = False):
+    curve = get_level_curve(thresholds)
+    print(f"Recalculating levels with thresholds {list(curve.thresholds)} (batch size {batch_size})")
+
+    after = FIRST_ID
+    scanned = changed = 0
+    started = time.perf_counter()
+
+    while True:
+        async with engine.begin() as conn:
+            rows = (await conn.execute(text(FETCH_BATCH), {"after": after, "limit": batch_size})).fetchall()
+            if not rows:
+                break
+
+            xp = np.fromiter((row.experience_points or 0 for row in rows), dtype=np.int64, count=len(rows))
+            current = np.fromiter((row.current_level or 0 for row in rows), dtype=np.int64, count=len(rows))
+            levels = curve.levels_for(xp)
+            stale = np.flatnonzero(levels != current)
+
+            if len(stale) and not dry_run:
+                result = await conn.execute(
+                    text(APPLY_LEVELS),
+                    {
+                        "ids": [str(rows[i].id) for i in stale],
+                        "xp": xp[stale].tolist(),
+                        "levels": levels[stale].tolist(),
+                    }
+                )
+                changed += result.rowcount
+            else:
+                changed += len(stale)
+
+        scanned += len(rows)
+        after = str(rows[-1].id)
+        print(f"{scanned} users scanned, {changed} levels {'to change' if dry_run else 'changed'}")
+
+    elapsed = time.perf_counter() - started
+    print(f"Done in {elapsed:.1f}s: {scanned} users, {changed} levels {'to change' if dry_run else 'changed'}.")
+    if changed and not dry_run:
+        print("Leaderboards pick up the new levels on their next refresh.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalculate all user levels from the level curve")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Users per batch/transaction")
+    parser.add_argument(
+        "--thresholds",
+        type=parse_thresholds,
+        help="Comma-separated thresholds to preview with --dry-run (default: settings.LEVEL_THRESHOLDS)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Count changes without writing")
+    args = parser.parse_args()
+    if args.thresholds and not args.dry_run:
+        parser.error("--thresholds is only a preview and requires --dry-run; change LEVEL_THRESHOLDS to apply a new curve")
+
+    asyncio.run(recalculate_levels(args.batch_size, args.thresholds, args.dry_run))
@@ -0,0 +1,50 @@
+"""
+Recount denormalized counters (post likes/comments, comment likes, path module
+totals, completed modules per enrollment) and fix any drift.
+
+The API runs the same reconciliation as an hourly background job; this script
+runs it on demand and prints the drift found per counter.
+
+Usage:
+    python scripts/reconcile_counters.py [--chunk-size 1000] [--counter posts.likes_count]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import AsyncSessionLocal
+from app.services.counters import COUNTERS, CounterReconciler
+
+
+async def reconcile_counters(chunk_size: int = 1000, counter: str = None):
+    specs = [spec for spec in COUNTERS if counter is None or spec.name == counter]
+    if not specs:
+        print(f"Unknown counter: {counter}")
+        return
+
+    async with AsyncSessionLocal() as session:
+        reconciler = CounterReconciler(session, chunk_size)
+        for spec in specs:
+            stats = await reconciler.reconcile(spec)
+            print(
+                f"{stats.counter}: {stats.rows_checked} rows checked, {stats.rows_fixed} fixed, "
+                f"total drift {stats.total_drift}, max drift {stats.max_drift}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile denormalized counters")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per chunk/transaction")
+    parser.add_argument(
+        "--counter",
+        choices=[spec.name for spec in COUNTERS],
+        help="Reconcile a single counter (default: all)",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(reconcile_counters(args.chunk_size, args.counter))
@@ -0,0 +1,40 @@
+"""
+Rebuild the full-text search vectors of learning paths, posts and career roles.
+
+Triggers keep the vectors current on every write; run this after changing a
+search document function in the database (or after a bulk load with triggers
+disabled). Only rows whose vector changed are rewritten.
+
+Usage:
+    python scripts/reindex_search.py [--chunk-size 1000] [--type post]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import AsyncSessionLocal
+from app.services.search import SEARCH_SOURCES, SearchService
+
+
+async def reindex_search(chunk_size: int = 1000, source_type: str = None):
+    sources = [SEARCH_SOURCES[source_type]] if source_type else list(SEARCH_SOURCES.values())
+
+    async with AsyncSessionLocal() as session:
+        service = SearchService(session)
+        for source in sources:
+            checked, updated = await service.reindex(source, chunk_size)
+            print(f"{source.table}: {checked} rows checked, {updated} reindexed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild full-text search vectors")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per chunk/transaction")
+    parser.add_argument("--type", choices=list(SEARCH_SOURCES), help="Reindex a single source (default: all)")
+    args = parser.parse_args()
+
+    asyncio.run(reindex_search(args.chunk_size, args.type))
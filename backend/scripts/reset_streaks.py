@@ -0,0 +1,41 @@
+"""
+Reset every daily streak that was broken (no activity yesterday or today and
+no freeze covering today).
+
+The API runs the same sweep as a background job; this script is for running
+it by hand or from cron when the background jobs are disabled.
+
+Usage:
+    python scripts/reset_streaks.py [--date YYYY-MM-DD] [--batch-size N]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import AsyncSessionLocal
+from app.services.streaks import StreakService
+
+
+async def reset_streaks(today=None, batch_size: int = 5000):
+    async with AsyncSessionLocal() as session:
+        reset = await StreakService(session).reset_broken_streaks(today, batch_size)
+    print(f"Reset {reset} broken streaks.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reset broken daily streaks")
+    parser.add_argument(
+        "--date",
+        type=lambda value: datetime.strptime(value, "%Y-%m-%d").date(),
+        help="Day to evaluate streaks for (default: today)",
+    )
+    parser.add_argument("--batch-size", type=int, default=5000, help="Streaks per batch/transaction")
+    args = parser.parse_args()
+
+    asyncio.run(reset_streaks(args.date, args.batch_size))
@@ -0,0 +1,13 @@
+-- Precomputed Leaderboards
+-- Migration: 008_leaderboard.sql
+
+-- leaderboard_cache is rebuilt in the background by LeaderboardService;
+-- period rankings are aggregated from the XP audit log.
+CREATE INDEX IF NOT EXISTS idx_xp_transactions_created ON xp_transactions(created_at);
+CREATE INDEX IF NOT EXISTS idx_xp_transactions_user_created ON xp_transactions(user_id, created_at);
+
+-- Global ranking source
+CREATE INDEX IF NOT EXISTS idx_users_active_xp ON users(experience_points DESC, id) WHERE is_active = true;
+
+-- Freshness check for the refresher
+CREATE INDEX IF NOT EXISTS idx_leaderboard_period_updated ON leaderboard_cache(period, updated_at DESC);
@@ -0,0 +1,79 @@
+-- XP Rollups
+-- Migration: 009_xp_rollups.sql
+
+-- Hourly XP per user (daily leaderboards)
+CREATE TABLE IF NOT EXISTS xp_rollups_hourly (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+
+    xp INTEGER NOT NULL DEFAULT 0,
+    transactions_count INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (user_id, bucket_start)
+);
+
+-- Daily XP per user (weekly/monthly leaderboards)
+CREATE TABLE IF NOT EXISTS xp_rollups_daily (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    bucket_date DATE NOT NULL,
+
+    xp INTEGER NOT NULL DEFAULT 0,
+    transactions_count INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (user_id, bucket_date)
+);
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_xp_rollups_hourly_bucket ON xp_rollups_hourly(bucket_start);
+CREATE INDEX IF NOT EXISTS idx_xp_rollups_daily_bucket ON xp_rollups_daily(bucket_date);
+
+-- Keep rollups current as ledger rows are written (buckets are UTC).
+-- Statement-level so bulk ledger inserts aggregate before touching the rollups.
+-- Rows land in the buckets of their created_at (the inserting transaction's
+-- start), so settled hours are never written again; scripts/backfill_xp_rollups.py
+-- relies on this to rebuild them without locking out ledger inserts.
+CREATE OR REPLACE FUNCTION rollup_xp_transactions()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO xp_rollups_hourly (user_id, bucket_start, xp, transactions_count)
+    SELECT
+        user_id,
+        date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+        SUM(amount),
+        COUNT(*)
+    FROM new_transactions
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    ON CONFLICT (user_id, bucket_start) DO UPDATE SET
+        xp = xp_rollups_hourly.xp + EXCLUDED.xp,
+        transactions_count = xp_rollups_hourly.transactions_count + EXCLUDED.transactions_count;
+
+    INSERT INTO xp_rollups_daily (user_id, bucket_date, xp, transactions_count)
+    SELECT
+        user_id,
+        (created_at AT TIME ZONE 'UTC')::date,
+        SUM(amount),
+        COUNT(*)
+    FROM new_transactions
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    ON CONFLICT (user_id, bucket_date) DO UPDATE SET
+        xp = xp_rollups_daily.xp + EXCLUDED.xp,
+        transactions_count = xp_rollups_daily.transactions_count + EXCLUDED.transactions_count;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_rollup_xp_transactions
+    AFTER INSERT ON xp_transactions
+    REFERENCING NEW TABLE AS new_transactions
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION rollup_xp_transactions();
+
+-- RLS
+ALTER TABLE xp_rollups_hourly ENABLE ROW LEVEL SECURITY;
+ALTER TABLE xp_rollups_daily ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own hourly XP" ON xp_rollups_hourly FOR SELECT USING (auth.uid()::text = user_id::text);
+CREATE POLICY "Users can view own daily XP" ON xp_rollups_daily FOR SELECT USING (auth.uid()::text = user_id::text);
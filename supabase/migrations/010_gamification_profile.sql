@@ -0,0 +1,5 @@
+-- Gamification Profile
+-- Migration: 010_gamification_profile.sql
+
+-- Unlocked badge count for the profile summary query
+CREATE INDEX IF NOT EXISTS idx_user_badges_user_unlocked ON user_badges(user_id) WHERE is_unlocked = true;
@@ -0,0 +1,27 @@
+-- Gamification Events
+-- Migration: 011_gamification_events.sql
+
+-- Events written by request handlers in the same transaction as the change
+-- that earned them (quest claims, module completions), so XP cannot be lost
+-- between a commit and a queue publish. The gamification worker deletes rows
+-- in the transaction that applies them
+CREATE TABLE IF NOT EXISTS gamification_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Event ids applied by the gamification worker. The worker inserts a batch's
+-- ids in the same transaction as its XP, streak and badge writes and only
+-- applies the ids it inserted, so a redelivered event is a no-op. Rows are
+-- dropped after GAMIFICATION_EVENT_DEDUP_DAYS by the gamification-dedup-trim job
+CREATE TABLE IF NOT EXISTS gamification_processed_events (
+    event_id VARCHAR(100) PRIMARY KEY,
+    processed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_gamification_processed_events_at ON gamification_processed_events(processed_at);
+
+-- RLS (worker-only tables)
+ALTER TABLE gamification_outbox ENABLE ROW LEVEL SECURITY;
+ALTER TABLE gamification_processed_events ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,7 @@
+-- Streaks
+-- Migration: 012_streaks.sql
+
+-- Nightly reset sweep: only streaks that are still running are candidates
+CREATE INDEX IF NOT EXISTS idx_user_streaks_active_last_activity
+    ON user_streaks(last_activity_date)
+    WHERE current_streak > 0;
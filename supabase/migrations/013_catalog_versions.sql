@@ -0,0 +1,40 @@
+-- Catalog Versions
+-- Migration: 013_catalog_versions.sql
+
+-- Version counter per static catalog; API processes cache catalogs until it changes
+CREATE TABLE IF NOT EXISTS catalog_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+INSERT INTO catalog_versions (name) VALUES ('badges'), ('quests')
+ON CONFLICT (name) DO NOTHING;
+
+-- Bump the catalog version on any change to the catalog table (TG_ARGV[0] = catalog name)
+CREATE OR REPLACE FUNCTION bump_catalog_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO catalog_versions (name, version, updated_at)
+    VALUES (TG_ARGV[0], 1, NOW())
+    ON CONFLICT (name) DO UPDATE SET
+        version = catalog_versions.version + 1,
+        updated_at = NOW();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_badges_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON badges
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_catalog_version('badges');
+
+CREATE TRIGGER trigger_quests_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON quests
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_catalog_version('quests');
+
+-- RLS
+ALTER TABLE catalog_versions ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Anyone can view catalog versions" ON catalog_versions FOR SELECT USING (true);
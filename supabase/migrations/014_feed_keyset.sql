@@ -0,0 +1,14 @@
+-- Feed Keyset Pagination
+-- Migration: 014_feed_keyset.sql
+
+-- Keyset row comparisons need non-null sort keys
+UPDATE posts SET is_pinned = false WHERE is_pinned IS NULL;
+UPDATE posts SET created_at = NOW() WHERE created_at IS NULL;
+
+ALTER TABLE posts ALTER COLUMN is_pinned SET NOT NULL;
+ALTER TABLE posts ALTER COLUMN created_at SET NOT NULL;
+
+-- Feed order (is_pinned, created_at, id) over visible posts only
+CREATE INDEX IF NOT EXISTS idx_posts_feed_keyset
+    ON posts(is_pinned DESC, created_at DESC, id DESC)
+    WHERE is_published = true AND moderation_status = 'approved';
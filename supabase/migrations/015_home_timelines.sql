@@ -0,0 +1,60 @@
+-- Home Timelines
+-- Migration: 015_home_timelines.sql
+
+-- Follower counts decide between fan-out on write and fan-out on read
+ALTER TABLE users ADD COLUMN IF NOT EXISTS followers_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE users u SET followers_count = f.total
+FROM (SELECT following_id, COUNT(*) AS total FROM follows GROUP BY following_id) f
+WHERE u.id = f.following_id;
+
+CREATE OR REPLACE FUNCTION update_followers_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE users SET followers_count = followers_count + 1 WHERE id = NEW.following_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE users SET followers_count = GREATEST(followers_count - 1, 0) WHERE id = OLD.following_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_update_followers_count
+    AFTER INSERT OR DELETE ON follows
+    FOR EACH ROW
+    EXECUTE FUNCTION update_followers_count();
+
+-- Materialized home timelines (used when Redis is not available)
+CREATE TABLE IF NOT EXISTS home_timelines (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    post_id UUID NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    author_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    
+    PRIMARY KEY (user_id, post_id)
+);
+
+-- Users whose home_timelines rows have been materialized. Tells an empty
+-- timeline (nothing to show) apart from one that was never built, so an empty
+-- timeline is not rebuilt on every read
+CREATE TABLE IF NOT EXISTS home_timeline_builds (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    built_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_home_timelines_page ON home_timelines(user_id, created_at DESC, post_id DESC);
+CREATE INDEX IF NOT EXISTS idx_home_timelines_created ON home_timelines(created_at);
+
+-- Recent visible posts per author (timeline rebuilds and fan-out on read)
+CREATE INDEX IF NOT EXISTS idx_posts_author_recent
+    ON posts(author_id, created_at DESC, id DESC)
+    WHERE is_published = true AND moderation_status = 'approved';
+
+-- RLS
+ALTER TABLE home_timelines ENABLE ROW LEVEL SECURITY;
+ALTER TABLE home_timeline_builds ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own timeline" ON home_timelines FOR SELECT USING (auth.uid()::text = user_id::text);
+CREATE POLICY "Users can view own timeline build" ON home_timeline_builds FOR SELECT USING (auth.uid()::text = user_id::text);
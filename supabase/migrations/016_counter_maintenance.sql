@@ -0,0 +1,47 @@
+-- Counter Maintenance
+-- Migration: 016_counter_maintenance.sql
+
+-- Incremental post/comment counters, kept in the same transaction as the write.
+-- Also maintains comments.likes_count for comment reactions and never lets a
+-- counter go negative.
+CREATE OR REPLACE FUNCTION update_post_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF TG_TABLE_NAME = 'comments' THEN
+            UPDATE posts SET comments_count = COALESCE(comments_count, 0) + 1 WHERE id = NEW.post_id;
+        ELSIF TG_TABLE_NAME = 'reactions' AND NEW.target_type = 'post' THEN
+            UPDATE posts SET likes_count = COALESCE(likes_count, 0) + 1 WHERE id = NEW.target_id;
+        ELSIF TG_TABLE_NAME = 'reactions' AND NEW.target_type = 'comment' THEN
+            UPDATE comments SET likes_count = COALESCE(likes_count, 0) + 1 WHERE id = NEW.target_id;
+        END IF;
+    ELSIF TG_OP = 'DELETE' THEN
+        IF TG_TABLE_NAME = 'comments' THEN
+            UPDATE posts SET comments_count = GREATEST(COALESCE(comments_count, 0) - 1, 0) WHERE id = OLD.post_id;
+        ELSIF TG_TABLE_NAME = 'reactions' AND OLD.target_type = 'post' THEN
+            UPDATE posts SET likes_count = GREATEST(COALESCE(likes_count, 0) - 1, 0) WHERE id = OLD.target_id;
+        ELSIF TG_TABLE_NAME = 'reactions' AND OLD.target_type = 'comment' THEN
+            UPDATE comments SET likes_count = GREATEST(COALESCE(likes_count, 0) - 1, 0) WHERE id = OLD.target_id;
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drift found by the counter reconciler, one row per counter per run
+CREATE TABLE IF NOT EXISTS counter_drift_log (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    counter VARCHAR(50) NOT NULL,
+    rows_checked INTEGER NOT NULL DEFAULT 0,
+    rows_fixed INTEGER NOT NULL DEFAULT 0,
+    total_drift INTEGER NOT NULL DEFAULT 0,
+    max_drift INTEGER NOT NULL DEFAULT 0,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    finished_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_counter_drift_log_counter ON counter_drift_log(counter, finished_at DESC);
+
+-- RLS
+ALTER TABLE counter_drift_log ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,106 @@
+-- Comment Threads
+-- Migration: 017_comment_threads.sql
+
+-- Thread position of every comment:
+--   root_id        top-level comment of the thread (itself for top-level comments)
+--   depth          0 for top-level comments
+--   path           materialized path of sortable segments, root first; ordering by
+--                  path gives the thread in depth-first order (C collation so '/'
+--                  sorts before every segment character)
+--   replies_count  number of direct replies
+ALTER TABLE comments
+    ADD COLUMN IF NOT EXISTS root_id UUID,
+    ADD COLUMN IF NOT EXISTS depth INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS path TEXT COLLATE "C",
+    ADD COLUMN IF NOT EXISTS replies_count INTEGER NOT NULL DEFAULT 0;
+
+-- One path segment: creation time (UTC, microseconds) then the id as a tie-breaker
+CREATE OR REPLACE FUNCTION comment_path_segment(created TIMESTAMP WITH TIME ZONE, comment_id UUID)
+RETURNS TEXT AS $$
+    SELECT to_char(created AT TIME ZONE 'UTC', 'YYYYMMDDHH24MISSUS') || replace(comment_id::text, '-', '')
+$$ LANGUAGE sql STABLE;
+
+-- Backfill existing comments (without touching updated_at)
+ALTER TABLE comments DISABLE TRIGGER update_comments_updated_at;
+
+UPDATE comments SET created_at = NOW() WHERE created_at IS NULL;
+
+WITH RECURSIVE tree AS (
+    SELECT id, id AS root_id, 0 AS depth, comment_path_segment(created_at, id) AS path
+    FROM comments
+    WHERE parent_id IS NULL
+    UNION ALL
+    SELECT c.id, t.root_id, t.depth + 1, t.path || '/' || comment_path_segment(c.created_at, c.id)
+    FROM comments c
+    JOIN tree t ON c.parent_id = t.id
+)
+UPDATE comments c
+SET root_id = t.root_id, depth = t.depth, path = t.path
+FROM tree t
+WHERE c.id = t.id;
+
+UPDATE comments c SET replies_count = r.total
+FROM (
+    SELECT parent_id, COUNT(*) AS total
+    FROM comments
+    WHERE parent_id IS NOT NULL
+    GROUP BY parent_id
+) r
+WHERE c.id = r.parent_id;
+
+ALTER TABLE comments ENABLE TRIGGER update_comments_updated_at;
+
+ALTER TABLE comments ALTER COLUMN created_at SET NOT NULL;
+
+-- Place new comments in their thread; replies must belong to the same post
+CREATE OR REPLACE FUNCTION set_comment_thread_position()
+RETURNS TRIGGER AS $$
+DECLARE
+    parent RECORD;
+BEGIN
+    NEW.created_at := COALESCE(NEW.created_at, NOW());
+
+    IF NEW.parent_id IS NULL THEN
+        NEW.root_id := NEW.id;
+        NEW.depth := 0;
+        NEW.path := comment_path_segment(NEW.created_at, NEW.id);
+    ELSE
+        SELECT post_id, root_id, depth, path INTO parent FROM comments WHERE id = NEW.parent_id;
+        IF NOT FOUND OR parent.post_id <> NEW.post_id THEN
+            RAISE EXCEPTION 'Parent comment % does not belong to post %', NEW.parent_id, NEW.post_id;
+        END IF;
+        NEW.root_id := parent.root_id;
+        NEW.depth := parent.depth + 1;
+        NEW.path := parent.path || '/' || comment_path_segment(NEW.created_at, NEW.id);
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_set_comment_thread_position
+    BEFORE INSERT ON comments
+    FOR EACH ROW
+    EXECUTE FUNCTION set_comment_thread_position();
+
+CREATE OR REPLACE FUNCTION update_comment_replies_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' AND NEW.parent_id IS NOT NULL THEN
+        UPDATE comments SET replies_count = replies_count + 1 WHERE id = NEW.parent_id;
+    ELSIF TG_OP = 'DELETE' AND OLD.parent_id IS NOT NULL THEN
+        UPDATE comments SET replies_count = GREATEST(replies_count - 1, 0) WHERE id = OLD.parent_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_update_comment_replies_count
+    AFTER INSERT OR DELETE ON comments
+    FOR EACH ROW
+    EXECUTE FUNCTION update_comment_replies_count();
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_comments_post_roots ON comments(post_id, created_at, id) WHERE parent_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_comments_post_created ON comments(post_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_comments_thread ON comments(root_id, path);
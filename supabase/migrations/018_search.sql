@@ -0,0 +1,98 @@
+-- Full-text Search
+-- Migration: 018_search.sql
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE learning_paths ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+ALTER TABLE career_roles ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+-- Search documents, weighted A (title) > B (summary, tags, skills) > C (body).
+-- Used by the triggers below and by scripts/reindex_search.py.
+CREATE OR REPLACE FUNCTION learning_path_search_vector(lp learning_paths)
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('english', COALESCE(lp.title, '')), 'A')
+        || setweight(to_tsvector('english', COALESCE(lp.short_description, '')), 'B')
+        || setweight(to_tsvector('english', COALESCE(lp.category, '')), 'B')
+        || setweight(jsonb_to_tsvector('english', COALESCE(lp.skills_covered, '[]'), '["string"]'), 'B')
+        || setweight(to_tsvector('english', COALESCE(lp.description, '')), 'C')
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION post_search_vector(p posts)
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('english', COALESCE(p.title, '')), 'A')
+        || setweight(jsonb_to_tsvector('english', COALESCE(p.tags, '[]'), '["string"]'), 'B')
+        || setweight(to_tsvector('english', COALESCE(p.content, '')), 'C')
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION career_role_search_vector(r career_roles)
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('english', COALESCE(r.title, '')), 'A')
+        || setweight(to_tsvector('english', replace(COALESCE(r.field, ''), '_', ' ')), 'B')
+        || setweight(jsonb_to_tsvector('english', COALESCE(r.required_skills, '[]'), '["string"]'), 'B')
+        || setweight(jsonb_to_tsvector('english', COALESCE(r.tools_technologies, '[]'), '["string"]'), 'B')
+        || setweight(to_tsvector('english', COALESCE(r.description, '')), 'C')
+$$ LANGUAGE sql STABLE;
+
+-- Backfill (without touching updated_at)
+ALTER TABLE learning_paths DISABLE TRIGGER update_learning_paths_updated_at;
+UPDATE learning_paths lp SET search_vector = learning_path_search_vector(lp);
+ALTER TABLE learning_paths ENABLE TRIGGER update_learning_paths_updated_at;
+
+ALTER TABLE posts DISABLE TRIGGER update_posts_updated_at;
+UPDATE posts p SET search_vector = post_search_vector(p);
+ALTER TABLE posts ENABLE TRIGGER update_posts_updated_at;
+
+UPDATE career_roles r SET search_vector = career_role_search_vector(r);
+
+-- Keep search vectors current
+CREATE OR REPLACE FUNCTION update_learning_path_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector := learning_path_search_vector(NEW);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_post_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector := post_search_vector(NEW);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_career_role_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector := career_role_search_vector(NEW);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_learning_path_search_vector
+    BEFORE INSERT OR UPDATE OF title, short_description, description, category, skills_covered
+    ON learning_paths
+    FOR EACH ROW
+    EXECUTE FUNCTION update_learning_path_search_vector();
+
+CREATE TRIGGER trigger_post_search_vector
+    BEFORE INSERT OR UPDATE OF title, content, tags
+    ON posts
+    FOR EACH ROW
+    EXECUTE FUNCTION update_post_search_vector();
+
+CREATE TRIGGER trigger_career_role_search_vector
+    BEFORE INSERT OR UPDATE OF title, field, description, required_skills, tools_technologies
+    ON career_roles
+    FOR EACH ROW
+    EXECUTE FUNCTION update_career_role_search_vector();
+
+-- Indexes: GIN for full-text matches, trigram GIN on titles for typo tolerance
+CREATE INDEX IF NOT EXISTS idx_learning_paths_search ON learning_paths USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_posts_search ON posts USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_career_roles_search ON career_roles USING GIN (search_vector);
+
+CREATE INDEX IF NOT EXISTS idx_learning_paths_title_trgm ON learning_paths USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_posts_title_trgm ON posts USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_career_roles_title_trgm ON career_roles USING GIN (title gin_trgm_ops);
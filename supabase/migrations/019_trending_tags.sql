@@ -0,0 +1,179 @@
+-- Post Tags & Trending Tags
+-- Migration: 019_trending_tags.sql
+
+-- Tags are stored lowercased and trimmed so `tags @> '["tag"]'` matches exactly
+ALTER TABLE posts DISABLE TRIGGER update_posts_updated_at;
+UPDATE posts p
+SET tags = COALESCE((
+    SELECT jsonb_agg(DISTINCT lower(btrim(t.tag)))
+    FROM jsonb_array_elements_text(p.tags) AS t(tag)
+    WHERE btrim(t.tag) <> ''
+), '[]')
+WHERE jsonb_typeof(p.tags) = 'array' AND p.tags <> '[]';
+ALTER TABLE posts ENABLE TRIGGER update_posts_updated_at;
+
+-- New tagged posts per tag per 5-minute bucket (UTC)
+CREATE TABLE IF NOT EXISTS tag_buckets (
+    tag TEXT NOT NULL,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    posts_count INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (tag, bucket_start)
+);
+
+-- Trending windows. Buckets older than expired_before have already been
+-- subtracted from the window's running totals.
+CREATE TABLE IF NOT EXISTS tag_windows (
+    window_name VARCHAR(10) PRIMARY KEY,
+    length INTERVAL NOT NULL,
+    expired_before TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Running post count per tag for each window
+CREATE TABLE IF NOT EXISTS trending_tags (
+    window_name VARCHAR(10) NOT NULL REFERENCES tag_windows(window_name) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    posts_count INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (window_name, tag)
+);
+
+CREATE OR REPLACE FUNCTION tag_bucket(ts TIMESTAMP WITH TIME ZONE)
+RETURNS TIMESTAMP WITH TIME ZONE AS $$
+    SELECT date_bin('5 minutes', ts, TIMESTAMPTZ '2000-01-01 00:00:00+00')
+$$ LANGUAGE sql IMMUTABLE;
+
+INSERT INTO tag_windows (window_name, length, expired_before) VALUES
+    ('1h', INTERVAL '1 hour', tag_bucket(NOW()) - INTERVAL '1 hour'),
+    ('24h', INTERVAL '24 hours', tag_bucket(NOW()) - INTERVAL '24 hours'),
+    ('7d', INTERVAL '7 days', tag_bucket(NOW()) - INTERVAL '7 days')
+ON CONFLICT (window_name) DO NOTHING;
+
+-- Backfill the last week
+INSERT INTO tag_buckets (tag, bucket_start, posts_count)
+SELECT t.tag, tag_bucket(p.created_at), COUNT(DISTINCT p.id)
+FROM posts p
+CROSS JOIN LATERAL jsonb_array_elements_text(p.tags) AS t(tag)
+WHERE p.created_at >= NOW() - INTERVAL '7 days'
+  AND p.is_published = true AND p.moderation_status = 'approved'
+GROUP BY 1, 2
+ON CONFLICT (tag, bucket_start) DO NOTHING;
+
+INSERT INTO trending_tags (window_name, tag, posts_count)
+SELECT w.window_name, b.tag, SUM(b.posts_count)
+FROM tag_buckets b
+JOIN tag_windows w ON b.bucket_start >= w.expired_before
+GROUP BY 1, 2
+ON CONFLICT (window_name, tag) DO NOTHING;
+
+-- Add per-(tag, bucket) post count changes to the bucket and to every window
+-- still covering it. Windows that already slid past a bucket have subtracted
+-- it, and buckets older than every window are gone, so both are left alone.
+CREATE OR REPLACE FUNCTION apply_post_tag_counts(tags TEXT[], buckets TIMESTAMP WITH TIME ZONE[], deltas INTEGER[])
+RETURNS VOID AS $$
+    INSERT INTO tag_buckets (tag, bucket_start, posts_count)
+    SELECT c.tag, c.bucket_start, c.delta
+    FROM unnest(tags, buckets, deltas) AS c(tag, bucket_start, delta)
+    WHERE c.bucket_start >= (SELECT MIN(expired_before) FROM tag_windows)
+    ORDER BY 1, 2
+    ON CONFLICT (tag, bucket_start) DO UPDATE SET
+        posts_count = GREATEST(tag_buckets.posts_count + EXCLUDED.posts_count, 0);
+
+    INSERT INTO trending_tags (window_name, tag, posts_count)
+    SELECT w.window_name, c.tag, SUM(c.delta)
+    FROM unnest(tags, buckets, deltas) AS c(tag, bucket_start, delta)
+    JOIN tag_windows w ON c.bucket_start >= w.expired_before
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    ON CONFLICT (window_name, tag) DO UPDATE SET
+        posts_count = GREATEST(trending_tags.posts_count + EXCLUDED.posts_count, 0);
+$$ LANGUAGE sql;
+
+-- Count tags of new posts up and of deleted posts down, in the bucket of their
+-- created_at. Statement-level so bulk writes aggregate before touching the counters.
+CREATE OR REPLACE FUNCTION count_post_tags()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM apply_post_tag_counts(array_agg(tag), array_agg(bucket_start), array_agg(delta))
+        FROM (
+            SELECT t.tag, tag_bucket(p.created_at) AS bucket_start, COUNT(DISTINCT p.id)::int AS delta
+            FROM new_posts p
+            CROSS JOIN LATERAL jsonb_array_elements_text(COALESCE(p.tags, '[]')) AS t(tag)
+            WHERE p.is_published = true AND p.moderation_status = 'approved'
+            GROUP BY 1, 2
+        ) c;
+    ELSE
+        PERFORM apply_post_tag_counts(array_agg(tag), array_agg(bucket_start), array_agg(delta))
+        FROM (
+            SELECT t.tag, tag_bucket(p.created_at) AS bucket_start, -COUNT(DISTINCT p.id)::int AS delta
+            FROM old_posts p
+            CROSS JOIN LATERAL jsonb_array_elements_text(COALESCE(p.tags, '[]')) AS t(tag)
+            WHERE p.is_published = true AND p.moderation_status = 'approved'
+            GROUP BY 1, 2
+        ) c;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_count_post_tags
+    AFTER INSERT ON posts
+    REFERENCING NEW TABLE AS new_posts
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_post_tags();
+
+CREATE TRIGGER trigger_uncount_post_tags
+    AFTER DELETE ON posts
+    REFERENCING OLD TABLE AS old_posts
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_post_tags();
+
+-- Publishing, unpublishing, moderation and tag edits move a post in or out of
+-- its tags' counts. Row-level (transition tables cannot be limited to these
+-- columns), so counter updates on posts never reach it.
+CREATE OR REPLACE FUNCTION recount_post_tags()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM apply_post_tag_counts(array_agg(tag), array_agg(bucket_start), array_agg(delta))
+    FROM (
+        SELECT tag, bucket_start, SUM(delta)::int AS delta
+        FROM (
+            SELECT DISTINCT t.tag, tag_bucket(OLD.created_at) AS bucket_start, -1 AS delta
+            FROM jsonb_array_elements_text(COALESCE(OLD.tags, '[]')) AS t(tag)
+            WHERE OLD.is_published = true AND OLD.moderation_status = 'approved'
+            UNION ALL
+            SELECT DISTINCT t.tag, tag_bucket(NEW.created_at), 1
+            FROM jsonb_array_elements_text(COALESCE(NEW.tags, '[]')) AS t(tag)
+            WHERE NEW.is_published = true AND NEW.moderation_status = 'approved'
+        ) changes
+        GROUP BY 1, 2
+        HAVING SUM(delta) <> 0
+    ) c;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_recount_post_tags
+    AFTER UPDATE OF is_published, moderation_status, tags ON posts
+    FOR EACH ROW
+    WHEN (
+        (OLD.is_published, OLD.moderation_status, OLD.tags)
+            IS DISTINCT FROM (NEW.is_published, NEW.moderation_status, NEW.tags)
+    )
+    EXECUTE FUNCTION recount_post_tags();
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_posts_tags ON posts USING GIN (tags jsonb_path_ops)
+    WHERE is_published = true AND moderation_status = 'approved';
+CREATE INDEX IF NOT EXISTS idx_tag_buckets_bucket ON tag_buckets(bucket_start);
+CREATE INDEX IF NOT EXISTS idx_trending_tags_top ON trending_tags(window_name, posts_count DESC, tag);
+
+-- RLS
+ALTER TABLE tag_buckets ENABLE ROW LEVEL SECURITY;
+ALTER TABLE tag_windows ENABLE ROW LEVEL SECURITY;
+ALTER TABLE trending_tags ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Anyone can view trending tags" ON trending_tags FOR SELECT USING (true);
@@ -0,0 +1,42 @@
+-- Hot Feed Ranking
+-- Migration: 020_hot_scores.sql
+
+-- Time-decayed "hot" score. Newer posts get a linearly growing time bonus
+-- (one order of magnitude of engagement per 12.5 hours), so a score only
+-- changes when the post's engagement does and never needs re-decaying.
+CREATE OR REPLACE FUNCTION post_hot_score(
+    likes INTEGER, comments INTEGER, views INTEGER, created TIMESTAMP WITH TIME ZONE
+)
+RETURNS DOUBLE PRECISION AS $$
+    SELECT log(GREATEST(COALESCE(likes, 0) + 2 * COALESCE(comments, 0) + COALESCE(views, 0) / 10.0, 1))
+        + extract(epoch FROM created) / 45000.0
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS hot_score DOUBLE PRECISION NOT NULL DEFAULT 0;
+
+-- Backfill (without touching updated_at)
+ALTER TABLE posts DISABLE TRIGGER update_posts_updated_at;
+UPDATE posts SET hot_score = post_hot_score(likes_count, comments_count, views_count, created_at);
+ALTER TABLE posts ENABLE TRIGGER update_posts_updated_at;
+
+-- New posts are scored on insert; engagement changes are re-scored in batches
+-- by the hot-score background job (app/services/hot_scores.py)
+CREATE OR REPLACE FUNCTION set_post_hot_score()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.hot_score := post_hot_score(NEW.likes_count, NEW.comments_count, NEW.views_count, NEW.created_at);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_set_post_hot_score
+    BEFORE INSERT ON posts
+    FOR EACH ROW
+    EXECUTE FUNCTION set_post_hot_score();
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_posts_hot
+    ON posts(hot_score DESC, id DESC)
+    WHERE is_published = true AND moderation_status = 'approved';
+-- Counter updates bump updated_at, which is how the scorer finds active posts
+CREATE INDEX IF NOT EXISTS idx_posts_updated_at ON posts(updated_at);
@@ -0,0 +1,99 @@
+-- Incremental Enrollment Progress
+-- Migration: 021_enrollment_progress.sql
+
+-- Completed modules per enrollment, bumped by the API when a module first
+-- transitions to completed and reconciled by the counter-reconcile job
+ALTER TABLE enrollments ADD COLUMN IF NOT EXISTS completed_modules_count INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill
+UPDATE learning_paths lp SET total_modules = m.total
+FROM (
+    SELECT path_id, COUNT(*) AS total
+    FROM learning_modules
+    GROUP BY path_id
+) m
+WHERE lp.id = m.path_id AND lp.total_modules IS DISTINCT FROM m.total;
+
+UPDATE learning_paths SET total_modules = 0
+WHERE total_modules IS NULL
+   OR NOT EXISTS (SELECT 1 FROM learning_modules m WHERE m.path_id = learning_paths.id);
+
+UPDATE enrollments e SET completed_modules_count = mp.completed
+FROM (
+    SELECT enrollment_id, COUNT(*) AS completed
+    FROM module_progress
+    WHERE status = 'completed'
+    GROUP BY enrollment_id
+) mp
+WHERE e.id = mp.enrollment_id;
+
+-- Progress percentage is derived from the counter and the path's module count
+CREATE OR REPLACE FUNCTION enrollment_progress(completed INTEGER, total INTEGER)
+RETURNS DECIMAL(5,2) AS $$
+    SELECT CASE
+        WHEN COALESCE(total, 0) > 0 THEN LEAST(100, ROUND(COALESCE(completed, 0) * 100.0 / total, 2))
+        ELSE 0
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+UPDATE enrollments e SET progress_percentage = enrollment_progress(e.completed_modules_count, lp.total_modules)
+FROM learning_paths lp
+WHERE lp.id = e.path_id;
+
+CREATE OR REPLACE FUNCTION derive_enrollment_progress()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.progress_percentage := enrollment_progress(
+        NEW.completed_modules_count,
+        (SELECT total_modules FROM learning_paths WHERE id = NEW.path_id)
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_derive_enrollment_progress
+    BEFORE INSERT OR UPDATE OF completed_modules_count ON enrollments
+    FOR EACH ROW
+    EXECUTE FUNCTION derive_enrollment_progress();
+
+-- Keep learning_paths.total_modules current
+CREATE OR REPLACE FUNCTION update_path_total_modules()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.path_id = NEW.path_id THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE learning_paths SET total_modules = COALESCE(total_modules, 0) + 1 WHERE id = NEW.path_id;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE learning_paths SET total_modules = GREATEST(COALESCE(total_modules, 0) - 1, 0) WHERE id = OLD.path_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_update_path_total_modules
+    AFTER INSERT OR DELETE OR UPDATE OF path_id ON learning_modules
+    FOR EACH ROW
+    EXECUTE FUNCTION update_path_total_modules();
+
+-- A changed module count re-derives the progress of every enrollment in the path
+CREATE OR REPLACE FUNCTION rederive_path_progress()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE enrollments
+    SET progress_percentage = enrollment_progress(completed_modules_count, NEW.total_modules)
+    WHERE path_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_rederive_path_progress
+    AFTER UPDATE OF total_modules ON learning_paths
+    FOR EACH ROW
+    WHEN (OLD.total_modules IS DISTINCT FROM NEW.total_modules)
+    EXECUTE FUNCTION rederive_path_progress();
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_module_progress_enrollment ON module_progress(enrollment_id) WHERE status = 'completed';
@@ -0,0 +1,26 @@
+-- Learning Path Outlines
+-- Migration: 022_path_outlines.sql
+
+-- Module outlines are cached per path and keyed by learning_paths.updated_at,
+-- so any module change must touch its path
+CREATE OR REPLACE FUNCTION touch_learning_path()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE learning_paths SET updated_at = NOW() WHERE id = OLD.path_id;
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.path_id <> OLD.path_id) THEN
+        UPDATE learning_paths SET updated_at = NOW() WHERE id = NEW.path_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_touch_learning_path
+    AFTER INSERT OR UPDATE OR DELETE ON learning_modules
+    FOR EACH ROW
+    EXECUTE FUNCTION touch_learning_path();
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_learning_modules_outline ON learning_modules(path_id, order_index) WHERE is_published = true;
+CREATE INDEX IF NOT EXISTS idx_module_progress_enrollment_module ON module_progress(enrollment_id, module_id);
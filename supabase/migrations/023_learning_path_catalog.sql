@@ -0,0 +1,15 @@
+-- Learning Path Catalog Version
+-- Migration: 023_learning_path_catalog.sql
+
+-- The published path list is cached in-process (app/services/path_catalog.py)
+-- until this version moves; only columns shown in the catalog bump it
+INSERT INTO catalog_versions (name) VALUES ('learning_paths')
+ON CONFLICT (name) DO NOTHING;
+
+CREATE TRIGGER trigger_learning_paths_catalog_version
+    AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF
+        title, slug, description, short_description, thumbnail_url, category, difficulty,
+        estimated_hours, total_modules, skills_covered, is_published, is_featured, created_at
+    ON learning_paths
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_catalog_version('learning_paths');
@@ -0,0 +1,20 @@
+-- Progress Sync Idempotency
+-- Migration: 024_progress_sync.sql
+
+-- Client event ids already applied by POST /learning/progress/sync. A replayed
+-- event conflicts on the primary key and is reported as a duplicate; rows are
+-- dropped after PROGRESS_SYNC_RETENTION_DAYS by the progress-sync-trim job
+CREATE TABLE IF NOT EXISTS progress_sync_events (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    client_event_id VARCHAR(100) NOT NULL,
+    module_id UUID NOT NULL REFERENCES learning_modules(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, client_event_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_progress_sync_events_created ON progress_sync_events(created_at);
+
+-- RLS
+ALTER TABLE progress_sync_events ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own progress sync events" ON progress_sync_events FOR SELECT USING (auth.uid()::text = user_id::text);
@@ -0,0 +1,14 @@
+-- Career Role Catalog Version
+-- Migration: 025_career_role_catalog.sql
+
+-- Active career roles are cached in-process and vectorized by the
+-- recommendation engine (app/services/ml_engine.py) until this version moves
+INSERT INTO catalog_versions (name) VALUES ('career_roles')
+ON CONFLICT (name) DO NOTHING;
+
+CREATE TRIGGER trigger_career_roles_catalog_version
+    AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF
+        title, field, required_skills, recommended_skills, is_active
+    ON career_roles
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_catalog_version('career_roles');